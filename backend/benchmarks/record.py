@@ -0,0 +1,47 @@
+# Records live upstream responses into benchmarks/fixtures/ for replay.
+#
+#   python -m benchmarks.record
+#
+# Needs network access plus APIFY_API_KEY / GOOGLE_API_KEY (config or env).
+# The fixtures are committed so every run replays the same payloads; after
+# re-recording, re-record the baselines too (run --update-baseline).
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import FIXTURE_FILES, FIXTURES_DIR
+from services import ai_agent, http_client, market_data
+
+
+def _write(name, data):
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    path = FIXTURES_DIR / FIXTURE_FILES[name]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    print(f"Recorded {name} -> {path}")
+
+
+def main():
+    response = http_client.request("coingecko", "GET", "/coins/markets", params=market_data._markets_params(100, "usd"))
+    response.raise_for_status()
+    _write("coingecko_markets", response.json())
+
+    apify_request = market_data._apify_news_request("Finance Investing Stock Market")
+    if apify_request is None:
+        print("Skipping Apify and Gemini fixtures (no APIFY_API_KEY).")
+        return
+    path, params, payload = apify_request
+    response = http_client.request("apify", "POST", path, params=params, json=payload)
+    response.raise_for_status()
+    news = response.json()
+    _write("apify_news", news)
+
+    headlines = [item["title"] for item in market_data._normalize_news(news)[:10]]
+    analyses = ai_agent._analyze_batch_single_call(headlines, "")
+    _write("gemini_analyses", [analyses[i] for i in sorted(analyses)])
+
+
+if __name__ == "__main__":
+    main()
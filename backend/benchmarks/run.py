@@ -0,0 +1,158 @@
+# Offline benchmark runner.
+#
+#   python -m benchmarks.run                    # compare against baselines.json
+#   python -m benchmarks.run --update-baseline  # record new baselines
+#   python -m benchmarks.run --only news
+#
+# Run from backend/. Exits 1 when a benchmark's median is slower than its
+# baseline by more than the threshold (per-benchmark "threshold" in
+# baselines.json, else --threshold) and by more than MIN_DELTA_MS.
+#
+# Medians are compared relative to a calibration workload timed alongside
+# each benchmark (and recorded with its baseline), so a slower or busier
+# machine than the one that recorded the baselines does not read as a
+# regression.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import stubs
+from benchmarks.suite import BENCHMARKS
+
+BASELINES_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_THRESHOLD = 1.75
+# Differences this small are timer noise, never a regression
+MIN_DELTA_MS = 0.1
+WARMUP = 3
+DEFAULT_ROUNDS = 5
+# Iterations of the calibration workload per round
+CALIBRATION_ITERATIONS = 100
+
+
+def _time(bench, scale: float, rounds: int):
+    arg = bench.setup()
+    for _ in range(WARMUP):
+        bench.fn(arg)
+    best = None
+    # Best of several rounds: a busy machine only ever makes a round slower
+    for _ in range(rounds):
+        samples = []
+        for _ in range(max(1, int(bench.iterations * scale))):
+            start = time.perf_counter()
+            bench.fn(arg)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        result = {
+            "median_ms": round(statistics.median(samples), 4),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+            "runs": len(samples),
+        }
+        if best is None or result["median_ms"] < best["median_ms"]:
+            best = result
+    return best
+
+
+def _calibration_setup():
+    # Interpreter-bound work of the same kind as the suite: JSON, dicts, sorting, formatting
+    rng = random.Random(1)
+    rows = [{"id": f"coin-{i}", "price": rng.uniform(0.01, 1000), "change": rng.uniform(-10, 10)} for i in range(200)]
+    return json.dumps(rows)
+
+
+def _calibration_fn(payload):
+    rows = sorted(json.loads(payload), key=lambda row: row["change"])
+    return ", ".join(f"{row['id']} ${row['price']:,.2f} ({row['change']:+.2f}%)" for row in rows)
+
+
+def _calibrate(rounds: int) -> float:
+    from benchmarks.suite import Benchmark
+    bench = Benchmark("calibration", _calibration_setup, _calibration_fn, iterations=CALIBRATION_ITERATIONS)
+    return _time(bench, 1.0, rounds)["median_ms"]
+
+
+def _load_baselines():
+    try:
+        with open(BASELINES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the backend hot paths.")
+    parser.add_argument("--only", help="run benchmarks whose name contains this string")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed median slowdown ratio vs. baseline (default %(default)s)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="report the best of N rounds")
+    parser.add_argument("--update-baseline", action="store_true", help="write results to baselines.json")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    baselines = _load_baselines()
+    selected = [b for b in BENCHMARKS if not args.only or args.only in b.name]
+    results = {}
+    rounds = max(1, args.rounds)
+    with stubs.install():
+        for bench in selected:
+            # Timed next to each benchmark, so load that comes and goes during the run affects both alike
+            calibration = _calibrate(rounds)
+            results[bench.name] = _time(bench, args.scale, rounds)
+            results[bench.name]["calibration_ms"] = min(calibration, _calibrate(rounds))
+
+    regressions = []
+    rows = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        ratio, status = None, "new"
+        if baseline:
+            threshold = baseline.get("threshold", args.threshold)
+            recorded = baseline.get("calibration_ms")
+            # How much slower the machine is now than when the baseline was recorded
+            speed = result["calibration_ms"] / recorded if recorded else 1.0
+            expected = baseline["median_ms"] * speed
+            ratio = result["median_ms"] / expected if expected else None
+            slower = result["median_ms"] - expected
+            if ratio is not None and ratio > threshold and slower > MIN_DELTA_MS:
+                status = "REGRESSION"
+                regressions.append(name)
+            else:
+                status = "ok"
+        rows.append((name, result, baseline, ratio, status))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'benchmark':<28}{'median ms':>12}{'p95 ms':>10}{'baseline':>10}{'ratio':>8}  status")
+        for name, result, baseline, ratio, status in rows:
+            base = f"{baseline['median_ms']:.4f}" if baseline else "-"
+            print(f"{name:<28}{result['median_ms']:>12.4f}{result['p95_ms']:>10.4f}{base:>10}"
+                  f"{(f'{ratio:.2f}x' if ratio else '-'):>8}  {status}")
+
+    if args.update_baseline:
+        for name, result in results.items():
+            entry = dict(baselines.get(name, {}))
+            entry["median_ms"] = result["median_ms"]
+            entry["calibration_ms"] = result["calibration_ms"]
+            baselines[name] = entry
+        with open(BASELINES_PATH, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {BASELINES_PATH}")
+        return 0
+
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# Offline stand-ins for every upstream the node talks to.
+#
+# install() points the services at recorded responses (benchmarks/fixtures/)
+# and blocks outbound sockets, so a benchmark can never touch the network:
+#   - CoinGecko and Apify: http_client.request/arequest replay fixture JSON
+#   - Gemini: ai_agent.model is replaced by a model that replays analyses
+#   - MT5: the fake terminal backend with its simulated latency removed
+#   - config: a throwaway config dir instead of the user's
+import json
+import random
+import re
+import socket
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Recorded fixtures by name; see record.py
+FIXTURE_FILES = {
+    "coingecko_markets": "coingecko_markets.json",
+    "apify_news": "apify_news.json",
+    "gemini_analyses": "gemini_analyses.json",
+}
+
+
+def _synthetic_markets(count: int = 100) -> List[Dict[str, Any]]:
+    rng = random.Random(7)
+    coins = []
+    for rank in range(1, count + 1):
+        price = round(rng.uniform(0.01, 60000) / rank, 6)
+        coins.append({
+            "id": f"coin-{rank}",
+            "symbol": f"c{rank}",
+            "name": f"Coin {rank}",
+            "image": f"https://assets.example.com/coins/{rank}.png",
+            "current_price": price,
+            "market_cap": int(price * rng.uniform(1e6, 1e9)),
+            "market_cap_rank": rank,
+            "total_volume": int(price * rng.uniform(1e5, 1e8)),
+            "price_change_24h": round(price * rng.uniform(-0.1, 0.1), 6),
+            "price_change_percentage_24h": round(rng.uniform(-10, 10), 4),
+            "price_change_percentage_1h_in_currency": round(rng.uniform(-2, 2), 4),
+            "price_change_percentage_7d_in_currency": round(rng.uniform(-20, 20), 4),
+            "circulating_supply": rng.uniform(1e6, 1e10),
+            "total_supply": rng.uniform(1e6, 1e10),
+            "ath": price * rng.uniform(1, 5),
+            "ath_change_percentage": round(rng.uniform(-90, 0), 4),
+            "sparkline_in_7d": {"price": [round(price * (1 + rng.gauss(0, 0.02)), 6) for _ in range(168)]},
+            "last_updated": "2026-01-01T00:00:00.000Z",
+        })
+    return coins
+
+
+def _synthetic_news(count: int = 10) -> List[Dict[str, Any]]:
+    rng = random.Random(11)
+    topics = ["Fed", "Bitcoin", "Nvidia", "Oil", "ECB", "Tesla", "Gold", "Treasury yields", "Apple", "Ethereum"]
+    verbs = ["surges", "slides", "holds steady", "rallies", "drops"]
+    results = [{
+        "title": f"{topics[i % len(topics)]} {rng.choice(verbs)} as markets weigh outlook ({i})",
+        "url": f"https://news.example.com/{i}",
+        "date": "1 hour ago",
+    } for i in range(count)]
+    return [{"organicResults": results}]
+
+
+def _synthetic_analyses(count: int = 10) -> List[Dict[str, Any]]:
+    rng = random.Random(13)
+    return [{
+        "impact_score": round(rng.uniform(-10, 10), 1),
+        "sentiment": rng.choice(["Bullish", "Bearish", "Neutral"]),
+        "affected_assets": ["BTC", "SPY"],
+        "reasoning": "Recorded analysis used for offline benchmarks.",
+        "ai_mentor_advice": "Size positions for the volatility.",
+    } for _ in range(count)]
+
+
+_SYNTHETIC = {
+    "coingecko_markets": _synthetic_markets,
+    "apify_news": _synthetic_news,
+    "gemini_analyses": _synthetic_analyses,
+}
+
+
+def load_fixture(name: str) -> Any:
+    """Recorded response if present, otherwise a deterministic synthetic one of the same shape."""
+    path = FIXTURES_DIR / FIXTURE_FILES[name]
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return _SYNTHETIC[name]()
+
+
+class StubResponse:
+    """The parts of requests.Response / httpx.Response the services use."""
+
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.reason = "OK" if status_code == 200 else "Error"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        # Parse on every call, like the real clients do
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class StubGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubModel:
+    """Replays recorded analyses in place of genai.GenerativeModel."""
+
+    def __init__(self, analyses: List[Dict[str, Any]]):
+        self.analyses = analyses
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        self.calls += 1
+        text = prompt if isinstance(prompt, str) else json.dumps(prompt, default=str)
+        match = re.search(r"exactly (\d+) objects", text)
+        if match:
+            count = int(match.group(1))
+            items = [{"index": i, **self.analyses[i % len(self.analyses)]} for i in range(count)]
+            return StubGeminiResponse(json.dumps(items))
+        return StubGeminiResponse(json.dumps(self.analyses[0]))
+
+
+@lru_cache(maxsize=None)
+def _fixture_bytes(name: str) -> bytes:
+    # Serialized once, so replaying a response costs what receiving it would
+    return json.dumps(load_fixture(name)).encode("utf-8")
+
+
+def _route(provider: str, path: str) -> StubResponse:
+    if provider == "coingecko" and path.startswith("/coins/markets"):
+        return StubResponse(_fixture_bytes("coingecko_markets"))
+    if provider == "apify":
+        return StubResponse(_fixture_bytes("apify_news"))
+    return StubResponse(json.dumps({"error": f"no fixture for {provider} {path}"}).encode("utf-8"), status_code=404)
+
+
+def _blocked(*args, **kwargs):
+    raise OSError("network access is disabled while benchmarking")
+
+
+@contextmanager
+def install():
+    """Routes every upstream to fixtures for the duration of the block."""
+    from services import (ai_agent, analysis_cache, config_manager, fake_mt5, http_client, market_data,
+                          market_store, metatrader_service, news_ingest, rate_limit)
+
+    saved = {
+        "config_dir": config_manager._config_dir,
+        "analysis_cache": analysis_cache._cache,
+        "market_store": market_store._store,
+        "ingestor": news_ingest._ingestor,
+        "news_summary": market_data._news_summary,
+        "limiters": rate_limit._limiters,
+        "request": http_client.request,
+        "arequest": http_client.arequest,
+        "model": ai_agent.model,
+        "mt5": metatrader_service.mt5,
+        "latency": fake_mt5.LATENCY,
+        "connect": socket.socket.connect,
+        "create_connection": socket.create_connection,
+    }
+    tmp = tempfile.TemporaryDirectory(prefix="pulse-bench-")
+    config_manager._config_dir = Path(tmp.name)
+    analysis_cache._cache = None
+    market_store._store = None
+    news_ingest._ingestor = None
+    market_data._news_summary = None
+    # Fixtures are free: benchmarks measure our code, not provider quotas
+    unlimited = {f"RATE_LIMIT_{name.upper()}": "1000000/1000000" for name in rate_limit.DEFAULT_RATES}
+    config_manager.save_config({"APIFY_API_KEY": "offline", "GOOGLE_API_KEY": "offline", **unlimited})
+    rate_limit._limiters = {}
+
+    def request(provider, method, path, **kwargs):
+        return _route(provider, path)
+
+    async def arequest(provider, method, path, **kwargs):
+        return _route(provider, path)
+
+    http_client.request, http_client.arequest = request, arequest
+    ai_agent.model = StubModel(load_fixture("gemini_analyses"))
+    fake_mt5.LATENCY = 0.0
+    metatrader_service.use_backend(fake_mt5)
+    socket.socket.connect = _blocked
+    socket.create_connection = _blocked
+    try:
+        yield
+    finally:
+        socket.socket.connect = saved["connect"]
+        socket.create_connection = saved["create_connection"]
+        metatrader_service.use_backend(saved["mt5"])
+        fake_mt5.LATENCY = saved["latency"]
+        ai_agent.model = saved["model"]
+        http_client.request, http_client.arequest = saved["request"], saved["arequest"]
+        config_manager._config_dir = saved["config_dir"]
+        analysis_cache._cache = saved["analysis_cache"]
+        market_store._store = saved["market_store"]
+        news_ingest._ingestor = saved["ingestor"]
+        market_data._news_summary = saved["news_summary"]
+        rate_limit._limiters = saved["limiters"]
+        tmp.cleanup()
@@ -0,0 +1,122 @@
+# Benchmarked hot paths. Each benchmark is (name, setup, fn): setup runs
+# once, outside the timed region, and returns the argument passed to fn.
+from typing import Any, Callable, List, NamedTuple
+
+from .stubs import load_fixture
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Any]
+    fn: Callable[[Any], Any]
+    iterations: int = 200
+
+
+def _clear_market_caches():
+    from services import market_data
+    for cache in (market_data.prices_cache, market_data.history_cache,
+                  market_data.indicators_cache, market_data.downsample_cache):
+        cache.clear()
+
+
+def _warm_prices():
+    from services import market_data
+    _clear_market_caches()
+    market_data.get_crypto_prices(limit=100)
+
+
+def _prices_normalize(raw):
+    from services import market_data
+    return market_data._normalize_coins(raw)
+
+
+def _prices_load(_):
+    # Includes the write-through to the market store (prices.store on its own)
+    from services import market_data
+    return market_data._load_crypto_prices(100, "usd")
+
+
+def _normalized_prices():
+    from services import market_data
+    return market_data._normalize_coins(load_fixture("coingecko_markets"))
+
+
+def _prices_store(coins):
+    from services import market_store
+    return market_store.get_store().put_prices("usd", coins)
+
+
+def _context(include_indicators):
+    from services import market_data
+    return market_data.get_market_context_string(include_indicators=include_indicators)
+
+
+def _chat_context(message):
+    from services import chat_context, market_data
+    return chat_context.build_context(message, market_data.get_crypto_prices(limit=100), [], include_indicators=True)
+
+
+def _news_cold(_):
+    from services import analysis_cache, market_data
+    analysis_cache.get_cache().clear()
+    return market_data.fetch_market_news()
+
+
+def _news_warm(_):
+    from services import market_data
+    return market_data.fetch_market_news()
+
+
+def _news_refresh_warm():
+    # One full refresh first: later ones scrape the same page and find nothing new
+    from services import market_data
+    market_data.build_news_snapshot()
+
+
+def _news_refresh(_):
+    from services import market_data
+    return market_data.build_news_snapshot()
+
+
+def _mt5_connect():
+    from services import fake_mt5
+    from services.metatrader_service import MT5Service
+    MT5Service.connect(1, "offline", "Bench-Server")
+    fake_mt5._state["positions"] = fake_mt5._seed_positions(200)
+
+
+def _mt5_positions(_):
+    from services.metatrader_service import MT5Service
+    return MT5Service.get_positions()
+
+
+def _config_setup():
+    from services import config_manager
+    config_manager.save_config({f"BENCH_KEY_{i}": f"value-{i}" for i in range(50)})
+
+
+def _config_warm(_):
+    from services import config_manager
+    return config_manager.load_config()
+
+
+def _config_cold(_):
+    from services import config_manager
+    config_manager._cache["signature"] = None  # force a re-read from disk
+    return config_manager.load_config()
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("prices.normalize", lambda: load_fixture("coingecko_markets"), _prices_normalize),
+    Benchmark("prices.load", _clear_market_caches, _prices_load),
+    Benchmark("prices.store", _normalized_prices, _prices_store),
+    Benchmark("context.string", lambda: (_warm_prices(), False)[1], _context),
+    Benchmark("context.string_indicators", lambda: (_warm_prices(), True)[1], _context),
+    Benchmark("context.relevant", lambda: (_warm_prices(), "How are SOL and shiba inu doing?")[1], _chat_context),
+    Benchmark("news.fetch_cold", lambda: None, _news_cold, iterations=50),
+    Benchmark("news.fetch_cached", lambda: _news_cold(None), _news_warm, iterations=50),
+    Benchmark("news.refresh_incremental", _news_refresh_warm, _news_refresh, iterations=50),
+    Benchmark("mt5.positions", _mt5_connect, _mt5_positions),
+    Benchmark("config.load_cached", _config_setup, _config_warm, iterations=2000),
+    Benchmark("config.load_cold", _config_setup, _config_cold, iterations=500),
+]
@@ -6,10 +6,6 @@ import sys
 import os
 import socket
 
-# We must import the app *after* any sys path manipulations in a packaged environment,
-# but since this is the entry point, we can just import it.
-from main import app
-
 class PulseNodeGUI:
     def __init__(self, root):
         self.root = root
@@ -80,6 +76,9 @@ class PulseNodeGUI:
             logger = logging.getLogger("uvicorn.error")
             logger.addHandler(logging.StreamHandler(sys.stdout))
             
+            # Imported here, off the Tk thread, so the window shows before the app loads
+            from main import app
+
             # Run
             uvicorn.run(app, host="127.0.0.1", port=8000, log_config=None)
         except Exception as e:
@@ -1,9 +1,12 @@
+from services import startup  # first, so the import report covers everything below
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
+startup.mark("fastapi")
 
 app = FastAPI(title="AI-Native Financial Ecosystem API")
 
@@ -18,8 +21,9 @@ origins = [
     "*", # Allow all for development flexibility
 ]
 
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
 from starlette.responses import JSONResponse
+from services.metrics import MetricsMiddleware
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,52 +33,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class CORSFallbackMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        if request.method == "OPTIONS":
+class CORSFallbackMiddleware:
+    # Pure ASGI rather than BaseHTTPMiddleware: no extra task and body
+    # re-streaming per request, and streamed (SSE) responses pass through as-is
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] == "OPTIONS":
             response = JSONResponse({})
             response.headers["Access-Control-Allow-Origin"] = "*"
             response.headers["Access-Control-Allow-Methods"] = "*"
             response.headers["Access-Control-Allow-Headers"] = "*"
             response.headers["Access-Control-Allow-Credentials"] = "true"
-            return response
-        response = await call_next(request)
-        response.headers["Access-Control-Allow-Origin"] = "*" # Force on all responses
-        return response
+            await response(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["Access-Control-Allow-Origin"] = "*" # Force on all responses
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
 
 app.add_middleware(CORSFallbackMiddleware)
 
+# Compress larger bodies (price lists, history); SSE streams are left alone
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Outermost, so route timings include every other middleware
+app.add_middleware(MetricsMiddleware)
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to the AI-Native Financial Ecosystem API"}
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "healthy"}
 
 from services import market_data
+from services import market_store
+from services import history_store
 from services import ai_agent
+from services import http_client
+from services import upstreams
+from services import mt_history
+from services import encoding
+from services import downsample
+from services import metrics
+from services import rate_limit
+from services import chat_context
+from services import metatrader_service
 from services.metatrader_service import MT5Service
+from services.mt_stream import PositionStream
+from services.mt5_worker import worker as mt5_worker
 from services import config_manager
 from pydantic import BaseModel
-from fastapi import HTTPException
-import google.generativeai as genai
+from typing import Optional
+from fastapi import HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import asyncio
+import json
+import time
+
+startup.mark("services")
+
+@app.on_event("startup")
+async def start_background_refresh():
+    # Serve the last persisted news at once instead of cold-starting the scrape
+    await asyncio.to_thread(market_data.restore_news_snapshot)
+    market_data.news_refresher.start()
+    startup.ready()
+    print(startup.summary())
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    market_data.news_refresher.stop()
+    mt5_worker.stop()
+    # Release pooled upstream connections
+    await http_client.aclose()
 
 class ChatRequest(BaseModel):
     message: str
+    include_indicators: bool = False
+    # Keeps a conversation across requests; without one each message stands alone
+    session_id: Optional[str] = None
 
 class MTConnectRequest(BaseModel):
     login: int
     password: str
     server: str
 
+class MTHistoryRequest(BaseModel):
+    symbol: str
+    timeframe: str = "M1"  # M1..D1, or "ticks"
+    date_from: int  # epoch seconds
+    date_to: Optional[int] = None  # defaults to now
+
 class ConfigUpdateRequest(BaseModel):
     config: dict
 
 @app.get("/api/config")
-def get_local_config():
+async def get_local_config():
     """Returns the current local configuration (with masked API keys for security)."""
-    config = config_manager.load_config()
+    config = await asyncio.to_thread(config_manager.load_config)
     # Mask sensitive keys before returning to frontend
     masked_config = {}
     for k, v in config.items():
@@ -85,112 +152,377 @@ def get_local_config():
     return {"status": "success", "config": masked_config}
 
 @app.post("/api/config")
-def update_local_config(request: ConfigUpdateRequest):
+async def update_local_config(request: ConfigUpdateRequest):
     """Updates the local backend configuration file."""
     # Never log full API keys here
-    updated = config_manager.save_config(request.config)
-    
-    # Reload AI API key if it was updated
-    if "GOOGLE_API_KEY" in request.config:
-        genai.configure(api_key=request.config["GOOGLE_API_KEY"])
-        
+    # Subscribers (e.g. the Gemini client) pick up changed keys themselves
+    await asyncio.to_thread(config_manager.save_config, request.config)
     return {"status": "success", "message": "Configuration saved locally."}
 
 @app.get("/api/insight")
-def get_insight():
+async def get_insight():
     """
     Returns the latest AI-driven market insight.
     """
-    # In a real app, this would fetch news and analyze it live.
-    # For now, let's enhance the mock data with real AI analysis on a static headline.
-    # For now, let's enhance the mock data with real AI analysis on a static headline.
-    insight = market_data.get_latest_insight() # This function was removed/replaced, let's use summary instead or fix imports if needed. 
-    # Actually, let's replace this endpoint logic since get_latest_insight is gone.
+    # get_latest_insight is gone; insights now come from the news summary.
     return {"message": "Use /api/news/summary for insights."}
 
+# How long a cold request waits for the very first news snapshot
+NEWS_COLD_START_WAIT = 5
+
+def _set_snapshot_headers(response: Response, snapshot):
+    response.headers["X-Snapshot-Version"] = str(snapshot.version)
+    response.headers["X-Snapshot-Age"] = f"{snapshot.age():.1f}"
+    response.headers["X-Snapshot-Stale"] = "true" if market_data.news_refresher.is_stale(snapshot) else "false"
+
 @app.get("/api/news/summary")
-def get_market_summary_endpoint():
+async def get_market_summary_endpoint(response: Response):
     """
-    Returns AI-generated market summary.
+    Returns the latest AI-generated market summary snapshot.
+    Never blocks on the pipeline once a snapshot exists; stale data triggers a background refresh.
     """
-    return market_data.get_market_summary()
+    snapshot = await market_data.news_refresher.aget(NEWS_COLD_START_WAIT)
+    if snapshot is None:
+        return ai_agent.generate_market_summary([])
+    _set_snapshot_headers(response, snapshot)
+    return snapshot.data["summary"]
+
+# Longest a chat waits for MT5 positions before answering without them
+CHAT_POSITIONS_TIMEOUT = 1.0
+
+async def _chat_context(request: ChatRequest) -> str:
+    """
+    Market context relevant to the message: the coins and open MT5
+    positions it mentions, within the context token budget.
+    """
+    positions = []
+    if metatrader_service.is_connected():
+        try:
+            snapshot = await asyncio.wait_for(mt5_worker.snapshot(), CHAT_POSITIONS_TIMEOUT)
+            positions = snapshot["positions"]
+        except Exception as e:
+            print(f"Chat context without positions: {e!r}")
+    return await chat_context.build_context_async(request.message, positions, request.include_indicators)
 
 @app.post("/api/ai/chat")
-def chat_with_expert(request: ChatRequest):
+async def chat_with_expert(request: ChatRequest):
     """
     Chat with the AI Finance Expert.
     """
     # Fetch real-time context
-    context = market_data.get_market_context_string()
-    
-    response = ai_agent.chat_with_finance_expert(request.message, context=context)
-    return {"reply": response}
+    context = await _chat_context(request)
 
-@app.get("/api/news")
-def get_news():
+    response = await upstreams.run(
+        "gemini", ai_agent.chat_with_finance_expert, request.message, context=context, session_id=request.session_id
+    )
+    return {"reply": response, "session_id": request.session_id}
+
+def _range_seconds(start: Optional[int], end: Optional[int], hours: float):
+    # Epoch milliseconds in, store timestamps (epoch seconds) out
+    end_s = end / 1000 if end is not None else time.time()
+    start_s = start / 1000 if start is not None else end_s - hours * 3600
+    return start_s, end_s
+
+@app.get("/api/news/archive")
+async def get_news_archive(start: Optional[int] = None, end: Optional[int] = None, hours: float = 24,
+                           limit: int = 100, min_impact: Optional[float] = None):
     """
-    Returns real-time market news from Apify.
+    Returns stored enriched news first seen in a time range, newest first.
+    `start`/`end` are epoch milliseconds (default: the last `hours`);
+    `min_impact` keeps items with |impact_score| at least that large.
     """
-    return market_data.fetch_market_news()
+    start_s, end_s = _range_seconds(start, end, hours)
+    return await asyncio.to_thread(market_store.get_store().news_between, start_s, end_s, limit, min_impact)
 
-@app.get("/api/news/summary")
-def get_market_summary():
+@app.get("/api/news/summaries")
+async def get_news_summaries(start: Optional[int] = None, end: Optional[int] = None, hours: float = 24,
+                             limit: int = 100):
     """
-    Returns a cohesive AI-generated market summary.
+    Returns stored market summaries in a time range, newest first.
     """
-    try:
-        return market_data.get_market_summary()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    start_s, end_s = _range_seconds(start, end, hours)
+    return await asyncio.to_thread(market_store.get_store().summaries_between, start_s, end_s, limit)
+
+@app.get("/api/store/stats")
+async def get_store_stats():
+    """
+    Returns row counts, file size and read/write counters of the local market store.
+    """
+    return await asyncio.to_thread(market_store.get_store().stats)
+
+@app.get("/api/news/ingestion")
+async def get_news_ingestion_stats():
+    """
+    Returns the rolling news window and seen-set counters of incremental ingestion.
+    """
+    from services import news_ingest
+    return news_ingest.get_ingestor().stats()
+
+@app.get("/api/news/analysis-cache")
+async def get_analysis_cache_stats():
+    """
+    Returns size and hit ratio of the persistent headline-analysis cache.
+    """
+    from services import analysis_cache
+    # The first call loads the cache file
+    return await asyncio.to_thread(lambda: analysis_cache.get_cache().stats())
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus text exposition: route and upstream latency histograms,
+    upstream error counters, cache hit ratios and upstream pool state.
+    """
+    from services import analysis_cache
+    news_analysis = await asyncio.to_thread(lambda: analysis_cache.get_cache().stats())
+    caches = [
+        market_data.prices_cache.stats(),
+        market_data.history_cache.stats(),
+        market_data.indicators_cache.stats(),
+        market_data.downsample_cache.stats(),
+        {**news_analysis, "name": "news_analysis", "size": news_analysis["entries"]},
+        ai_agent.chat_answers.stats(),
+    ]
+    return PlainTextResponse(metrics.render(caches, upstreams.stats(), rate_limit.stats()),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    Returns hit/miss counters for the in-memory market data caches.
+    """
+    return [
+        market_data.prices_cache.stats(),
+        market_data.history_cache.stats(),
+        market_data.indicators_cache.stats(),
+        market_data.downsample_cache.stats(),
+    ]
+
+@app.get("/api/ai/chat/sessions")
+async def get_chat_session_stats():
+    """
+    Returns the number of live chat sessions and the history budget.
+    """
+    return ai_agent.chat_sessions.stats()
+
+@app.get("/api/ai/chat/cache")
+async def get_chat_answer_cache_stats():
+    """
+    Returns hit rate of the near-duplicate chat answer cache, including
+    near (non-identical) hits and answers dropped because the market moved.
+    """
+    return ai_agent.chat_answers.stats()
+
+@app.delete("/api/ai/chat/sessions/{session_id}")
+async def reset_chat_session(session_id: str):
+    """
+    Forgets a chat session's history.
+    """
+    ai_agent.chat_sessions.reset(session_id)
+    return {"status": "success"}
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+@app.post("/api/ai/chat/stream")
+async def chat_with_expert_stream(request: ChatRequest):
+    """
+    Streams the Finance Expert's reply as Server-Sent Events.
+    Each chunk arrives as `data: {"delta": ...}`; a final `event: done`
+    frame carries timing metadata (or `event: error` on failure).
+    """
+    context = await _chat_context(request)
+
+    async def events():
+        started = time.perf_counter()
+        first_token_ms = None
+        chars = 0
+        try:
+            async for delta in upstreams.get_pool("gemini").stream(
+                ai_agent.stream_chat_with_finance_expert,
+                request.message, context=context, session_id=request.session_id
+            ):
+                if first_token_ms is None:
+                    first_token_ms = round((time.perf_counter() - started) * 1000)
+                chars += len(delta)
+                yield _sse({"delta": delta})
+        except Exception as e:
+            yield _sse({"error": f"System Error: {e}"}, event="error")
+            return
+        yield _sse({
+            "first_token_ms": first_token_ms,
+            "total_ms": round((time.perf_counter() - started) * 1000),
+            "chars": chars,
+            "session_id": request.session_id,
+        }, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/startup")
+async def get_startup_report():
+    """
+    Returns how long each import stage took, when the server became ready
+    and the cost of SDKs loaded lazily on first use (Gemini, MetaTrader5).
+    """
+    return startup.report()
+
+@app.get("/api/upstreams")
+async def get_upstream_stats():
+    """
+    Returns per-upstream concurrency limits, queue depth and wait times,
+    plus batching counters for the MT5 worker.
+    """
+    return upstreams.stats() + [mt5_worker.stats()]
+
+@app.get("/api/rate-limits")
+async def get_rate_limits():
+    """
+    Returns each provider's request budget: tokens left, callers queued by
+    priority, 429 backoffs and the average wait for budget.
+    """
+    return rate_limit.stats()
+
+@app.get("/api/news")
+async def get_news(response: Response):
+    """
+    Returns the latest enriched market news snapshot (refreshed in the background).
+    """
+    snapshot = await market_data.news_refresher.aget(NEWS_COLD_START_WAIT)
+    if snapshot is None:
+        return []
+    _set_snapshot_headers(response, snapshot)
+    return snapshot.data["news"]
+
+def _check_downsample(points: Optional[int], method: str):
+    if method not in downsample.METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(downsample.METHODS)}")
+    if points is not None and points < 4:
+        raise HTTPException(status_code=400, detail="points must be at least 4")
+
+def _check_coin_id(coin_id: str):
+    if not history_store.valid_coin_id(coin_id):
+        raise HTTPException(status_code=400, detail=f"Invalid coin id {coin_id}")
 
 @app.get("/api/history/{coin_id}")
-def get_history(coin_id: str, days: str = "1"):
+async def get_history(coin_id: str, days: str = "1", points: Optional[int] = None, method: str = "lttb"):
     """
     Returns historical price data for a coin.
+    `points` downsamples to at most that many points (`method` lttb or minmax).
     """
-    prices = market_data.get_coin_history(coin_id, days)
+    _check_coin_id(coin_id)
+    _check_downsample(points, method)
+    tail, prices = await market_data.get_coin_history_versioned_async(coin_id, days)
     if not prices:
         # Return mock data if API fails to ensure UI consistency
         import random
         return [100 + random.uniform(-5, 5) for _ in range(50)]
+    if points:
+        return market_data.downsample_history(coin_id, days, prices, tail, points, method)
     return prices
 
+@app.get("/api/history/{coin_id}/series")
+async def get_history_series(coin_id: str, days: str = "1", start: Optional[int] = None,
+                             end: Optional[int] = None, step: Optional[int] = None,
+                             points: Optional[int] = None, method: str = "lttb"):
+    """
+    Returns timestamped price/volume history from the local store.
+    `start`/`end` are epoch milliseconds; `step` resamples to that many seconds;
+    `points` downsamples to at most that many points (`method` lttb or minmax).
+    """
+    _check_coin_id(coin_id)
+    _check_downsample(points, method)
+    payload = await market_data.get_coin_history_series_async(coin_id, days, start=start, end=end, step=step)
+    if points:
+        return market_data.downsample_series(payload, points, method)
+    return payload
+
+@app.get("/api/crypto/{coin_id}/snapshots")
+async def get_price_snapshots(coin_id: str, vs_currency: str = "usd", start: Optional[int] = None,
+                              end: Optional[int] = None, hours: float = 24, limit: int = 1000):
+    """
+    Returns the stored price snapshots of one coin (one per prices fetch),
+    oldest first. `start`/`end` are epoch milliseconds (default: the last `hours`).
+    """
+    start_s, end_s = _range_seconds(start, end, hours)
+    return await asyncio.to_thread(market_store.get_store().price_history, coin_id, vs_currency,
+                                   start_s, end_s, limit)
+
+@app.get("/api/indicators")
+async def get_indicators(ids: Optional[str] = None, per_page: int = 100):
+    """
+    Returns the latest technical indicators (SMA/EMA, RSI, MACD, Bollinger,
+    ATR, volatility) per coin, computed over 7d sparklines.
+    `ids` is an optional comma-separated list of CoinGecko ids.
+    """
+    id_list = [i.strip() for i in ids.split(",") if i.strip()] if ids else None
+    return await market_data.get_indicators_async(id_list, per_page=per_page)
+
 @app.get("/api/crypto/prices")
-def get_crypto_prices(vs_currency: str = "usd", per_page: int = 100):
+async def get_crypto_prices(request: Request, vs_currency: str = "usd", per_page: int = 100,
+                            fields: Optional[str] = None, sparkline: Optional[str] = None,
+                            points: Optional[int] = None, method: str = "lttb"):
     """
     Returns live crypto prices from CoinGecko.
+    `fields` is an optional comma-separated projection (e.g. `id,current_price`).
+    `sparkline=f32` sends sparkline_7d as packed little-endian float32
+    (base64 in JSON). Send `Accept: application/msgpack` for MessagePack.
+    `points` downsamples sparkline_7d (`method` lttb or minmax).
     """
-    return market_data.fetch_crypto_prices(vs_currency=vs_currency, per_page=per_page)
+    _check_downsample(points, method)
+    try:
+        projection = encoding.parse_fields(fields, market_data.PRICE_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if sparkline not in (None, "list", "f32"):
+        raise HTTPException(status_code=400, detail="sparkline must be 'list' or 'f32'")
+
+    coins = await market_data.fetch_crypto_prices_async(vs_currency=vs_currency, per_page=per_page)
+    if points and (projection is None or "sparkline_7d" in projection):
+        coins = market_data.downsample_sparklines(coins, points, method)
+    coins = encoding.project(coins, projection)
+    media_type = encoding.negotiate(request.headers.get("accept"))
+    if sparkline == "f32":
+        coins = encoding.pack_series(coins, "sparkline_7d", as_base64=media_type == encoding.JSON)
+    body, media_type = encoding.encode(coins, media_type)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
 
 # --- MetaTrader 5 Endpoints ---
 
+MT_CANDLES_MAX_LIMIT = 5000
+
 @app.post("/api/mt/connect")
-def connect_mt(request: MTConnectRequest):
+async def connect_mt(request: MTConnectRequest):
     """
     Connect to MT5 terminal and return account info.
     """
-    success, msg = MT5Service.connect(request.login, request.password, request.server)
+    success, msg = await mt5_worker.call(MT5Service.connect, request.login, request.password, request.server)
     if not success:
         raise HTTPException(status_code=401, detail=msg)
     
-    info = MT5Service.get_account_info()
+    info = await mt5_worker.call(MT5Service.get_account_info)
     return {"status": "success", "account": info}
 
 @app.post("/api/mt/disconnect")
-def disconnect_mt():
+async def disconnect_mt():
     """
     Disconnect from MT5 terminal.
     """
-    success = MT5Service.disconnect()
+    success = await mt5_worker.call(MT5Service.disconnect)
     return {"status": "success" if success else "error"}
 
 @app.get("/api/mt/positions")
-def get_mt_positions():
+async def get_mt_positions():
     """
     Get all active positions from connected MT5 account.
     """
-    positions = MT5Service.get_positions()
-    summary = MT5Service.get_account_info()
+    # One batched terminal round-trip, shared with concurrent callers
+    snapshot = await mt5_worker.snapshot()
+    positions, summary = snapshot["positions"], snapshot["account"]
     
     return {
         "status": "success",
@@ -200,6 +532,73 @@ def get_mt_positions():
         "profit": summary.get("profit", 0) if summary else 0
     }
 
+def _check_mt_symbol(symbol: str):
+    if not mt_history.valid_symbol(symbol):
+        raise HTTPException(status_code=400, detail=f"Invalid symbol {symbol}")
+
+@app.post("/api/mt/history/ingest")
+async def ingest_mt_history(request: MTHistoryRequest):
+    """
+    Bulk-copies candles (or ticks) for a symbol from the terminal into the
+    local history store. Only the parts of the range not stored yet are fetched.
+    """
+    _check_mt_symbol(request.symbol)
+    if request.timeframe != "ticks" and request.timeframe not in mt_history.TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframe {request.timeframe}")
+    date_to = request.date_to or int(time.time())
+    try:
+        if request.timeframe == "ticks":
+            result = await mt5_worker.ingest(MT5Service.ticks_ingest_plan, request.symbol, request.date_from, date_to)
+        else:
+            result = await mt5_worker.ingest(MT5Service.rates_ingest_plan, request.symbol, request.timeframe,
+                                             request.date_from, date_to)
+    except (RuntimeError, ValueError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"symbol": request.symbol, "timeframe": request.timeframe, **result}
+
+@app.get("/api/mt/candles/{symbol}")
+async def get_mt_candles(symbol: str, timeframe: str = "M1", start: Optional[int] = None,
+                         end: Optional[int] = None, limit: int = 500):
+    """
+    Pages through stored candles (epoch seconds, oldest first) without
+    touching the terminal. Pass the returned `next` as `start` for the next page.
+    """
+    _check_mt_symbol(symbol)
+    if timeframe not in mt_history.TIMEFRAMES:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframe {timeframe}")
+    limit = max(1, min(limit, MT_CANDLES_MAX_LIMIT))
+    return await asyncio.to_thread(mt_history.candles_page, symbol, timeframe, start, end, limit)
+
+# Seconds between terminal polls for the positions stream (MT_STREAM_INTERVAL in config)
+MT_STREAM_INTERVAL = 1.0
+
+def _mt_stream_interval() -> float:
+    try:
+        return float(config_manager.get_api_key("MT_STREAM_INTERVAL") or MT_STREAM_INTERVAL)
+    except ValueError:
+        return MT_STREAM_INTERVAL
+
+position_stream = PositionStream(interval=_mt_stream_interval())
+
+@app.websocket("/ws/mt/positions")
+async def stream_mt_positions(websocket: WebSocket):
+    """
+    Pushes MT5 positions and account state: a full snapshot on connect,
+    then incremental per-ticket diffs. All clients share one terminal poll.
+    """
+    await websocket.accept()
+    try:
+        await position_stream.subscribe(websocket)
+        while True:
+            # Clients don't send anything; this just waits for the disconnect
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        position_stream.unsubscribe(websocket)
+
+startup.mark("routes")
+
 if __name__ == "__main__":
     import uvicorn
     import sys
@@ -1,13 +1,40 @@
-import google.generativeai as genai
 import os
 import json
-from typing import Dict, Any, List
+import threading
+from contextlib import nullcontext
+from typing import Dict, Any, Iterator, List, Optional
 from . import config_manager
+from . import analysis_cache
+from . import metrics
+from . import rate_limit
+from . import startup
+from .answer_cache import AnswerCache, DEFAULT_TTL as DEFAULT_ANSWER_TTL
+from .chat_sessions import ChatSession, ChatSessionStore, DEFAULT_IDLE_TTL, DEFAULT_TOKEN_BUDGET
 
-# Configure API
-_api_key = config_manager.get_api_key("GOOGLE_API_KEY")
-if _api_key:
-    genai.configure(api_key=_api_key)
+# google.generativeai takes about as long to import as the rest of the node
+# together, so it is loaded (and configured) on the first model call.
+_genai = None
+_init_lock = threading.Lock()
+
+def _get_genai():
+    global _genai
+    if _genai is None:
+        with _init_lock:
+            if _genai is None:
+                with startup.lazy_load("google.generativeai"):
+                    import google.generativeai as genai
+                api_key = config_manager.get_api_key("GOOGLE_API_KEY")
+                if api_key:
+                    genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+def _on_config_change(config: Dict[str, Any], changed_keys):
+    # Pick up a key saved from the settings page (or edited on disk) without a restart
+    if "GOOGLE_API_KEY" in changed_keys and config.get("GOOGLE_API_KEY") and _genai is not None:
+        _genai.configure(api_key=config["GOOGLE_API_KEY"])
+
+config_manager.subscribe(_on_config_change)
 
 # Model Configuration
 GENERATION_CONFIG = {
@@ -35,66 +62,292 @@ Tone:
 - Do not hedge your language excessively; be decisive based on the data provided.
 """
 
-model = genai.GenerativeModel(
-    model_name="gemini-2.0-flash", # Using a capable model
-    generation_config=GENERATION_CONFIG,
-    system_instruction=FINANCE_EXPERT_SYSTEM_INSTRUCTION
-)
+MODEL_NAME = "gemini-2.0-flash" # Using a capable model
 
-def analyze_market_news(headline: str, context: str = "") -> Dict[str, Any]:
+# Bump whenever the analysis prompt/fields change so cached analyses are not reused
+ANALYSIS_PROMPT_VERSION = "1"
+
+# Built by get_model() on first use (tests and benchmarks may assign a stand-in)
+model = None
+
+def get_model():
+    """Returns the shared GenerativeModel, creating it on first use."""
+    global model
+    if model is None:
+        genai = _get_genai()
+        with _init_lock:
+            if model is None:
+                with startup.lazy_load("gemini model"):
+                    model = genai.GenerativeModel(
+                        model_name=MODEL_NAME,
+                        generation_config=GENERATION_CONFIG,
+                        system_instruction=FINANCE_EXPERT_SYSTEM_INSTRUCTION
+                    )
+    return model
+
+def _generate(operation: str, *args, **kwargs):
     """
-    Analyzes a specific news headline using the Finance Expert persona.
-    Returns structured JSON-like data (parsed from text).
+    generate_content() within the Gemini rate limit. Quota errors pause the
+    limiter and are retried; anything else is raised.
     """
-    prompt = f"""
-    Analyze the following news headline for a trader:
-    Headline: "{headline}"
-    Context: {context}
+    limiter = rate_limit.get_limiter("gemini")
+    for attempt in range(rate_limit.MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            with metrics.track("gemini", operation):
+                return get_model().generate_content(*args, **kwargs)
+        except Exception as e:
+            if not rate_limit.is_rate_limited(e) or attempt == rate_limit.MAX_RETRIES:
+                raise
+            limiter.backoff(rate_limit.backoff_delay(attempt))
 
-    Output valid JSON only with the following key-value pairs:
+# Fields every headline analysis returns (shared by single and batch prompts)
+ANALYSIS_FIELDS = """
     - "impact_score": (number between -10 and +10)
     - "reasoning": (concise explanation of the score, max 2 sentences)
     - "affected_assets": (list of strings, e.g., ["BTC", "ETH"])
     - "chain_reaction": (list of strings describing 2nd order effects)
     - "trade_suggestion": (short actionable advice)
+"""
+
+# Upper bound on parallel single-headline calls when batch mode falls back
+BATCH_MAX_CONCURRENCY = 4
+
+ANALYSIS_FAILED = "AI Analysis Failed"
+
+def _failed_analysis() -> Dict[str, Any]:
+    return {
+        "impact_score": 0,
+        "reasoning": ANALYSIS_FAILED,
+        "affected_assets": [],
+        "chain_reaction": [],
+        "trade_suggestion": "Monitor manually."
+    }
+
+def analysis_failed(analysis: Dict[str, Any]) -> bool:
+    """True for the placeholder returned when a headline could not be analyzed."""
+    return analysis.get("reasoning") == ANALYSIS_FAILED
+
+def _analysis_key(headline: str, context: str) -> str:
+    return analysis_cache.make_key(headline, MODEL_NAME, ANALYSIS_PROMPT_VERSION, context)
+
+def _analyze_single_call(headline: str, context: str) -> Dict[str, Any]:
     """
-    
+    Sends one headline to the model. Raises on API or parse errors.
+    """
+    prompt = f"""
+    Analyze the following news headline for a trader:
+    Headline: "{headline}"
+    Context: {context}
+
+    Output valid JSON only with the following key-value pairs:
+    {ANALYSIS_FIELDS}
+    """
+
+    response = _generate("analyze", prompt)
+    # Simple cleanup to ensure we get dictionary-like structure
+    # In production, use structured output or Pydantic parsers
+    text = response.text.replace("```json", "").replace("```", "").strip()
+    return json.loads(text)
+
+def _analyze_and_cache(headline: str, context: str, key: str) -> Dict[str, Any]:
     try:
-        response = model.generate_content(prompt)
-        # Simple cleanup to ensure we get dictionary-like structure
-        # In production, use structured output or Pydantic parsers
-        import json
-        text = response.text.replace("```json", "").replace("```", "").strip()
-        return json.loads(text)
+        analysis = _analyze_single_call(headline, context)
     except Exception as e:
         print(f"AI Error: {e}")
-        return {
-            "impact_score": 0,
-            "reasoning": "AI Analysis Failed",
-            "affected_assets": [],
-            "chain_reaction": [],
-            "trade_suggestion": "Monitor manually."
-        }
+        return _failed_analysis()
+    analysis_cache.get_cache().put(key, analysis)
+    return analysis
 
-chat_session = model.start_chat(history=[])
+def analyze_market_news(headline: str, context: str = "") -> Dict[str, Any]:
+    """
+    Analyzes a specific news headline using the Finance Expert persona.
+    Returns structured JSON-like data (parsed from text).
+    Repeat headlines are served from the persistent analysis cache.
+    """
+    key = _analysis_key(headline, context)
+    cached = analysis_cache.get_cache().get(key)
+    if cached is not None:
+        return cached
+    return _analyze_and_cache(headline, context, key)
+
+def _analyze_batch_single_call(headlines: List[str], context: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Scores every headline in one structured-output request.
+    Returns {index: analysis} for the items the model answered.
+    """
+    numbered = "\n".join(f"{i}. {h}" for i, h in enumerate(headlines))
+    prompt = f"""
+    Analyze each of the following news headlines for a trader:
+    {numbered}
+    Context: {context}
 
-def chat_with_finance_expert(user_message: str, context: str = "") -> str:
+    Output a JSON array with exactly {len(headlines)} objects, one per headline,
+    each with an "index" key (the headline number above) and the following key-value pairs:
+    {ANALYSIS_FIELDS}
+    """
+    response = _generate(
+        "analyze_batch",
+        prompt,
+        generation_config={"response_mime_type": "application/json"},
+    )
+    text = response.text.replace("```json", "").replace("```", "").strip()
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError("Batch analysis did not return a JSON array")
+
+    results = {}
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("index", position)
+        if isinstance(index, int) and 0 <= index < len(headlines):
+            results[index] = item
+    return results
+
+def analyze_market_news_batch(headlines: List[str], context: str = "",
+                              max_concurrency: int = BATCH_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Analyzes many headlines at roughly the latency of a single call.
+    Tries one structured-output request first; any headline it misses is
+    analyzed individually with at most `max_concurrency` calls in flight.
+    Results are returned in the same order as `headlines`; cached headlines
+    are never sent to the model.
+    """
+    if not headlines:
+        return []
+
+    cache = analysis_cache.get_cache()
+    keys = [_analysis_key(h, context) for h in headlines]
+    results = {}
+    for i, key in enumerate(keys):
+        cached = cache.get(key)
+        if cached is not None:
+            results[i] = cached
+
+    pending = [i for i in range(len(headlines)) if i not in results]
+    if pending:
+        try:
+            answered = _analyze_batch_single_call([headlines[i] for i in pending], context)
+            fresh = {pending[j]: analysis for j, analysis in answered.items()}
+            cache.put_many({keys[i]: analysis for i, analysis in fresh.items()})
+            results.update(fresh)
+        except Exception as e:
+            print(f"AI Batch Error: {e}")
+
+    missing = [i for i in range(len(headlines)) if i not in results]
+    if missing:
+        import contextvars
+        from concurrent.futures import ThreadPoolExecutor
+        workers = max(1, min(max_concurrency, len(missing)))
+        # Each call runs in a copy of this context so it keeps the caller's rate-limit priority
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            calls = [(contextvars.copy_context(), i) for i in missing]
+            fallback = pool.map(lambda c: c[0].run(_analyze_and_cache, headlines[c[1]], context, keys[c[1]]), calls)
+            for i, analysis in zip(missing, fallback):
+                results[i] = analysis
+
+    return [results[i] for i in range(len(headlines))]
+
+def _config_number(key: str, default):
+    try:
+        return type(default)(config_manager.get_api_key(key) or default)
+    except ValueError:
+        return default
+
+# Per-client conversations (CHAT_TOKEN_BUDGET / CHAT_SESSION_IDLE_TTL in config)
+chat_sessions = ChatSessionStore(
+    token_budget=_config_number("CHAT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET),
+    idle_ttl=_config_number("CHAT_SESSION_IDLE_TTL", DEFAULT_IDLE_TTL),
+)
+
+# Answers to standalone questions, reused for near-duplicates (CHAT_ANSWER_CACHE_TTL in config, 0 disables)
+chat_answers = AnswerCache("chat_answers", ttl=_config_number("CHAT_ANSWER_CACHE_TTL", DEFAULT_ANSWER_TTL))
+
+def _is_standalone(session) -> bool:
+    # With history the same words can mean something else, so only first questions share answers.
+    # Sessionless chats get an empty throwaway session, so they always count.
+    return not session.turns and not session.summary
+
+def _conversation(session_id: Optional[str]):
+    """
+    (session, lock) for one turn. Clients that send no session_id chat
+    statelessly: a throwaway session with no history that nobody else sees
+    or waits on.
+    """
+    if not session_id:
+        return ChatSession("", chat_sessions.token_budget), nullcontext()
+    session = chat_sessions.get(session_id)
+    return session, session.lock
+
+def _chat_prompt(user_message: str, context: str) -> str:
+    if context:
+        # Inject context invisibly to the user's query
+        system_injection = f"[REAL-TIME MARKET CONTEXT]: {context}\n\n"
+        return system_injection + user_message
+    return user_message
+
+def chat_with_finance_expert(user_message: str, context: str = "", session_id: Optional[str] = None) -> str:
     """
     Interactive chat function for the user to talk to the Finance Expert.
+    Each session_id keeps its own token-budgeted history; without one the
+    question is answered on its own. A standalone question may be answered
+    from the near-duplicate answer cache.
     """
+    session, lock = _conversation(session_id)
     try:
-        if context:
-            # Inject context invisibly to the user's query
-            system_injection = f"[REAL-TIME MARKET CONTEXT]: {context}\n\n"
-            full_prompt = system_injection + user_message
-            response = chat_session.send_message(full_prompt)
-        else:
-            response = chat_session.send_message(user_message)
-            
-        return response.text
+        with lock:
+            standalone = _is_standalone(session)
+            reply = chat_answers.get(user_message, context) if standalone else None
+            if reply is None:
+                reply = _generate("chat", session.contents(_chat_prompt(user_message, context))).text
+                if standalone:
+                    chat_answers.put(user_message, context, reply)
+            session.record(user_message, reply)
+        return reply
     except Exception as e:
         return f"System Error: {e}"
 
+def stream_chat_with_finance_expert(user_message: str, context: str = "",
+                                    session_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Streaming variant of chat_with_finance_expert: yields text chunks as the
+    model produces them. Errors are raised to the caller.
+    """
+    session, lock = _conversation(session_id)
+    with lock:
+        standalone = _is_standalone(session)
+        cached = chat_answers.get(user_message, context) if standalone else None
+        if cached is not None:
+            yield cached
+            session.record(user_message, cached)
+            return
+        parts = []
+        rate_limit.get_limiter("gemini").acquire()
+        # Timed until the last chunk arrives
+        with metrics.track("gemini", "chat_stream"):
+            response = get_model().generate_content(session.contents(_chat_prompt(user_message, context)), stream=True)
+            for chunk in response:
+                text = getattr(chunk, "text", "")
+                if text:
+                    parts.append(text)
+                    yield text
+        reply = "".join(parts)
+        if standalone:
+            chat_answers.put(user_message, context, reply)
+        session.record(user_message, reply)
+
+def _failed_summary() -> Dict[str, Any]:
+    return {
+        "sentiment": "Unknown",
+        "signal": "Caution",
+        "takeaways": ["Insufficient data for summary."]
+    }
+
+def summary_failed(summary: Dict[str, Any]) -> bool:
+    """True for the placeholder returned when no summary could be generated."""
+    return summary.get("sentiment") == "Unknown"
+
 def generate_market_summary(headlines: List[str]) -> Dict[str, Any]:
     """
     Synthesizes a list of headlines into a cohesive market summary.
@@ -113,14 +366,9 @@ def generate_market_summary(headlines: List[str]) -> Dict[str, Any]:
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = _generate("summary", prompt)
         text = response.text.replace("```json", "").replace("```", "").strip()
-        import json
         return json.loads(text)
     except Exception as e:
         print(f"AI Summary Error: {e}")
-        return {
-            "sentiment": "Unknown",
-            "signal": "Caution",
-            "takeaways": ["Insufficient data for summary."]
-        }
+        return _failed_summary()
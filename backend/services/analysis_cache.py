@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Defaults: headlines stay relevant for a few hours, and a couple thousand
+# entries is well under a megabyte on disk.
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+
+def normalize_headline(headline: str) -> str:
+    """Lowercases and strips punctuation/extra whitespace so trivially different copies match."""
+    return re.sub(r"\W+", " ", (headline or "").lower()).strip()
+
+
+def make_key(headline: str, model_name: str, prompt_version: str, context: str = "") -> str:
+    raw = "\x00".join([normalize_headline(headline), model_name, str(prompt_version), context or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Disk-backed LRU cache of headline analyses.
+
+    Entries expire after `ttl_seconds` and the least recently used ones are
+    evicted beyond `max_entries`. The whole cache is rewritten atomically
+    (temp file + rename) after each update, so it survives node restarts.
+    """
+
+    def __init__(self, path, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        # Stored oldest-first, so insertion order restores the LRU order
+        for key, entry in stored.items():
+            if now - entry.get("created_at", 0) < self.ttl_seconds:
+                self._entries[key] = entry
+        self._evict()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Analysis cache write failed: {e}")
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created_at"] >= self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry["value"])
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            for key, value in items.items():
+                self._entries[key] = {"value": value, "created_at": now}
+                self._entries.move_to_end(key)
+            self._evict()
+            self._save()
+
+    def put(self, key: str, value: Dict[str, Any]):
+        self.put_many({key: value})
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> AnalysisCache:
+    """Returns the process-wide cache stored next to config.json."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from . import config_manager
+                _cache = AnalysisCache(config_manager.get_config_dir() / "analysis_cache.json")
+    return _cache
@@ -0,0 +1,189 @@
+# Near-duplicate chat answer cache.
+#
+# Desks ask the same thing within minutes ("what's BTC doing?", "what is
+# btc doing"), and each question used to cost a full Gemini call. Answers to
+# standalone questions are kept for a short TTL and reused when a new
+# question is near-identical (MinHash over character shingles of the
+# normalized text, looked up through LSH bands) and was asked against the
+# same market context: the same assets and sections, with every number
+# (price, % change, indicator) still within tolerance. A material move in the
+# market therefore misses, and the stale answer is dropped. Questions must also
+# agree exactly on action words and numbers ("buy" vs "sell", "$90k" vs "$100k").
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from . import minhash
+
+DEFAULT_TTL = 120.0
+DEFAULT_MAX_ENTRIES = 500
+# Estimated Jaccard similarity of two questions' shingle sets to count as the same question
+SIMILARITY_THRESHOLD = 0.7
+# A context number may drift this much (relative, or absolute for small values like %) and still match
+RELATIVE_TOLERANCE = 0.005
+ABSOLUTE_TOLERANCE = 0.5
+
+_CONTRACTIONS = {"what's": "what is", "how's": "how is", "where's": "where is", "it's": "it is",
+                 "whats": "what is", "hows": "how is", "u": "you", "ur": "your"}
+_NUMBER = re.compile(r"[-+]?\d[\d,]*(?:\.\d+)?")
+# Words that flip what a question asks ("buy" vs "sell" differ by a few shingles).
+# Near-duplicates must agree on these, and on any numbers, exactly.
+_INTENT_WORDS = frozenset({
+    "buy", "sell", "long", "short", "hold", "enter", "exit", "open", "close", "add", "trim", "hedge",
+    "bullish", "bearish", "up", "down", "rise", "fall", "pump", "dump", "above", "below", "higher", "lower",
+    "call", "calls", "put", "puts", "not", "no", "never", "dont", "doesnt", "isnt", "wont", "cant", "shouldnt",
+})
+
+
+def normalize(question: str) -> str:
+    """Lowercase, punctuation-free, contraction-expanded text."""
+    words = re.findall(r"[a-z0-9$%']+", question.lower())
+    return " ".join(_CONTRACTIONS.get(w, w).replace("'", "") for w in words)
+
+
+def intent(text: str) -> FrozenSet[str]:
+    """The action words, negations and numbers of a normalized question."""
+    return frozenset(w for w in text.split() if w in _INTENT_WORDS or any(c.isdigit() for c in w))
+
+
+def fingerprint(context: str) -> Tuple[str, List[float]]:
+    """
+    (shape, numbers) of a market context: the text with numbers blanked out
+    (which assets and sections it covers) and the numbers themselves.
+    """
+    numbers = [float(n.replace(",", "")) for n in _NUMBER.findall(context)]
+    return _NUMBER.sub("#", context), numbers
+
+
+def _numbers_close(old: List[float], new: List[float]) -> bool:
+    if len(old) != len(new):
+        return False
+    return all(abs(a - b) <= max(ABSOLUTE_TOLERANCE, RELATIVE_TOLERANCE * abs(a)) for a, b in zip(old, new))
+
+
+class _Entry:
+    __slots__ = ("question", "intent", "signature", "numbers", "answer", "expires", "hits")
+
+    def __init__(self, question, signature, numbers, answer, expires):
+        self.question = question
+        self.intent = intent(question)
+        self.signature = signature
+        self.numbers = numbers
+        self.answer = answer
+        self.expires = expires
+        self.hits = 0
+
+
+class AnswerCache:
+    """
+    Answers keyed by (context shape, LSH band of the question signature).
+    get() returns a cached answer for a near-duplicate question asked
+    against an equivalent market context, or None.
+    """
+
+    def __init__(self, name: str, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[int, Tuple[str, _Entry]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, bytes], set] = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evictions = 0
+
+    def _remove(self, entry_id: int):
+        shape, entry = self._entries.pop(entry_id)
+        for band, key in minhash.bands(entry.signature):
+            bucket = self._buckets.get((shape, band, key))
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[(shape, band, key)]
+
+    def get(self, question: str, context: str) -> Optional[str]:
+        if self.ttl <= 0:
+            return None
+        text = normalize(question)
+        sig = minhash.signature(text)
+        terms = intent(text)
+        shape, numbers = fingerprint(context)
+        now = time.time()
+        with self._lock:
+            candidates = set()
+            for band, key in minhash.bands(sig):
+                candidates |= self._buckets.get((shape, band, key), set())
+            best_id, best_score = None, self.threshold
+            for entry_id in candidates:
+                entry = self._entries[entry_id][1]
+                if entry.expires <= now:
+                    self._remove(entry_id)
+                    continue
+                if entry.intent != terms:
+                    continue
+                score = 1.0 if entry.question == text else minhash.similarity(entry.signature, sig)
+                if score < best_score:
+                    continue
+                if not _numbers_close(entry.numbers, numbers):
+                    # Same question, but the market moved since: the answer is stale
+                    self._remove(entry_id)
+                    self.invalidated += 1
+                    continue
+                best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            entry = self._entries[best_id][1]
+            self._entries.move_to_end(best_id)
+            entry.hits += 1
+            self.hits += 1
+            if entry.question != text:
+                self.near_hits += 1
+            return entry.answer
+
+    def put(self, question: str, context: str, answer: str):
+        if self.ttl <= 0:
+            return
+        text = normalize(question)
+        sig = minhash.signature(text)
+        shape, numbers = fingerprint(context)
+        with self._lock:
+            self._ids += 1
+            entry_id = self._ids
+            self._entries[entry_id] = (shape, _Entry(text, sig, numbers, answer, time.time() + self.ttl))
+            for band, key in minhash.bands(sig):
+                self._buckets.setdefault((shape, band, key), set()).add(entry_id)
+            now = time.time()
+            for expired in [i for i, (_, e) in self._entries.items() if e.expires <= now]:
+                self._remove(expired)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "invalidated": self.invalidated,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,157 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class _InFlight:
+    """A load in progress that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-key TTL, LRU eviction past
+    `max_size`, and hit/miss counters.
+
+    get_or_load()/aget_or_load() add single-flight semantics: when several
+    callers miss on the same key at once, only the first runs the loader and
+    the rest wait for (and share) its result. Cached values are shared
+    between callers and must be treated as read-only.
+    """
+
+    def __init__(self, name: str, default_ttl: float, max_size: int = 256):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._ainflight: Dict[Hashable, "asyncio.Future"] = {}
+
+    def _lookup(self, key: Hashable) -> Any:
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None,
+                    should_cache: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Returns the cached value for `key`, or runs `loader()` exactly once
+        across concurrent callers. Results rejected by `should_cache` (e.g.
+        empty lists from a failed upstream call) are returned but not stored.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            self.loads += 1
+            call.value = loader()
+            if should_cache(call.value):
+                self.set(key, call.value, ttl)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                           ttl: Optional[float] = None,
+                           should_cache: Callable[[Any], bool] = lambda value: True) -> Any:
+        """
+        Async counterpart of get_or_load(); `loader` is a coroutine function.
+        The load runs as its own task, so a caller that is cancelled (client
+        disconnect) stops waiting without cancelling it for the others.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                return value
+            task = self._ainflight.get(key)
+            if task is None:
+                task = self._ainflight[key] = asyncio.ensure_future(self._aload(key, loader, ttl, should_cache))
+                # Retrieve the outcome even if every caller went away, so it is not logged as unhandled
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+    async def _aload(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float],
+                     should_cache: Callable[[Any], bool]) -> Any:
+        try:
+            self.loads += 1
+            value = await loader()
+            if should_cache(value):
+                self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._ainflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,224 @@
+# Market context for chat prompts, chosen by relevance.
+#
+# Instead of the same top-20 price list for every question, the message is
+# matched against a symbol/alias index (tickers, names and nicknames of the
+# tracked coins, plus the symbols of open MT5 positions). Only the matching
+# prices, indicators and positions are sent, trimmed to a token budget;
+# questions that name no asset get a short market overview instead.
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import market_data
+from .chat_sessions import estimate_tokens
+
+# Approximate tokens of market context per prompt (CHAT_CONTEXT_TOKEN_BUDGET in config)
+DEFAULT_TOKEN_BUDGET = 300
+# Coins in the overview that fills the remaining budget
+OVERVIEW_COINS = 5
+
+# Nicknames CoinGecko's symbol and name do not cover, by coin id
+COIN_ALIASES = {
+    "bitcoin": ("xbt", "sats"),
+    "ethereum": ("ether",),
+    "ripple": ("ripple",),
+    "dogecoin": ("doge",),
+    "binancecoin": ("binance coin",),
+    "matic-network": ("polygon", "matic"),
+    "avalanche-2": ("avalanche", "avax"),
+}
+
+# Tickers and names that are also everyday words only count when written as a
+# ticker ("ONE", "$one", "$IP"), never as "one" or "story" in a sentence. The
+# same goes for every single-letter alias ("S" is Sonic, "s" is a plural).
+AMBIGUOUS_WORDS = {
+    "a", "ace", "act", "ai", "all", "any", "ape", "are", "ark", "at", "beam", "big", "blur", "bone", "cat",
+    "compound", "core", "cosmos", "curve", "dog", "drift", "echo", "eth2", "flow", "for", "gas", "get", "gmt",
+    "helium", "hot", "hype", "i", "id", "immutable", "ip", "it", "just", "key", "kite", "link", "magic",
+    "maker", "mana", "mantle", "mask", "me", "meme", "move", "near", "new", "now", "one", "op", "optimism",
+    "pay", "people", "pi", "quant", "render", "rose", "safe", "sand", "sky", "sonic", "space", "stacks",
+    "stellar", "story", "sun", "super", "the", "the graph", "the sandbox", "theta", "time", "ton", "trump",
+    "up", "via", "was", "win", "wif",
+}
+
+# Currency and commodity words for MT5 symbols (EURUSD, XAUUSD, ...)
+FX_ALIASES = {
+    "euro": "EUR", "dollar": "USD", "pound": "GBP", "sterling": "GBP", "cable": "GBPUSD", "yen": "JPY",
+    "franc": "CHF", "swissy": "CHF", "aussie": "AUD", "kiwi": "NZD", "loonie": "CAD", "yuan": "CNH",
+    "gold": "XAU", "silver": "XAG", "oil": "OIL", "crude": "OIL", "brent": "BRENT", "wti": "WTI",
+    "nasdaq": "NAS", "dow": "US30", "dax": "GER", "spx": "SPX",
+}
+
+# Words asking about the account as a whole: every open position is relevant
+POSITION_WORDS = {"position", "positions", "portfolio", "exposure", "pnl", "p&l", "trades", "account", "holdings"}
+
+_WORD = re.compile(r"\$?[A-Za-z0-9&]+")
+# "What's", "BTC's", "don't", "we'll": the suffix is not a word of its own
+_CONTRACTION = re.compile(r"(?:['’](?:s|re|ve|ll|d|m|t)|n['’]t)\b", re.IGNORECASE)
+
+
+def _words(message: str) -> List[Tuple[str, bool]]:
+    """
+    (lowercased word, written as a ticker) pairs; tickers are $-prefixed or
+    all caps ("I" and "A" only with a $).
+    """
+    words = []
+    for raw in _WORD.findall(_CONTRACTION.sub("", message)):
+        word = raw.lstrip("$")
+        if word:
+            words.append((word.lower(), raw.startswith("$") or (word.isupper() and word not in ("I", "A"))))
+    return words
+
+
+def _ambiguous(alias: str) -> bool:
+    return len(alias) == 1 or alias in AMBIGUOUS_WORDS
+
+
+class SymbolIndex:
+    """Alias -> coin id lookup over one price list, built once per price refresh."""
+
+    def __init__(self, coins: List[Dict[str, Any]]):
+        self.coins = {coin["id"]: coin for coin in coins if coin.get("id")}
+        self.aliases: Dict[str, str] = {}
+        self.max_words = 1
+        # Lower-ranked coins never shadow a bigger one with the same ticker
+        for coin in reversed(coins):
+            coin_id = coin.get("id")
+            if not coin_id:
+                continue
+            names = [coin_id, (coin.get("symbol") or "").lower(), (coin.get("name") or "").lower()]
+            names += COIN_ALIASES.get(coin_id, ())
+            for name in names:
+                alias = " ".join(_WORD.findall(name.replace("-", " ")))
+                if alias:
+                    self.aliases[alias] = coin_id
+                    self.max_words = max(self.max_words, alias.count(" ") + 1)
+
+    def match(self, message: str) -> List[str]:
+        """Coin ids mentioned in `message`, in order of first mention."""
+        words = _words(message)
+        found = []
+        i = 0
+        while i < len(words):
+            # Longest alias first, so "shiba inu" wins over "inu"
+            for size in range(min(self.max_words, len(words) - i), 0, -1):
+                alias = " ".join(w for w, _ in words[i:i + size])
+                coin_id = self.aliases.get(alias)
+                if coin_id is None:
+                    continue
+                # Names and tickers alike; a multi-word name counts if any word is written as a ticker
+                if _ambiguous(alias) and not any(ticker for _, ticker in words[i:i + size]):
+                    continue
+                if coin_id not in found:
+                    found.append(coin_id)
+                i += size - 1
+                break
+            i += 1
+        return found
+
+
+_index: Optional[Tuple[Any, SymbolIndex]] = None
+_index_lock = threading.Lock()
+
+
+def get_index(coins: List[Dict[str, Any]]) -> SymbolIndex:
+    """The symbol index for this price list, rebuilt only when the prices change."""
+    global _index
+    version = market_data._indicator_version(coins)
+    current = _index
+    if current is None or current[0] != version:
+        with _index_lock:
+            current = _index
+            if current is None or current[0] != version:
+                current = _index = (version, SymbolIndex(coins))
+    return current[1]
+
+
+def _position_codes(symbol: str) -> List[str]:
+    # "EURUSD.m" -> ["EURUSD", "EUR", "USD"]
+    base = re.sub(r"[^A-Z0-9]", "", symbol.upper().split(".")[0])
+    codes = [base]
+    if len(base) == 6 and base.isalpha():
+        codes += [base[:3], base[3:]]
+    return codes
+
+
+def match_positions(message: str, positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Open positions the message is about: all of them for account-wide questions."""
+    words = [w for w, _ in _words(message)]
+    if POSITION_WORDS.intersection(words):
+        return list(positions)
+    aliased = {FX_ALIASES[w] for w in words if w in FX_ALIASES}
+    # "EUR/USD" and "EUR USD" name the pair too
+    mentioned = {w.upper() for w in words} | {(a + b).upper() for a, b in zip(words, words[1:])} | aliased
+    # The quote currency of most pairs is too broad to pick positions by
+    mentioned.discard("USD")
+    relevant = []
+    for position in positions:
+        symbol = str(position.get("symbol", "")).upper()
+        # Commodity and index aliases match broker-specific names (USOIL, NAS100, GER40)
+        if mentioned.intersection(_position_codes(symbol)) or any(code in symbol for code in aliased if code != "USD"):
+            relevant.append(position)
+    return relevant
+
+
+def _format_position(position: Dict[str, Any]) -> str:
+    return (f"{position.get('symbol')} {position.get('side')} {position.get('qty')} @ {position.get('entryPrice')} "
+            f"(now {position.get('currentPrice')}, P/L {position.get('pnl', 0):+.2f})")
+
+
+def _token_budget() -> int:
+    from . import config_manager
+    try:
+        return int(config_manager.get_api_key("CHAT_CONTEXT_TOKEN_BUDGET") or DEFAULT_TOKEN_BUDGET)
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+def build_context(message: str, coins: List[Dict[str, Any]], positions: Optional[List[Dict[str, Any]]] = None,
+                  include_indicators: bool = False, token_budget: Optional[int] = None) -> str:
+    """
+    Market context for one chat message: the open positions and coins it
+    mentions (coins with indicators), then a short overview, within
+    `token_budget` approximate tokens. Most relevant items are kept first.
+    """
+    budget = token_budget if token_budget is not None else _token_budget()
+    if not coins and not positions:
+        return "Market data unavailable."
+
+    index = get_index(coins)
+    mentioned = index.match(message)
+    overview = [coin["id"] for coin in coins[:OVERVIEW_COINS] if coin.get("id") not in mentioned]
+    wanted = mentioned + (overview if include_indicators else [])
+    values = market_data.indicators_for(coins, wanted) if wanted else {}
+
+    sections = [
+        ("Open positions", [_format_position(p) for p in match_positions(message, positions or [])]),
+        ("Asked about", [market_data.format_coin(index.coins[c], values.get(c)) for c in mentioned]),
+        ("Market", [market_data.format_coin(index.coins[c], values.get(c) if include_indicators else None)
+                    for c in overview]),
+    ]
+
+    lines = []
+    used = 0
+    for title, items in sections:
+        kept = []
+        for item in items:
+            if not item:
+                continue
+            # Each item costs its own tokens plus a separator
+            cost = estimate_tokens(item) + (estimate_tokens(title) if not kept else 1)
+            if used + cost > budget:
+                break
+            kept.append(item)
+            used += cost
+        if kept:
+            lines.append(f"{title}: " + ", ".join(kept))
+    return "\n".join(lines) if lines else "Market data unavailable."
+
+
+async def build_context_async(message: str, positions: Optional[List[Dict[str, Any]]] = None,
+                              include_indicators: bool = False) -> str:
+    """build_context over the shared prices cache."""
+    coins = await market_data.fetch_crypto_prices_async(per_page=100)
+    return build_context(message, coins, positions, include_indicators)
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SESSION_ID = "default"
+
+# Prompt budget for the replayed history of one session (approximate tokens)
+DEFAULT_TOKEN_BUDGET = 6000
+# Sessions untouched for this long are dropped
+DEFAULT_IDLE_TTL = 30 * 60
+DEFAULT_MAX_SESSIONS = 500
+
+# Share of the budget the summary of trimmed turns may use
+SUMMARY_BUDGET_RATIO = 0.2
+SUMMARY_SNIPPET_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+class ChatSession:
+    """
+    One client's conversation. Only the raw user messages and model replies
+    are kept: market-context injections belong to the turn they were sent
+    with and are never replayed. Turns that no longer fit the token budget
+    are folded into a short extractive summary.
+    """
+
+    def __init__(self, session_id: str, token_budget: int):
+        self.session_id = session_id
+        self.token_budget = token_budget
+        self.turns: List[Dict[str, str]] = []  # {"user": ..., "model": ...}
+        self.summary: List[str] = []
+        self.last_active = time.time()
+        # Serializes turns within a session; different sessions run in parallel
+        self.lock = threading.Lock()
+
+    def _turn_tokens(self, turn: Dict[str, str]) -> int:
+        return estimate_tokens(turn["user"]) + estimate_tokens(turn["model"])
+
+    def history_tokens(self) -> int:
+        return sum(self._turn_tokens(t) for t in self.turns)
+
+    def _trim(self):
+        while self.turns and self.history_tokens() > self.token_budget:
+            dropped = self.turns.pop(0)
+            snippet = " ".join(dropped["user"].split())[:SUMMARY_SNIPPET_CHARS]
+            self.summary.append(snippet)
+        summary_budget = int(self.token_budget * SUMMARY_BUDGET_RATIO)
+        while self.summary and estimate_tokens(" | ".join(self.summary)) > summary_budget:
+            self.summary.pop(0)
+
+    def contents(self, prompt: str) -> List[Dict[str, Any]]:
+        """Builds the model `contents` for a new turn: trimmed history plus `prompt`."""
+        contents = []
+        for turn in self.turns:
+            contents.append({"role": "user", "parts": [turn["user"]]})
+            contents.append({"role": "model", "parts": [turn["model"]]})
+        if self.summary:
+            prompt = f"[EARLIER IN THIS CONVERSATION THE USER ASKED]: {' | '.join(self.summary)}\n\n" + prompt
+        contents.append({"role": "user", "parts": [prompt]})
+        return contents
+
+    def record(self, user_message: str, reply: str):
+        self.turns.append({"user": user_message, "model": reply})
+        self.last_active = time.time()
+        self._trim()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "turns": len(self.turns),
+            "summarized_turns": len(self.summary),
+            "history_tokens": self.history_tokens(),
+            "idle_seconds": round(time.time() - self.last_active, 1),
+        }
+
+
+class ChatSessionStore:
+    """
+    Session-id -> ChatSession map with idle expiry and an LRU cap, so memory
+    stays bounded no matter how many clients come and go.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET, idle_ttl: float = DEFAULT_IDLE_TTL,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.token_budget = token_budget
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_ttl
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_active < cutoff]:
+            del self._sessions[session_id]
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: Optional[str]) -> ChatSession:
+        session_id = session_id or DEFAULT_SESSION_ID
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ChatSession(session_id, self.token_budget)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = time.time()
+            return session
+
+    def reset(self, session_id: Optional[str]):
+        with self._lock:
+            self._sessions.pop(session_id or DEFAULT_SESSION_ID, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict()
+            return {
+                "sessions": len(self._sessions),
+                "token_budget": self.token_budget,
+                "idle_ttl": self.idle_ttl,
+                "max_sessions": self.max_sessions,
+            }
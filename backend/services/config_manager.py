@@ -1,56 +1,136 @@
 import os
 import json
+import tempfile
+import threading
 from pathlib import Path
 
 APP_NAME = "Pulse"
 
+# In-memory copy of config.json, re-read only when the file's mtime/size change
+_cache = {
+    "config": None,
+    "signature": None,
+}
+_lock = threading.RLock()
+_config_dir = None
+_subscribers = []
+
 def get_config_dir():
     """Get the appropriate user config directory for the OS."""
+    global _config_dir
+    if _config_dir is not None:
+        return _config_dir
+
     if os.name == 'nt':
         # Windows
         base_dir = os.environ.get('APPDATA', os.path.expanduser('~'))
     else:
         # macOS / Linux
         base_dir = os.path.expanduser('~/.config')
-        
+
     config_dir = Path(base_dir) / APP_NAME
     config_dir.mkdir(parents=True, exist_ok=True)
+    _config_dir = config_dir
     return config_dir
 
 def get_config_path():
     return get_config_dir() / "config.json"
 
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+def _read_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        return {}
+
+def subscribe(callback):
+    """
+    Registers callback(config, changed_keys), called after the config changes
+    (through save_config or an edit to the file on disk).
+    """
+    _subscribers.append(callback)
+
+def _notify(config, changed_keys):
+    if not changed_keys:
+        return
+    for callback in list(_subscribers):
+        try:
+            callback(dict(config), changed_keys)
+        except Exception as e:
+            print(f"Config subscriber error: {e}")
+
+def _changed_keys(old, new):
+    old = old or {}
+    return {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+
+def _load():
+    """Returns the cached config dict (shared; callers must not mutate it)."""
+    config_path = get_config_path()
+    signature = _file_signature(config_path)
+    with _lock:
+        if _cache["config"] is not None and _cache["signature"] == signature:
+            return _cache["config"]
+        previous = _cache["config"]
+        config = _read_file(config_path) if signature is not None else {}
+        _cache["config"], _cache["signature"] = config, signature
+
+    # Only a change to an already-loaded config is news to subscribers
+    if previous is not None:
+        _notify(config, _changed_keys(previous, config))
+    return config
+
 def load_config():
     """Load configuration from the local JSON file. If it doesn't exist, return empty dict."""
-    config_path = get_config_path()
-    if config_path.exists():
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
+    return dict(_load())
 
 def save_config(new_config: dict):
-    """Save configuration to the local JSON file. Merges with existing config."""
+    """
+    Save configuration to the local JSON file. Merges with existing config.
+    The file is replaced atomically (temp file + rename) under a lock, so
+    concurrent saves never leave a torn file behind.
+    """
     config_path = get_config_path()
-    current_config = load_config()
-    current_config.update(new_config)
-    
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(current_config, f, indent=4)
-    return current_config
+    with _lock:
+        previous = _load()
+        current_config = dict(previous)
+        current_config.update(new_config)
+
+        fd, tmp_path = tempfile.mkstemp(dir=config_path.parent, prefix=".config-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(current_config, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, config_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        _cache["config"], _cache["signature"] = current_config, _file_signature(config_path)
+
+    _notify(current_config, _changed_keys(previous, current_config))
+    return dict(current_config)
 
 def get_api_key(key_name: str, fallback_env: bool = True):
     """
-    Get an API key. Prioritizes the local JSON config. 
+    Get an API key. Prioritizes the local JSON config.
     Falls back to environment variables (for dev/cloud usage) if allowed.
     """
-    config = load_config()
+    config = _load()
     if key_name in config and config[key_name]:
         return config[key_name]
-    
+
     if fallback_env:
         return os.environ.get(key_name)
-        
+
     return None
@@ -0,0 +1,82 @@
+# Chart downsampling.
+#
+# Both methods return the *indices* of the points to keep, so callers can
+# slice any parallel columns (timestamps, prices, volumes) consistently.
+# LTTB (Largest-Triangle-Three-Buckets) keeps the visually significant shape
+# of a line; the min/max envelope keeps every bucket's extremes, so spikes
+# survive even at very low point counts.
+from typing import Optional
+
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _bucket_bounds(start: int, stop: int, buckets: int):
+    edges = np.linspace(start, stop, buckets + 1).astype(np.intp)
+    return edges[:-1], edges[1:]
+
+
+def _padded(values: np.ndarray, starts: np.ndarray, ends: np.ndarray, fill: float):
+    """(buckets, widest) matrix of each bucket's values, padded with `fill`."""
+    width = int((ends - starts).max())
+    idx = starts[:, None] + np.arange(width)
+    mask = idx < ends[:, None]
+    return np.where(mask, values[np.minimum(idx, len(values) - 1)], fill), idx
+
+
+def lttb(y, points: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of `points` samples chosen by Largest-Triangle-Three-Buckets."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # Interior points split into points-2 buckets; first and last are always kept
+    starts, ends = _bucket_bounds(1, n - 1, points - 2)
+    sizes = (ends - starts).astype(np.float64)
+    cx, cy = np.concatenate([[0.0], np.cumsum(x)]), np.concatenate([[0.0], np.cumsum(y)])
+    avg_x = (cx[ends] - cx[starts]) / sizes
+    avg_y = (cy[ends] - cy[starts]) / sizes
+    # Each bucket is scored against the average of the next one (the last point for the final bucket)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    bx, idx = _padded(x, starts, ends, np.nan)
+    by, _ = _padded(y, starts, ends, np.nan)
+
+    selected = np.empty(points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (by[i] - ay) - (ax - bx[i]) * (next_y[i] - ay))
+        # Padding (and missing values) score -inf so they are never picked
+        a = int(idx[i, np.where(np.isnan(area), -np.inf, area).argmax()])
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(y, points: int) -> np.ndarray:
+    """Indices of the minimum and maximum of each of (points - 2) // 2 buckets, in order."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+    # Two points per bucket plus the first and last point
+    starts, ends = _bucket_bounds(0, n, (points - 2) // 2)
+    lows, idx = _padded(y, starts, ends, np.inf)
+    highs, _ = _padded(y, starts, ends, -np.inf)
+    rows = np.arange(len(starts))
+    keep = np.concatenate([idx[rows, lows.argmin(axis=1)], idx[rows, highs.argmax(axis=1)], [0, n - 1]])
+    return np.unique(keep)
+
+
+def downsample(y, points: int, method: str = "lttb", x: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices to keep for `points` output samples using `method` (lttb or minmax)."""
+    if method == "minmax":
+        return minmax(y, points)
+    if method == "lttb":
+        return lttb(y, points, x)
+    raise ValueError(f"Unknown downsampling method {method!r}; expected one of {', '.join(METHODS)}")
@@ -0,0 +1,222 @@
+# In-process stand-in for the MetaTrader5 module.
+#
+# Implements the subset of the MetaTrader5 API the node uses, with a synthetic
+# account whose open positions random-walk on every call, plus deterministic
+# rate/tick history for ingestion tests and benchmarks. Select it with
+# MT5_BACKEND=fake (config or environment) or
+# metatrader_service.use_backend(fake_mt5) to run the node, the MT5 worker and
+# benchmarks on machines without a terminal (e.g. Linux).
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+# Simulated IPC round-trip per terminal call, in seconds
+LATENCY = 0.002
+
+TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_M30 = 1, 5, 15, 30
+TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_D1 = 16385, 16388, 16408
+COPY_TICKS_ALL = -1
+
+_TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400,
+}
+# Synthetic ticks per second of history
+TICK_RATE = 2
+
+AccountInfo = namedtuple("AccountInfo", [
+    "login", "server", "currency", "leverage", "balance", "equity", "profit", "margin", "margin_free",
+])
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "type", "volume", "price_open", "price_current", "profit", "symbol",
+])
+
+_lock = threading.Lock()
+_state = {
+    "initialized": False,
+    "login": None,
+    "server": None,
+    "balance": 10000.0,
+    "positions": [],
+    "last_error": (1, "Success"),
+    "calls": 0,
+}
+
+_SYMBOLS = {"EURUSD": 1.0850, "GBPUSD": 1.2700, "USDJPY": 151.20, "XAUUSD": 2350.0, "BTCUSD": 65000.0}
+
+
+def _tick():
+    time.sleep(LATENCY)
+    _state["calls"] += 1
+
+
+def _seed_positions(count=5):
+    rng = random.Random(42)
+    positions = []
+    for i in range(count):
+        symbol = rng.choice(list(_SYMBOLS))
+        price = _SYMBOLS[symbol]
+        positions.append({
+            "ticket": 100000 + i,
+            "time": int(time.time()) - rng.randint(60, 86400),
+            "type": rng.randint(0, 1),
+            "volume": round(rng.uniform(0.01, 2.0), 2),
+            "price_open": price,
+            "price_current": price,
+            "symbol": symbol,
+        })
+    return positions
+
+
+def initialize(path=None, **kwargs):
+    with _lock:
+        _tick()
+        _state["initialized"] = True
+        _state["last_error"] = (1, "Success")
+        return True
+
+
+def login(login, password=None, server=None, **kwargs):
+    with _lock:
+        _tick()
+        if not _state["initialized"]:
+            _state["last_error"] = (-10004, "No IPC connection")
+            return False
+        _state["login"], _state["server"] = login, server
+        _state["positions"] = _seed_positions()
+        return True
+
+
+def shutdown():
+    with _lock:
+        _tick()
+        _state["initialized"] = False
+        _state["login"] = None
+        _state["positions"] = []
+        return True
+
+
+def last_error():
+    return _state["last_error"]
+
+
+def _advance():
+    # Random-walk every open position a little on each terminal call
+    for pos in _state["positions"]:
+        pos["price_current"] = round(pos["price_current"] * (1 + random.gauss(0, 0.0002)), 5)
+
+
+def _profit(pos):
+    direction = 1 if pos["type"] == 0 else -1
+    return round((pos["price_current"] - pos["price_open"]) * direction * pos["volume"] * 100, 2)
+
+
+def positions_get(**kwargs):
+    with _lock:
+        _tick()
+        if _state["login"] is None:
+            _state["last_error"] = (-10004, "No IPC connection")
+            return None
+        _advance()
+        return tuple(TradePosition(profit=_profit(p), **p) for p in _state["positions"])
+
+
+def account_info():
+    with _lock:
+        _tick()
+        if _state["login"] is None:
+            _state["last_error"] = (-10004, "No IPC connection")
+            return None
+        profit = round(sum(_profit(p) for p in _state["positions"]), 2)
+        balance = _state["balance"]
+        return AccountInfo(
+            login=_state["login"], server=_state["server"], currency="USD", leverage=100,
+            balance=balance, equity=round(balance + profit, 2), profit=profit,
+            margin=0.0, margin_free=round(balance + profit, 2),
+        )
+
+
+def call_count():
+    """Number of simulated terminal round-trips so far (for benchmarks)."""
+    return _state["calls"]
+
+
+def symbol_select(symbol, enable=True):
+    if symbol not in _SYMBOLS:
+        _state["last_error"] = (-1, "Terminal: Call failed")
+        return False
+    return True
+
+
+def _seconds(value):
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+def _noise(t, salt):
+    # Deterministic per timestamp, so overlapping or resumed ranges agree
+    h = (t.astype(np.uint64) * np.uint64(2654435761) + np.uint64(salt)) % np.uint64(2 ** 32)
+    return h.astype(np.float64) / 2 ** 32 - 0.5
+
+
+def _price_at(symbol, t):
+    base = _SYMBOLS[symbol]
+    wave = 0.01 * np.sin(t / 86400.0 * 2 * np.pi) + 0.004 * np.sin(t / 3600.0 * 2 * np.pi)
+    return base * (1 + wave + 0.0005 * _noise(t, 1))
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    """Synthetic OHLC bars with time in [date_from, date_to] (MT5 rate dtype)."""
+    with _lock:
+        _tick()
+        if not _state["initialized"] or symbol not in _SYMBOLS:
+            _state["last_error"] = (-10004, "No IPC connection")
+            return None
+    step = _TIMEFRAME_SECONDS[timeframe]
+    first = -(-int(_seconds(date_from)) // step) * step
+    t = np.arange(first, int(_seconds(date_to)) + 1, step, dtype=np.int64)
+    open_ = _price_at(symbol, t)
+    close = _price_at(symbol, t + step)
+    spread = np.abs(_noise(t, 2)) * 0.002 * open_
+    rates = np.empty(len(t), dtype=[
+        ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+        ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+    ])
+    rates["time"] = t
+    rates["open"] = open_
+    rates["close"] = close
+    rates["high"] = np.maximum(open_, close) + spread
+    rates["low"] = np.minimum(open_, close) - spread
+    rates["tick_volume"] = (np.abs(_noise(t, 3)) * 2 * step * TICK_RATE).astype(np.uint64)
+    rates["spread"] = 10
+    rates["real_volume"] = 0
+    return rates
+
+
+def copy_ticks_range(symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+    """Synthetic bid/ask ticks, TICK_RATE per second, in [date_from, date_to] (MT5 tick dtype)."""
+    with _lock:
+        _tick()
+        if not _state["initialized"] or symbol not in _SYMBOLS:
+            _state["last_error"] = (-10004, "No IPC connection")
+            return None
+    step_ms = 1000 // TICK_RATE
+    start_ms = -(-int(_seconds(date_from) * 1000) // step_ms) * step_ms
+    time_msc = np.arange(start_ms, int(_seconds(date_to) * 1000) + 1, step_ms, dtype=np.int64)
+    bid = _price_at(symbol, time_msc / 1000.0)
+    ticks = np.empty(len(time_msc), dtype=[
+        ("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+        ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8"),
+    ])
+    ticks["time"] = time_msc // 1000
+    ticks["bid"] = bid
+    ticks["ask"] = bid * 1.0001
+    ticks["last"] = 0.0
+    ticks["volume"] = 0
+    ticks["time_msc"] = time_msc
+    ticks["flags"] = 6  # TICK_FLAG_BID | TICK_FLAG_ASK
+    ticks["volume_real"] = 0.0
+    return ticks
@@ -0,0 +1,218 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Bucket size in seconds for each stored resolution
+RESOLUTIONS = {
+    "hourly": 3600,
+    "daily": 86400,
+}
+
+# CoinGecko ids: lowercase letters, digits, dashes ("bitcoin", "matic-network", "usd-coin")
+_COIN_ID = re.compile(r"^[a-z0-9][a-z0-9._-]{0,99}$")
+# Series kept open (with their memory maps); older ones are reopened on demand
+MAX_OPEN_SERIES = 256
+
+# One contiguous file per column
+COLUMNS = {
+    "ts": np.dtype("<i8"),       # epoch milliseconds
+    "price": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+
+
+def bucket_last(ts: np.ndarray, step_ms: int) -> np.ndarray:
+    """
+    Indices of the last point in each `step_ms` bucket of a sorted timestamp
+    array (vectorized resampling that keeps the closing value).
+    """
+    if len(ts) == 0:
+        return np.empty(0, dtype=np.intp)
+    buckets = ts // step_ms
+    return np.flatnonzero(np.append(buckets[1:] != buckets[:-1], True))
+
+
+class PriceSeries:
+    """
+    Append-mostly columnar store for one (coin, resolution) series.
+
+    Columns live in raw little-endian files and are read through np.memmap,
+    so serving a chart is a slice of mapped memory rather than a download.
+    Rows are kept sorted with one row per resolution bucket.
+    """
+
+    def __init__(self, directory: Path, step_seconds: int):
+        self.directory = directory
+        self.step_ms = step_seconds * 1000
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.ndarray] = {}
+        self._length = -1
+
+    def _path(self, column: str) -> Path:
+        return self.directory / f"{column}.bin"
+
+    def __len__(self) -> int:
+        # Shortest column wins, so an interrupted append never exposes a partial row
+        try:
+            return min(self._path(c).stat().st_size // dt.itemsize for c, dt in COLUMNS.items())
+        except OSError:
+            return 0
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only memory-mapped views of every column (remapped after writes)."""
+        length = len(self)
+        if length != self._length:
+            if length == 0:
+                self._maps = {c: np.empty(0, dtype=dt) for c, dt in COLUMNS.items()}
+            else:
+                self._maps = {
+                    c: np.memmap(self._path(c), dtype=dt, mode="r", shape=(length,))
+                    for c, dt in COLUMNS.items()
+                }
+            self._length = length
+        return self._maps
+
+    def covered_from(self) -> Optional[int]:
+        """Earliest timestamp (ms) already fetched, even if the coin has no data that far back."""
+        try:
+            with open(self.directory / "meta.json", "r", encoding="utf-8") as f:
+                return json.load(f).get("covered_from")
+        except (OSError, ValueError):
+            return None
+
+    def mark_covered(self, start_ms: int):
+        current = self.covered_from()
+        if current is not None and current <= start_ms:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / "meta.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"covered_from": int(start_ms)}, f)
+        os.replace(tmp_path, self.directory / "meta.json")
+
+    def first_timestamp(self) -> Optional[int]:
+        ts = self.columns()["ts"]
+        return int(ts[0]) if len(ts) else None
+
+    def last_timestamp(self) -> Optional[int]:
+        ts = self.columns()["ts"]
+        return int(ts[-1]) if len(ts) else None
+
+    def merge(self, ts: np.ndarray, price: np.ndarray, volume: np.ndarray) -> int:
+        """
+        Adds points, resampled to this series' resolution. New data wins over
+        stored data in the same bucket. The common case (only a newer tail)
+        is an in-place update of the last row plus an append; anything that
+        lands before the stored tail falls back to rewriting the files.
+        Returns the number of rows after the merge.
+        """
+        order = np.argsort(ts, kind="stable")
+        ts, price, volume = ts[order].astype("<i8"), price[order].astype("<f8"), volume[order].astype("<f8")
+        keep = bucket_last(ts, self.step_ms)
+        ts, price, volume = ts[keep], price[keep], volume[keep]
+        if len(ts) == 0:
+            return len(self)
+
+        with self._lock:
+            # Created on the first write, so lookups of unknown coins leave nothing on disk
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stored = self.columns()
+            last = int(stored["ts"][-1]) if len(stored["ts"]) else None
+            new = {"ts": ts, "price": price, "volume": volume}
+            if last is None or ts[0] // self.step_ms >= last // self.step_ms:
+                self._append(new, replace_last=last is not None and ts[0] // self.step_ms == last // self.step_ms)
+            else:
+                # Copy and drop the mappings first: mapped files can't be replaced on Windows
+                stored = {c: np.array(values) for c, values in stored.items()}
+                self._maps, self._length = {}, -1
+                self._rewrite(stored, new)
+            self._length = -1
+        return len(self)
+
+    def _append(self, new: Dict[str, np.ndarray], replace_last: bool):
+        length = len(self)
+        if replace_last:
+            for c, dt in COLUMNS.items():
+                column = np.memmap(self._path(c), dtype=dt, mode="r+", shape=(length,))
+                column[-1] = new[c][0]
+                column.flush()
+                del column
+            new = {c: values[1:] for c, values in new.items()}
+        for c, dt in COLUMNS.items():
+            path = self._path(c)
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                # Drop any partial row left by an interrupted write
+                if f.seek(0, os.SEEK_END) > length * dt.itemsize:
+                    f.truncate(length * dt.itemsize)
+                    f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(new[c]).tobytes())
+
+    def _rewrite(self, stored: Dict[str, np.ndarray], new: Dict[str, np.ndarray]):
+        # Stored rows first so a stable sort puts fresh rows last in each bucket
+        merged = {c: np.concatenate([stored[c], new[c]]) for c in COLUMNS}
+        order = np.argsort(merged["ts"], kind="stable")
+        merged = {c: values[order] for c, values in merged.items()}
+        keep = bucket_last(merged["ts"], self.step_ms)
+        for c in COLUMNS:
+            tmp_path = self._path(c).with_suffix(".tmp")
+            merged[c][keep].astype(COLUMNS[c]).tofile(tmp_path)
+            os.replace(tmp_path, self._path(c))
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+             step_seconds: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns copies of the rows in [start_ms, end_ms], optionally
+        downsampled to a coarser `step_seconds`.
+        """
+        cols = self.columns()
+        ts = cols["ts"]
+        lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+        hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="right"))
+        out = {c: np.array(values[lo:hi]) for c, values in cols.items()}
+        if step_seconds and step_seconds * 1000 > self.step_ms:
+            keep = bucket_last(out["ts"], step_seconds * 1000)
+            out = {c: values[keep] for c, values in out.items()}
+        return out
+
+
+_series: "OrderedDict[Tuple[str, str], PriceSeries]" = OrderedDict()
+_series_lock = threading.Lock()
+
+
+def valid_coin_id(coin_id: str) -> bool:
+    """True for ids shaped like CoinGecko's; anything else never reaches the disk."""
+    return bool(_COIN_ID.match(coin_id)) and coin_id not in (".", "..")
+
+
+def _safe_name(value: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+    if name in ("", ".", ".."):
+        raise ValueError(f"Invalid name {value!r}")
+    return name
+
+
+def get_series(coin_id: str, resolution: str) -> PriceSeries:
+    """
+    Returns the store for a coin/resolution under <config dir>/history/.
+    Raises ValueError for ids that are not CoinGecko-shaped.
+    """
+    if not valid_coin_id(coin_id):
+        raise ValueError(f"Invalid coin id {coin_id!r}")
+    key = (coin_id, resolution)
+    with _series_lock:
+        series = _series.get(key)
+        if series is None:
+            from . import config_manager
+            directory = config_manager.get_config_dir() / "history" / _safe_name(coin_id) / resolution
+            series = _series[key] = PriceSeries(directory, RESOLUTIONS[resolution])
+            while len(_series) > MAX_OPEN_SERIES:
+                _series.popitem(last=False)
+        else:
+            _series.move_to_end(key)
+    return series
@@ -0,0 +1,144 @@
+import re
+import threading
+from typing import Any, Dict
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from . import rate_limit
+from . import upstreams
+
+# Upstream providers. Each one gets its own keep-alive connection pool so
+# repeated calls reuse TCP/TLS connections instead of handshaking every time.
+# Timeouts can be overridden from the local config, e.g. HTTP_TIMEOUT_APIFY=90.
+PROVIDERS: Dict[str, Dict[str, Any]] = {
+    "coingecko": {
+        "base_url": "https://api.coingecko.com/api/v3",
+        "timeout": 15.0,
+        "max_connections": 10,
+    },
+    "apify": {
+        "base_url": "https://api.apify.com/v2",
+        "timeout": 120.0,  # run-sync scrapes routinely take tens of seconds
+        "max_connections": 4,
+    },
+}
+
+_sessions: Dict[str, requests.Session] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def get_timeout(provider: str) -> float:
+    """Returns the configured timeout (seconds) for a provider."""
+    from . import config_manager
+    override = config_manager.get_api_key(f"HTTP_TIMEOUT_{provider.upper()}")
+    if override:
+        try:
+            return float(override)
+        except (TypeError, ValueError):
+            print(f"Invalid HTTP_TIMEOUT_{provider.upper()}={override!r}, using default.")
+    return PROVIDERS[provider]["timeout"]
+
+
+def get_url(provider: str, path: str) -> str:
+    return PROVIDERS[provider]["base_url"] + path
+
+
+def get_session(provider: str) -> requests.Session:
+    """
+    Returns the pooled requests.Session for a provider (sync callers).
+    """
+    session = _sessions.get(provider)
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+            if session is None:
+                size = PROVIDERS[provider]["max_connections"]
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[provider] = session
+    return session
+
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """
+    Returns the pooled httpx.AsyncClient for a provider (async callers).
+    Must be called from inside the running event loop.
+    """
+    client = _async_clients.get(provider)
+    if client is None or client.is_closed:
+        size = PROVIDERS[provider]["max_connections"]
+        client = httpx.AsyncClient(
+            base_url=PROVIDERS[provider]["base_url"],
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+        )
+        _async_clients[provider] = client
+    return client
+
+
+def _operation(path: str) -> str:
+    # Metric label for a path: ids are folded so every coin shares one series
+    return re.sub(r"^/coins/[^/]+/", "/coins/{id}/", path)
+
+
+def request(provider: str, method: str, path: str, **kwargs) -> requests.Response:
+    """
+    Sends a request through the provider's pooled session, within the
+    provider's rate limit. A 429 pauses the provider for its Retry-After
+    and the request is retried (up to rate_limit.MAX_RETRIES times).
+    """
+    kwargs.setdefault("timeout", get_timeout(provider))
+    operation = _operation(path)
+    limiter = rate_limit.get_limiter(provider)
+    for attempt in range(rate_limit.MAX_RETRIES + 1):
+        limiter.acquire()
+        with metrics.track(provider, operation):
+            response = get_session(provider).request(method, get_url(provider, path), **kwargs)
+        if response.status_code >= 400:
+            metrics.record_error(provider, operation)
+        if response.status_code != 429 or attempt == rate_limit.MAX_RETRIES:
+            return response
+        limiter.backoff(rate_limit.backoff_delay(attempt, response.headers.get("Retry-After")))
+    return response
+
+
+async def arequest(provider: str, method: str, path: str, **kwargs) -> httpx.Response:
+    """
+    Async counterpart of request(); does not block a threadpool worker.
+    Waits for rate-limit budget, then for a slot in the provider's upstream pool.
+    """
+    kwargs.setdefault("timeout", get_timeout(provider))
+    operation = _operation(path)
+    limiter = rate_limit.get_limiter(provider)
+    for attempt in range(rate_limit.MAX_RETRIES + 1):
+        await limiter.aacquire()
+        async with upstreams.get_pool(provider).slot():
+            with metrics.track(provider, operation):
+                response = await get_async_client(provider).request(method, path, **kwargs)
+        if response.status_code >= 400:
+            metrics.record_error(provider, operation)
+        if response.status_code != 429 or attempt == rate_limit.MAX_RETRIES:
+            return response
+        limiter.backoff(rate_limit.backoff_delay(attempt, response.headers.get("Retry-After")))
+    return response
+
+
+def close():
+    """Closes the sync sessions."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+async def aclose():
+    """Closes every pooled client. Called on app shutdown."""
+    for client in list(_async_clients.values()):
+        await client.aclose()
+    _async_clients.clear()
+    close()
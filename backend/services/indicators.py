@@ -0,0 +1,139 @@
+# Vectorized technical indicators.
+#
+# Every function takes a 2D array of shape (n_series, n_points) -- one row per
+# coin, oldest point first -- and returns arrays of the same shape, so a whole
+# market is processed in one pass instead of a Python loop per coin. Shorter
+# series are right-aligned and NaN-padded (see stack_series); positions
+# without enough history are NaN.
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Sparklines are hourly, so a year has 24 * 365 periods
+HOURLY_PERIODS_PER_YEAR = 24 * 365
+
+
+def stack_series(series: Sequence[Sequence[float]]) -> np.ndarray:
+    """Right-aligns variable-length series into a NaN-padded 2D float array."""
+    width = max((len(s) for s in series), default=0)
+    out = np.full((len(series), width), np.nan)
+    for i, values in enumerate(series):
+        if len(values):
+            out[i, width - len(values):] = np.asarray(values, dtype=np.float64)
+    return out
+
+
+def _rolling(x: np.ndarray, window: int, reducer) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = reducer(sliding_window_view(x, window, axis=1), axis=-1)
+    return out
+
+
+def sma(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.mean)
+
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, np.std)
+
+
+def ema(x: np.ndarray, span: Optional[int] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """
+    Exponential moving average seeded with each row's first valid value.
+    The recursion runs over time only; all rows advance together.
+    """
+    a = alpha if alpha is not None else 2.0 / (span + 1)
+    out = np.full(x.shape, np.nan)
+    state = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        col = x[:, t]
+        state = np.where(np.isnan(state), col, np.where(np.isnan(col), state, a * col + (1 - a) * state))
+        out[:, t] = state
+    return out
+
+
+def rsi(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing."""
+    delta = np.diff(x, axis=1, prepend=np.nan)
+    gains = np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None))
+    losses = np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None))
+    avg_gain = ema(gains, alpha=1.0 / period)
+    avg_loss = ema(losses, alpha=1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + avg_gain / avg_loss)
+    out = np.where(avg_loss == 0, 100.0, out)
+    # Not enough history for a meaningful value yet
+    valid = np.cumsum(~np.isnan(delta), axis=1) >= period
+    return np.where(valid & ~np.isnan(avg_gain), out, np.nan)
+
+
+def macd(x: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    line = ema(x, fast) - ema(x, slow)
+    valid = np.cumsum(~np.isnan(x), axis=1) >= slow
+    line = np.where(valid, line, np.nan)
+    signal_line = ema(line, signal)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def bollinger(x: np.ndarray, window: int = 20, k: float = 2.0) -> Dict[str, np.ndarray]:
+    mid = sma(x, window)
+    std = rolling_std(x, window)
+    upper, lower = mid + k * std, mid - k * std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = (x - lower) / (upper - lower)
+    return {"middle": mid, "upper": upper, "lower": lower, "percent_b": percent_b}
+
+
+def atr(x: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Average True Range. Sparklines carry closes only, so the true range is
+    approximated by the absolute close-to-close move.
+    """
+    true_range = np.abs(np.diff(x, axis=1, prepend=np.nan))
+    out = ema(true_range, alpha=1.0 / period)
+    valid = np.cumsum(~np.isnan(true_range), axis=1) >= period
+    return np.where(valid, out, np.nan)
+
+
+def volatility(x: np.ndarray, window: int = 24,
+               periods_per_year: int = HOURLY_PERIODS_PER_YEAR) -> np.ndarray:
+    """Annualized rolling standard deviation of log returns."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(x), axis=1, prepend=np.nan)
+    return rolling_std(log_returns, window) * np.sqrt(periods_per_year)
+
+
+def _last(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 6) for v in values[:, -1]]
+
+
+def compute_latest(series: Sequence[Sequence[float]]) -> List[Dict[str, Optional[float]]]:
+    """
+    Computes every indicator over all series at once and returns the most
+    recent value of each, one dict per input series (None when undefined).
+    """
+    if not series:
+        return []
+    x = stack_series(series)
+    if x.shape[1] == 0:
+        return [{} for _ in series]
+
+    m = macd(x)
+    bands = bollinger(x)
+    columns = {
+        "sma_20": _last(sma(x, 20)),
+        "ema_20": _last(np.where(np.cumsum(~np.isnan(x), axis=1) >= 20, ema(x, 20), np.nan)),
+        "rsi_14": _last(rsi(x, 14)),
+        "macd": _last(m["macd"]),
+        "macd_signal": _last(m["signal"]),
+        "macd_histogram": _last(m["histogram"]),
+        "bb_upper": _last(bands["upper"]),
+        "bb_middle": _last(bands["middle"]),
+        "bb_lower": _last(bands["lower"]),
+        "bb_percent_b": _last(bands["percent_b"]),
+        "atr_14": _last(atr(x, 14)),
+        "volatility_24": _last(volatility(x, 24)),
+    }
+    return [{name: values[i] for name, values in columns.items()} for i in range(len(series))]
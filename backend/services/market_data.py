@@ -1,13 +1,41 @@
+import asyncio
+import logging
 import os
-import requests
+import sqlite3
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
-# Simple In-Memory Cache for AI Context
-_price_cache = {
-    "data": [],
-    "last_updated": 0
-}
+import numpy as np
+
+from . import downsample
+from . import history_store
+from . import http_client
+from . import market_store
+from . import news_dedup
+from . import news_ingest
+from . import rate_limit
+from .cache import TTLCache
+from .refresher import BackgroundRefresher
+
+logger = logging.getLogger(__name__)
+
+# Shared CoinGecko caches. Concurrent misses on the same key coalesce into
+# one upstream call; empty results (upstream failures) are never cached.
+PRICES_TTL = 60
+HISTORY_TTL = 300
+prices_cache = TTLCache("coingecko_prices", default_ttl=PRICES_TTL, max_size=32)
+history_cache = TTLCache("coingecko_history", default_ttl=HISTORY_TTL, max_size=256)
+indicators_cache = TTLCache("indicators", default_ttl=PRICES_TTL, max_size=16)
+# Downsampled point indices, keyed by series version so they outlive the data caches
+downsample_cache = TTLCache("downsampled", default_ttl=HISTORY_TTL, max_size=1024)
+
+# The chat context reads the same top-100 list the dashboard requests
+CONTEXT_COIN_COUNT = 20
+
+# Seconds between background news/summary refreshes (NEWS_REFRESH_INTERVAL in config)
+NEWS_REFRESH_INTERVAL = 300
+# (headlines, summary) of the last good market summary, reused while the headlines are unchanged
+_news_summary: Optional[Tuple[List[str], Dict[str, Any]]] = None
 
 # Mock Data for Prototype (Fallback)
 MOCK_INSIGHTS = [
@@ -19,59 +47,123 @@ MOCK_INSIGHTS = [
     }
 ]
 
-def fetch_market_news(query: str = "Finance Investing Stock Market") -> List[Dict[str, Any]]:
+def _apify_news_request(query: str):
     """
-    Fetches real-time news from Google News via Apify.
+    Builds the Apify request (path, params, payload) for a news query.
+    Returns None when no Apify key is configured.
     """
     from . import config_manager
     api_key = config_manager.get_api_key("APIFY_API_KEY")
     if not api_key:
         print("APIFY_API_KEY missing, using mock.")
-        return []
+        return None
 
     # Apify Google News Scraper (unofficial/google-news-scraper)
     # Actor ID: "l2t0l4u2k0c2-google-news-scraper" or similar. 
     # We will use the 'google-news-scraper' by 'apify' or 'epctex' depending on stability.
     # Switch to 'apify/google-search-scraper' as it is more reliable/persistent.
-    url = f"https://api.apify.com/v2/acts/apify~google-search-scraper/run-sync-get-dataset-items?token={api_key}"
-    
+    path = "/acts/apify~google-search-scraper/run-sync-get-dataset-items"
     payload = {
         "queries": query + " news", # Append 'news' to approximate news search
         "resultsPerPage": 10,
         "maxPagesPerQuery": 1,
     }
-    
+    return path, {"token": api_key}, payload
+
+
+def _normalize_news(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize data from Google Search Scraper.
+    Output is a list of result pages. Each page has 'organicResults'.
+    """
+    news_items = []
+    for page in data:
+        results = page.get("organicResults", [])
+        for item in results:
+            news_items.append({
+                "title": item.get("title"),
+                "link": item.get("url"),
+                "source": "Google Search", # Search scraper doesn't always give source name cleanly
+                "published_at": item.get("date") or "Just Now" # Extract date if available
+            })
+    return news_items
+
+
+def _analyze_news(stories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Scores deduplicated stories in a single batched model call (blocking).
+    """
+    from services import ai_agent
+    merged = sum(len(item.get("sources", [item])) - 1 for item in stories)
+    print(f"Analyzing {len(stories)} headlines ({merged} duplicates merged)...")
+    analyses = ai_agent.analyze_market_news_batch([item['title'] for item in stories])
+    for item, analysis in zip(stories, analyses):
+        item.update(analysis) # Merge impact_score, reasoning, affected_assets, etc.
+    return stories
+
+
+def _enrich_news(news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Runs AI enrichment on the news items (blocking Gemini calls).
+    """
+    # Syndicated copies of one story are merged first, so the 10 slots go to distinct stories
+    stories = news_dedup.dedupe(news_items)
+    return _analyze_news(stories[:10]) # Limit to 10 total
+
+
+def _scrape_news(query: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Scrapes one result page via Apify and normalizes it, without enrichment.
+    Returns None when Apify is not configured or the request failed.
+    """
+    apify_request = _apify_news_request(query)
+    if apify_request is None:
+        return None
+    path, params, payload = apify_request
+
     try:
-        response = requests.post(url, json=payload)
+        response = http_client.request("apify", "POST", path, params=params, json=payload)
         if response.status_code != 200:
              print(f"Apify Status: {response.status_code} {response.reason}")
              # print(response.text) # Commented out to avoid UnicodeEncodeError on Windows
         response.raise_for_status()
-        data = response.json()
-        
-        # Normalize data from Google Search Scraper
-        # Output is a list of result pages. Each page has 'organicResults'.
-        news_items = []
-        for page in data:
-            results = page.get("organicResults", [])
-            for item in results:
-                news_items.append({
-                    "title": item.get("title"),
-                    "link": item.get("url"),
-                    "source": "Google Search", # Search scraper doesn't always give source name cleanly
-                    "published_at": item.get("date") or "Just Now" # Extract date if available
-                })
-        
-        # --- AI ENRICHMENT ---
-        # Analyze top 3 items to save tokens/time
-        from services import ai_agent
-        for i in range(min(3, len(news_items))):
-            item = news_items[i]
-            print(f"Analyzing: {item['title'][:30]}...")
-            analysis = ai_agent.analyze_market_news(item['title'])
-            item.update(analysis) # Merge impact_score, reasoning, affected_assets, etc.
-
-        return news_items[:10] # Limit to 10 total
+        return _normalize_news(response.json())
+    except Exception as e:
+        print(f"Apify Error: {e}")
+        return None
+
+
+def fetch_market_news(query: str = "Finance Investing Stock Market") -> List[Dict[str, Any]]:
+    """
+    Fetches real-time news from Google News via Apify.
+    """
+    news_items = _scrape_news(query)
+    if not news_items:
+        return []
+    try:
+        return _enrich_news(news_items)
+    except Exception as e:
+        print(f"News enrichment error: {e}")
+        return []
+
+
+async def fetch_market_news_async(query: str = "Finance Investing Stock Market") -> List[Dict[str, Any]]:
+    """
+    Async variant of fetch_market_news. The scrape goes through the pooled
+    async client; the (blocking) AI enrichment runs in a worker thread.
+    """
+    apify_request = _apify_news_request(query)
+    if apify_request is None:
+        return []
+    path, params, payload = apify_request
+
+    try:
+        response = await http_client.arequest("apify", "POST", path, params=params, json=payload)
+        if response.status_code != 200:
+             print(f"Apify Status: {response.status_code} {response.reason_phrase}")
+        response.raise_for_status()
+        news_items = _normalize_news(response.json())
+        return await asyncio.to_thread(_enrich_news, news_items)
     except Exception as e:
         print(f"Apify Error: {e}")
         return []
@@ -89,39 +181,288 @@ def get_market_summary() -> Dict[str, Any]:
     return summary
 
 
-def get_coin_history(coin_id: str, days: str = "1") -> List[float]:
+def build_news_snapshot() -> Dict[str, Any]:
     """
-    Fetches historical price data (sparkline) for a specific coin.
+    Runs one incremental news refresh: scrape, then enrich and summarize
+    only if the page brought stories not seen before. The snapshot holds the
+    rolling window of recent stories. Raises when there is nothing to serve
+    so the refresher keeps the last good snapshot.
+    Its upstream calls queue behind interactive requests.
     """
+    global _news_summary
+    from services import ai_agent
+    ingestor = news_ingest.get_ingestor()
+    with rate_limit.priority(rate_limit.BACKGROUND):
+        page = _scrape_news("Finance Investing Stock Market")
+        if page is None:
+            raise RuntimeError("News scrape failed")
+        stories = ingestor.ingest(page)
+        if stories:
+            stories = _analyze_news(stories)
+        # Failed analyses are served as placeholders but stay out of the window, so the next page retries them
+        failed = [item for item in stories if ai_agent.analysis_failed(item)]
+        ingestor.add([item for item in stories if not ai_agent.analysis_failed(item)])
+        window = ingestor.window()
+        news = failed + window
+        if not news:
+            raise RuntimeError("No news returned")
+
+        # The summary only changes with the headlines; a failed one keeps the last good one and is retried
+        titles = [item['title'] for item in news]
+        summarized, summary = _news_summary or (None, None)
+        if titles != summarized:
+            fresh = ai_agent.generate_market_summary(titles)
+            if not ai_agent.summary_failed(fresh):
+                summary = fresh
+                _news_summary = (titles, fresh)
+            elif summary is None:
+                summary = fresh
+    print(f"News refresh: {len(stories)} new ({len(failed)} failed) of {len(page)} scraped, {len(window)} in window")
     try:
-        url = f"{COINGECKO_API_URL}/coins/{coin_id}/market_chart"
-        params = {
-            "vs_currency": "usd",
-            "days": days,
-            "interval": "hourly" if days == "1" else "daily"
-        }
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            # extract prices (timestamp, price) -> just price
-            prices = [p[1] for p in data.get("prices", [])]
-            return prices
-        
-        logger.error(f"CoinGecko API Error: {response.status_code}")
-        return []
-    except Exception as e:
-        logger.error(f"Error fetching history for {coin_id}: {e}")
-        return []
+        # Only enriched stories and an up-to-date summary are persisted (and restored after a restart)
+        current = _news_summary is not None and _news_summary[0] == titles
+        market_store.get_store().put_news_snapshot(window, summary if current else None)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Market store write failed: {e}")
+    return {"news": news, "summary": summary}
+
 
-def get_crypto_prices(limit: int = 10) -> List[Dict[str, Any]]:
+def _news_refresh_interval() -> float:
+    from . import config_manager
+    try:
+        return float(config_manager.get_api_key("NEWS_REFRESH_INTERVAL") or NEWS_REFRESH_INTERVAL)
+    except ValueError:
+        return NEWS_REFRESH_INTERVAL
+
+
+# Background refresher serving /api/news and /api/news/summary (started by main.py)
+news_refresher = BackgroundRefresher("news", build_news_snapshot, interval=_news_refresh_interval())
+
+
+def restore_news_snapshot() -> bool:
     """
-    Fetches live crypto prices from CoinGecko (free, no API key required).
-    Returns top coins sorted by market cap.
+    Seeds news_refresher and the ingestion window with the last stored
+    refresh, so a restarted node serves news at once, skips the scrape until
+    that snapshot is due and then only processes stories it has not seen.
+    """
+    try:
+        stored = market_store.get_store().latest_news_snapshot()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Market store read failed: {e}")
+        return False
+    if stored is None:
+        return False
+    global _news_summary
+    from services import ai_agent
+    fetched_at, data, current = stored
+    news_ingest.get_ingestor().restore(data["news"], fetched_at)
+    # A summary stored for other headlines is served, but regenerated on the first refresh
+    if current and not ai_agent.summary_failed(data["summary"]):
+        _news_summary = ([item['title'] for item in data["news"]], data["summary"])
+    news_refresher.seed(data, fetched_at)
+    return True
+
+
+def _history_resolution(days: str) -> str:
+    return "hourly" if days == "1" else "daily"
+
+
+def _history_span_ms(days: str) -> int:
+    # CoinGecko's free tier serves at most a year of history
+    try:
+        span_days = 365 if days == "max" else min(float(days), 365)
+    except ValueError:
+        span_days = 1
+    return int(span_days * 86400 * 1000)
+
+
+def _history_window(coin_id: str, days: str):
     """
-    url = f"{COINGECKO_API_URL}/coins/markets"
-    params = {
+    Works out what the local store is missing for a request.
+    Returns (series, start_ms, fetch_from_ms); fetch_from_ms is None when
+    the store already covers the window and its tail is fresh.
+    """
+    series = history_store.get_series(coin_id, _history_resolution(days))
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - _history_span_ms(days)
+    covered_from = series.covered_from()
+    last = series.last_timestamp()
+
+    if last is None or covered_from is None or covered_from > start_ms:
+        return series, start_ms, start_ms  # cold or too short: fetch the whole window
+    if now_ms - last > HISTORY_TTL * 1000:
+        return series, start_ms, last  # only the missing tail
+    return series, start_ms, None
+
+
+def _range_params(fetch_from_ms: int) -> Dict[str, Any]:
+    return {
         "vs_currency": "usd",
+        "from": fetch_from_ms // 1000,
+        "to": int(time.time()),
+    }
+
+
+def _store_chart(series, data: Dict[str, Any], fetch_from_ms: int):
+    """Writes a market_chart/range response into the columnar store."""
+    prices = np.asarray(data.get("prices") or [], dtype=np.float64).reshape(-1, 2)
+    if not len(prices):
+        return
+    volumes = np.asarray(data.get("total_volumes") or [], dtype=np.float64).reshape(-1, 2)
+    volume = np.interp(prices[:, 0], volumes[:, 0], volumes[:, 1]) if len(volumes) else np.zeros(len(prices))
+    series.merge(prices[:, 0].astype(np.int64), prices[:, 1], volume)
+    series.mark_covered(fetch_from_ms)
+
+
+def get_coin_history(coin_id: str, days: str = "1") -> List[float]:
+    """
+    Fetches historical price data (sparkline) for a specific coin.
+    Served from the local history store, which only downloads the missing
+    tail; results are cached for HISTORY_TTL seconds.
+    """
+    return history_cache.get_or_load(
+        (coin_id, days), lambda: _load_coin_history(coin_id, days), should_cache=_has_prices
+    )[1]
+
+
+async def get_coin_history_async(coin_id: str, days: str = "1") -> List[float]:
+    """
+    Async variant of get_coin_history.
+    """
+    return (await get_coin_history_versioned_async(coin_id, days))[1]
+
+
+async def get_coin_history_versioned_async(coin_id: str, days: str = "1") -> Tuple[Optional[int], List[float]]:
+    """
+    (timestamp of the stored series tail, prices): get_coin_history_async
+    plus the version downsample_history needs, read in the same worker thread.
+    """
+    return await history_cache.aget_or_load(
+        (coin_id, days), lambda: _load_coin_history_async(coin_id, days), should_cache=_has_prices
+    )
+
+
+def _has_prices(history: Tuple[Optional[int], List[float]]) -> bool:
+    return bool(history[1])
+
+
+def _read_history(series, start_ms: int) -> Tuple[Optional[int], List[float]]:
+    return series.last_timestamp(), series.read(start_ms)["price"].tolist()
+
+
+def _load_coin_history(coin_id: str, days: str) -> Tuple[Optional[int], List[float]]:
+    series, start_ms, fetch_from = _history_window(coin_id, days)
+    if fetch_from is not None:
+        try:
+            response = http_client.request(
+                "coingecko", "GET", f"/coins/{coin_id}/market_chart/range", params=_range_params(fetch_from)
+            )
+            if response.status_code == 200:
+                _store_chart(series, response.json(), fetch_from)
+            else:
+                logger.error(f"CoinGecko API Error: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Error fetching history for {coin_id}: {e}")
+
+    # Whatever is stored is served, even if the refresh failed
+    return _read_history(series, start_ms)
+
+
+async def _load_coin_history_async(coin_id: str, days: str) -> Tuple[Optional[int], List[float]]:
+    # The store's file reads and writes run in worker threads, off the event loop
+    series, start_ms, fetch_from = await asyncio.to_thread(_history_window, coin_id, days)
+    if fetch_from is not None:
+        try:
+            response = await http_client.arequest(
+                "coingecko", "GET", f"/coins/{coin_id}/market_chart/range", params=_range_params(fetch_from)
+            )
+            if response.status_code == 200:
+                await asyncio.to_thread(_store_chart, series, response.json(), fetch_from)
+            else:
+                logger.error(f"CoinGecko API Error: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Error fetching history for {coin_id}: {e}")
+
+    return await asyncio.to_thread(_read_history, series, start_ms)
+
+
+def _series_payload(coin_id: str, days: str, start: Optional[int], end: Optional[int],
+                    step: Optional[int]) -> Dict[str, Any]:
+    resolution = _history_resolution(days)
+    if start is None:
+        start = int(time.time() * 1000) - _history_span_ms(days)
+    rows = history_store.get_series(coin_id, resolution).read(start, end, step)
+    return {
+        "coin_id": coin_id,
+        "resolution": resolution,
+        "timestamps": rows["ts"].tolist(),
+        "prices": rows["price"].tolist(),
+        "volumes": rows["volume"].tolist(),
+    }
+
+
+def get_coin_history_series(coin_id: str, days: str = "1", start: Optional[int] = None,
+                            end: Optional[int] = None, step: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Timestamped history sliced to [start, end] (epoch ms) and optionally
+    resampled to `step` seconds, read straight from the local store.
+    """
+    get_coin_history(coin_id, days)  # refreshes the store if needed
+    return _series_payload(coin_id, days, start, end, step)
+
+
+async def get_coin_history_series_async(coin_id: str, days: str = "1", start: Optional[int] = None,
+                                        end: Optional[int] = None, step: Optional[int] = None) -> Dict[str, Any]:
+    await get_coin_history_async(coin_id, days)
+    return await asyncio.to_thread(_series_payload, coin_id, days, start, end, step)
+
+
+def downsample_indices(name: str, version: Any, values: List[float], points: int, method: str = "lttb",
+                       x: Optional[List[float]] = None) -> np.ndarray:
+    """
+    Indices to keep when drawing `values` with `points` points, cached per
+    (name, version). `version` must change whenever the series does.
+    """
+    return downsample_cache.get_or_load(
+        (name, version, len(values), points, method),
+        lambda: downsample.downsample(values, points, method, x),
+    )
+
+
+def downsample_history(coin_id: str, days: str, prices: List[float], tail: Optional[int], points: int,
+                       method: str = "lttb") -> List[float]:
+    """
+    Downsampled result of get_coin_history, versioned by the stored series
+    `tail` (from get_coin_history_versioned_async), so no file is read here.
+    """
+    version = (days, tail, prices[-1] if prices else None)
+    keep = downsample_indices(f"history:{coin_id}", version, prices, points, method)
+    return [prices[i] for i in keep]
+
+
+def downsample_series(payload: Dict[str, Any], points: int, method: str = "lttb") -> Dict[str, Any]:
+    """Downsamples a get_coin_history_series payload, keeping its columns aligned."""
+    ts, prices = payload["timestamps"], payload["prices"]
+    version = (payload["resolution"], ts[0] if ts else None, ts[-1] if ts else None, prices[-1] if prices else None)
+    keep = downsample_indices(f"series:{payload['coin_id']}", version, prices, points, method, x=ts)
+    return {**payload, **{c: [payload[c][i] for i in keep] for c in ("timestamps", "prices", "volumes")}}
+
+
+def downsample_sparklines(coins: List[Dict[str, Any]], points: int, method: str = "lttb") -> List[Dict[str, Any]]:
+    """Coins from get_crypto_prices with sparkline_7d reduced to `points` points."""
+    result = []
+    for coin in coins:
+        sparkline = coin.get("sparkline_7d") or []
+        if len(sparkline) > points:
+            keep = downsample_indices(f"sparkline:{coin.get('id')}", coin.get("last_updated"), sparkline, points, method)
+            coin = {**coin, "sparkline_7d": [sparkline[i] for i in keep]}
+        result.append(coin)
+    return result
+
+
+def _markets_params(limit: int, vs_currency: str) -> Dict[str, Any]:
+    return {
+        "vs_currency": vs_currency,
         "order": "market_cap_desc",
         "per_page": limit,
         "page": 1,
@@ -129,55 +470,197 @@ def get_crypto_prices(limit: int = 10) -> List[Dict[str, Any]]:
         "price_change_percentage": "1h,24h,7d"
     }
 
+
+# Fields of each coin returned by get_crypto_prices (for `fields=` projection)
+PRICE_FIELDS = (
+    "id", "symbol", "name", "image", "current_price", "market_cap", "market_cap_rank", "total_volume",
+    "price_change_24h", "price_change_percentage_24h", "price_change_percentage_1h",
+    "price_change_percentage_7d", "circulating_supply", "total_supply", "ath", "ath_change_percentage",
+    "sparkline_7d", "last_updated",
+)
+
+
+def _normalize_coins(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    coins = []
+    for coin in data:
+        coins.append({
+            "id": coin.get("id"),
+            "symbol": coin.get("symbol", "").upper(),
+            "name": coin.get("name"),
+            "image": coin.get("image"),
+            "current_price": coin.get("current_price"),
+            "market_cap": coin.get("market_cap"),
+            "market_cap_rank": coin.get("market_cap_rank"),
+            "total_volume": coin.get("total_volume"),
+            "price_change_24h": coin.get("price_change_24h"),
+            "price_change_percentage_24h": coin.get("price_change_percentage_24h"),
+            "price_change_percentage_1h": coin.get("price_change_percentage_1h_in_currency"),
+            "price_change_percentage_7d": coin.get("price_change_percentage_7d_in_currency"),
+            "circulating_supply": coin.get("circulating_supply"),
+            "total_supply": coin.get("total_supply"),
+            "ath": coin.get("ath"),
+            "ath_change_percentage": coin.get("ath_change_percentage"),
+            "sparkline_7d": (coin.get("sparkline_in_7d") or {}).get("price", []),
+            "last_updated": coin.get("last_updated"),
+        })
+    return coins
+
+
+def get_crypto_prices(limit: int = 10, vs_currency: str = "usd") -> List[Dict[str, Any]]:
+    """
+    Fetches live crypto prices from CoinGecko (free, no API key required).
+    Returns top coins sorted by market cap. Cached for PRICES_TTL seconds.
+    """
+    return prices_cache.get_or_load(
+        (vs_currency, limit), lambda: _load_crypto_prices(limit, vs_currency), should_cache=bool
+    )
+
+
+async def get_crypto_prices_async(limit: int = 10, vs_currency: str = "usd") -> List[Dict[str, Any]]:
+    """
+    Async variant of get_crypto_prices.
+    """
+    return await prices_cache.aget_or_load(
+        (vs_currency, limit), lambda: _load_crypto_prices_async(limit, vs_currency), should_cache=bool
+    )
+
+
+# Price lists already looked up in the local store; after that the in-memory cache serves them
+_restored_prices = set()
+
+
+def _restore_prices(limit: int, vs_currency: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    The first load of a price list after a restart is served from the local
+    store when its last fetch is younger than PRICES_TTL.
+    """
+    if (vs_currency, limit) in _restored_prices:
+        return None
+    _restored_prices.add((vs_currency, limit))
     try:
-        response = requests.get(url, params=params, timeout=15)
+        return market_store.get_store().latest_prices(vs_currency, limit, PRICES_TTL)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Market store read failed: {e}")
+        return None
+
+
+def _store_prices(vs_currency: str, coins: List[Dict[str, Any]]):
+    try:
+        market_store.get_store().put_prices(vs_currency, coins)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Market store write failed: {e}")
+
+
+def _load_crypto_prices(limit: int, vs_currency: str) -> List[Dict[str, Any]]:
+    restored = _restore_prices(limit, vs_currency)
+    if restored:
+        return restored
+    try:
+        response = http_client.request(
+            "coingecko", "GET", "/coins/markets", params=_markets_params(limit, vs_currency)
+        )
         response.raise_for_status()
-        data = response.json()
-
-        coins = []
-        for coin in data:
-            coins.append({
-                "id": coin.get("id"),
-                "symbol": coin.get("symbol", "").upper(),
-                "name": coin.get("name"),
-                "image": coin.get("image"),
-                "current_price": coin.get("current_price"),
-                "market_cap": coin.get("market_cap"),
-                "market_cap_rank": coin.get("market_cap_rank"),
-                "total_volume": coin.get("total_volume"),
-                "price_change_24h": coin.get("price_change_24h"),
-                "price_change_percentage_24h": coin.get("price_change_percentage_24h"),
-                "price_change_percentage_1h": coin.get("price_change_percentage_1h_in_currency"),
-                "price_change_percentage_7d": coin.get("price_change_percentage_7d_in_currency"),
-                "circulating_supply": coin.get("circulating_supply"),
-                "total_supply": coin.get("total_supply"),
-                "ath": coin.get("ath"),
-                "ath_change_percentage": coin.get("ath_change_percentage"),
-                "sparkline_7d": coin.get("sparkline_in_7d", {}).get("price", []),
-                "last_updated": coin.get("last_updated"),
-            })
-        return coins
+        coins = _normalize_coins(response.json())
     except Exception as e:
         print(f"CoinGecko Error: {e}")
         return []
+    _store_prices(vs_currency, coins)
+    return coins
+
 
-def get_market_context_string() -> str:
+async def _load_crypto_prices_async(limit: int, vs_currency: str) -> List[Dict[str, Any]]:
+    restored = await asyncio.to_thread(_restore_prices, limit, vs_currency)
+    if restored:
+        return restored
+    try:
+        response = await http_client.arequest(
+            "coingecko", "GET", "/coins/markets", params=_markets_params(limit, vs_currency)
+        )
+        response.raise_for_status()
+        coins = _normalize_coins(response.json())
+    except Exception as e:
+        print(f"CoinGecko Error: {e}")
+        return []
+    await asyncio.to_thread(_store_prices, vs_currency, coins)
+    return coins
+
+
+def fetch_crypto_prices(vs_currency: str = "usd", per_page: int = 100) -> List[Dict[str, Any]]:
+    """
+    Endpoint-facing alias of get_crypto_prices (used by /api/crypto/prices).
+    """
+    return get_crypto_prices(limit=per_page, vs_currency=vs_currency)
+
+
+async def fetch_crypto_prices_async(vs_currency: str = "usd", per_page: int = 100) -> List[Dict[str, Any]]:
+    return await get_crypto_prices_async(limit=per_page, vs_currency=vs_currency)
+
+def _indicator_version(coins: List[Dict[str, Any]]):
+    # A new price fetch changes last_updated, which invalidates the computed set
+    return tuple((coin.get("id"), coin.get("last_updated")) for coin in coins)
+
+
+def _compute_indicators(coins: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    from . import indicators
+    latest = indicators.compute_latest([coin.get("sparkline_7d") or [] for coin in coins])
+    return {coin["id"]: values for coin, values in zip(coins, latest)}
+
+
+def indicators_for(coins: List[Dict[str, Any]], ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Technical indicators for a list of coins from get_crypto_prices, computed
+    in bulk over their 7d hourly sparklines and cached per data version.
+    """
+    if not coins:
+        return {}
+    computed = indicators_cache.get_or_load(_indicator_version(coins), lambda: _compute_indicators(coins))
+    if ids:
+        return {coin_id: computed[coin_id] for coin_id in ids if coin_id in computed}
+    return computed
+
+
+def get_indicators(ids: Optional[List[str]] = None, per_page: int = 100) -> Dict[str, Dict[str, Any]]:
+    return indicators_for(fetch_crypto_prices(per_page=per_page), ids)
+
+
+async def get_indicators_async(ids: Optional[List[str]] = None, per_page: int = 100) -> Dict[str, Dict[str, Any]]:
+    coins = await fetch_crypto_prices_async(per_page=per_page)
+    return indicators_for(coins, ids)
+
+
+def _format_indicators(values: Dict[str, Any]) -> str:
+    parts = []
+    if values.get("rsi_14") is not None:
+        parts.append(f"RSI {values['rsi_14']:.0f}")
+    if values.get("macd_histogram") is not None:
+        parts.append(f"MACD hist {values['macd_histogram']:+.4g}")
+    if values.get("bb_percent_b") is not None:
+        parts.append(f"BB %B {values['bb_percent_b']:.2f}")
+    if values.get("volatility_24") is not None:
+        parts.append(f"vol {values['volatility_24'] * 100:.0f}%")
+    return ", ".join(parts)
+
+
+def get_market_context_string(include_indicators: bool = False) -> str:
     """
     Returns a formatted string of current market prices for the AI context.
-    Uses a 60-second cache to avoid hitting rate limits.
+    Served from the shared prices cache to avoid hitting rate limits.
+    With include_indicators, each coin also gets RSI/MACD/Bollinger/volatility.
     """
-    global _price_cache
-    
-    # Check cache (60s TTL)
-    if time.time() - _price_cache["last_updated"] < 60 and _price_cache["data"]:
-        coins = _price_cache["data"]
-    else:
-        # Fetch fresh data (top 20 is enough for context)
-        # Note: We use the existing fetch_crypto_prices function
-        coins = fetch_crypto_prices(per_page=20)
-        if coins:
-            _price_cache["data"] = coins
-            _price_cache["last_updated"] = time.time()
+    # Top 20 is enough for context; slicing the top-100 list shares its cache entry
+    return _format_market_context(fetch_crypto_prices(per_page=100), include_indicators)
+
+
+async def get_market_context_string_async(include_indicators: bool = False) -> str:
+    """
+    Async variant of get_market_context_string.
+    """
+    return _format_market_context(await fetch_crypto_prices_async(per_page=100), include_indicators)
+
+
+def _format_market_context(all_coins: List[Dict[str, Any]], include_indicators: bool) -> str:
+    coins = all_coins[:CONTEXT_COIN_COUNT]
+    coin_indicators = indicators_for(all_coins) if include_indicators else {}
     
     if not coins:
         return "Market data unavailable."
@@ -185,14 +668,26 @@ def get_market_context_string() -> str:
     # Format: "BTC: $95000 (+2.5%), ETH: $2800 (-1.2%)..."
     context_parts = []
     for coin in coins:
-        symbol = coin.get('symbol', '???')
-        price = coin.get('current_price')
-        change = coin.get('price_change_percentage_24h')
-        
-        # Handle potential None values safely
-        if price is not None:
-            price_str = f"${price:,.2f}"
-            change_str = f"{change:+.2f}%" if change is not None else "0%"
-            context_parts.append(f"{symbol}: {price_str} ({change_str})")
+        part = format_coin(coin, coin_indicators.get(coin.get("id")))
+        if part:
+            context_parts.append(part)
         
     return ", ".join(context_parts)
+
+
+def format_coin(coin: Dict[str, Any], values: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    One coin as "BTC: $95,000.00 (+2.50%)", plus an indicator suffix when
+    `values` is given. None when the coin has no price.
+    """
+    price = coin.get('current_price')
+    # Handle potential None values safely
+    if price is None:
+        return None
+    change = coin.get('price_change_percentage_24h')
+    change_str = f"{change:+.2f}%" if change is not None else "0%"
+    part = f"{coin.get('symbol', '???')}: ${price:,.2f} ({change_str})"
+    extra = _format_indicators(values or {})
+    if extra:
+        part += f" [{extra}]"
+    return part
@@ -0,0 +1,278 @@
+# Embedded SQLite store for price snapshots, enriched news and summaries.
+#
+# Lives next to config.json (market.db) in WAL mode, so the API's readers
+# never block the refresher's writes. market_data reads from it before
+# calling an upstream and writes every fresh result through to it, which
+# makes a restarted node warm (no cold start against rate-limited APIs) and
+# turns historical lookups into local, indexed queries.
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import encoding
+
+# Rows older than this are pruned (STORE_RETENTION_DAYS in config)
+DEFAULT_RETENTION_DAYS = 14
+# Seconds between prune passes
+PRUNE_INTERVAL = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_snapshots (
+    coin_id TEXT NOT NULL,
+    vs_currency TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    price REAL,
+    market_cap REAL,
+    total_volume REAL,
+    change_24h REAL,
+    PRIMARY KEY (coin_id, vs_currency, fetched_at)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS price_snapshots_time ON price_snapshots (fetched_at);
+
+-- The full list (with sparklines) of the latest fetch, to serve after a restart
+CREATE TABLE IF NOT EXISTS price_lists (
+    vs_currency TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    coins BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS news_items (
+    key TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    rank INTEGER NOT NULL,
+    impact_score REAL,
+    item TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS news_items_last_seen ON news_items (last_seen, rank);
+CREATE INDEX IF NOT EXISTS news_items_first_seen ON news_items (first_seen);
+
+-- One row per news refresh: its items (keys in rank order) and the summary current for them
+CREATE TABLE IF NOT EXISTS news_snapshots (
+    fetched_at REAL PRIMARY KEY,
+    keys TEXT NOT NULL,
+    summary_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    created_at REAL PRIMARY KEY,
+    sentiment TEXT,
+    signal TEXT,
+    summary TEXT NOT NULL
+);
+"""
+
+
+class MarketStore:
+    """
+    One SQLite file, one connection per thread. Writes are batched into a
+    single transaction per call; reads are plain indexed queries.
+    """
+
+    def __init__(self, path, retention_days: float = DEFAULT_RETENTION_DAYS):
+        self.path = Path(path)
+        self.retention_seconds = retention_days * 86400
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self.reads = 0
+        self.writes = 0
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across application crashes, fsync only at checkpoints
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _write(self, statements: List[Tuple[str, Any]]):
+        db = self._connect()
+        with db:
+            for sql, rows in statements:
+                db.executemany(sql, rows)
+        self.writes += 1
+        self._maybe_prune()
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[tuple]:
+        self.reads += 1
+        return self._connect().execute(sql, params).fetchall()
+
+    # Prices
+
+    def put_prices(self, vs_currency: str, coins: List[Dict[str, Any]], fetched_at: Optional[float] = None):
+        """Stores one fetched price list: a row per coin plus the full list for warm restarts."""
+        if not coins:
+            return
+        fetched_at = fetched_at or time.time()
+        rows = [
+            (c["id"], vs_currency, fetched_at, c.get("current_price"), c.get("market_cap"),
+             c.get("total_volume"), c.get("price_change_percentage_24h"))
+            for c in coins if c.get("id")
+        ]
+        self._write([
+            ("INSERT OR REPLACE INTO price_snapshots VALUES (?, ?, ?, ?, ?, ?, ?)", rows),
+            # A shorter list never replaces a longer one of the same age bracket
+            ("INSERT INTO price_lists VALUES (?, ?, ?, ?) ON CONFLICT (vs_currency) DO UPDATE SET "
+             "fetched_at = excluded.fetched_at, size = excluded.size, coins = excluded.coins "
+             "WHERE excluded.size >= price_lists.size OR excluded.fetched_at - price_lists.fetched_at > 60",
+             # orjson when installed: the list carries 100 x 168 sparkline floats
+             [(vs_currency, fetched_at, len(coins), encoding.encode(coins, encoding.JSON)[0])]),
+        ])
+
+    def latest_prices(self, vs_currency: str, limit: int, max_age: float) -> Optional[List[Dict[str, Any]]]:
+        """The last stored list if it is younger than `max_age` and has at least `limit` coins."""
+        rows = self._query(
+            "SELECT coins FROM price_lists WHERE vs_currency = ? AND fetched_at >= ? AND size >= ?",
+            (vs_currency, time.time() - max_age, limit),
+        )
+        return json.loads(rows[0][0])[:limit] if rows else None
+
+    def price_history(self, coin_id: str, vs_currency: str = "usd", start: float = 0,
+                      end: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Stored snapshots of one coin in [start, end], oldest first (the latest `limit`)."""
+        rows = self._query(
+            "SELECT fetched_at, price, market_cap, total_volume, change_24h FROM price_snapshots "
+            "WHERE coin_id = ? AND vs_currency = ? AND fetched_at BETWEEN ? AND ? "
+            "ORDER BY fetched_at DESC LIMIT ?",
+            (coin_id, vs_currency, start, end if end is not None else time.time(), limit),
+        )
+        fields = ("fetched_at", "price", "market_cap", "total_volume", "price_change_percentage_24h")
+        return [dict(zip(fields, row)) for row in reversed(rows)]
+
+    # News and summaries
+
+    def put_news_snapshot(self, news: List[Dict[str, Any]], summary: Optional[Dict[str, Any]],
+                          fetched_at: Optional[float] = None):
+        """
+        Upserts the enriched items of one news refresh and records the
+        refresh itself. `summary` is the one current for these items (None
+        when there is none); it is only stored again when its text changed.
+        """
+        from .analysis_cache import normalize_headline
+        fetched_at = fetched_at or time.time()
+        rows = [
+            (normalize_headline(item.get("title") or ""), item.get("title") or "", item.get("link"),
+             fetched_at, fetched_at, rank, item.get("impact_score"), json.dumps(item))
+            for rank, item in enumerate(news)
+        ]
+        statements = [(
+            "INSERT INTO news_items VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+            "title = excluded.title, link = excluded.link, last_seen = excluded.last_seen, rank = excluded.rank, "
+            "impact_score = excluded.impact_score, item = excluded.item",
+            rows,
+        )]
+        summary_at = None
+        if summary is not None:
+            text = json.dumps(summary)
+            latest = self._query("SELECT created_at, summary FROM summaries ORDER BY created_at DESC LIMIT 1")
+            if latest and latest[0][1] == text:
+                summary_at = latest[0][0]
+            else:
+                summary_at = fetched_at
+                statements.append((
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                    [(fetched_at, summary.get("sentiment"), summary.get("signal"), text)],
+                ))
+        statements.append((
+            "INSERT OR REPLACE INTO news_snapshots VALUES (?, ?, ?)",
+            [(fetched_at, json.dumps([row[0] for row in rows]), summary_at)],
+        ))
+        self._write(statements)
+
+    def latest_news_snapshot(self) -> Optional[Tuple[float, Dict[str, Any], bool]]:
+        """
+        (fetched_at, {"news", "summary"}, summary is current) of the last
+        stored refresh, or None. A refresh stored without a current summary
+        gets the newest one before it.
+        """
+        rows = self._query("SELECT fetched_at, keys, summary_at FROM news_snapshots ORDER BY fetched_at DESC LIMIT 1")
+        if not rows:
+            return None
+        fetched_at, keys, summary_at = rows[0]
+        keys = json.loads(keys)
+        items = dict(self._query(
+            f"SELECT key, item FROM news_items WHERE key IN ({', '.join('?' * len(keys))})", tuple(keys)
+        )) if keys else {}
+        news = [json.loads(items[key]) for key in keys if key in items]
+        summary = self._query(
+            "SELECT summary FROM summaries WHERE created_at <= ? ORDER BY created_at DESC LIMIT 1",
+            (summary_at if summary_at is not None else fetched_at,),
+        )
+        if not news or not summary:
+            return None
+        return fetched_at, {"news": news, "summary": json.loads(summary[0][0])}, summary_at is not None
+
+    def news_between(self, start: float = 0, end: Optional[float] = None, limit: int = 100,
+                     min_impact: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Stored news first seen in [start, end], newest first."""
+        sql = "SELECT first_seen, last_seen, item FROM news_items WHERE first_seen BETWEEN ? AND ?"
+        params = [start, end if end is not None else time.time()]
+        if min_impact is not None:
+            sql += " AND abs(impact_score) >= ?"
+            params.append(min_impact)
+        rows = self._query(sql + " ORDER BY first_seen DESC, rank LIMIT ?", tuple(params + [limit]))
+        return [{**json.loads(item), "first_seen": first, "last_seen": last} for first, last, item in rows]
+
+    def summaries_between(self, start: float = 0, end: Optional[float] = None,
+                          limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT created_at, summary FROM summaries WHERE created_at BETWEEN ? AND ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (start, end if end is not None else time.time(), limit),
+        )
+        return [{**json.loads(summary), "created_at": created_at} for created_at, summary in rows]
+
+    # Maintenance
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        cutoff = now - self.retention_seconds
+        with self._connect() as db:
+            db.execute("DELETE FROM price_snapshots WHERE fetched_at < ?", (cutoff,))
+            db.execute("DELETE FROM news_items WHERE last_seen < ?", (cutoff,))
+            db.execute("DELETE FROM news_snapshots WHERE fetched_at < ?", (cutoff,))
+            db.execute("DELETE FROM summaries WHERE created_at < ?", (cutoff,))
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {
+            table: self._query(f"SELECT count(*) FROM {table}")[0][0]
+            for table in ("price_snapshots", "news_items", "summaries")
+        }
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = 0
+        return {"path": str(self.path), "bytes": size, "rows": counts, "reads": self.reads,
+                "writes": self.writes, "retention_days": round(self.retention_seconds / 86400, 2)}
+
+
+_store: Optional[MarketStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MarketStore:
+    """Returns the process-wide store kept next to config.json."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from . import config_manager
+                try:
+                    retention = float(config_manager.get_api_key("STORE_RETENTION_DAYS") or DEFAULT_RETENTION_DAYS)
+                except ValueError:
+                    retention = DEFAULT_RETENTION_DAYS
+                _store = MarketStore(config_manager.get_config_dir() / "market.db", retention)
+    return _store
@@ -1,8 +1,48 @@
-import MetaTrader5 as mt5
 import logging
+import threading
+from datetime import datetime, timezone
+
+from . import startup
 
 logger = logging.getLogger(__name__)
 
+# The terminal module is imported on first use, not at startup
+_UNLOADED = object()
+mt5 = _UNLOADED
+_backend_lock = threading.Lock()
+# Set by connect()/disconnect(); lets callers skip the terminal when logged out
+_connected = False
+
+def use_backend(module):
+    """Swaps the terminal module (e.g. services.fake_mt5 for tests and benchmarks)."""
+    global mt5
+    mt5 = module
+
+def _load_backend():
+    from . import config_manager
+    if (config_manager.get_api_key("MT5_BACKEND") or "").lower() == "fake":
+        from . import fake_mt5
+        return fake_mt5
+    try:
+        with startup.lazy_load("MetaTrader5"):
+            import MetaTrader5
+        return MetaTrader5
+    except ImportError:  # MetaTrader5 only ships for Windows
+        return None
+
+def is_connected() -> bool:
+    """True after a successful connect() until disconnect()."""
+    return _connected
+
+def _terminal():
+    """The MetaTrader5 module (or fake backend), or None when unavailable."""
+    global mt5
+    if mt5 is _UNLOADED:
+        with _backend_lock:
+            if mt5 is _UNLOADED:
+                mt5 = _load_backend()
+    return mt5
+
 class MT5Service:
     @staticmethod
     def connect(login: int, password: str, server: str) -> tuple[bool, str]:
@@ -10,6 +50,10 @@ class MT5Service:
         Connect to a MetaTrader 5 account.
         Requires MT5 terminal to be installed and accessible.
         """
+        mt5 = _terminal()
+        if mt5 is None:
+            return False, "MetaTrader5 package is not installed (Windows only)."
+
         from . import config_manager
         terminal_path = config_manager.get_api_key("MT5_TERMINAL_PATH", fallback_env=False)
 
@@ -29,7 +73,9 @@ class MT5Service:
             return False, error_msg
             
         # Attempt to login
+        global _connected
         authorized = mt5.login(login, password=password, server=server)
+        _connected = bool(authorized)
         if authorized:
             logger.info(f"Connected to MT5 account {login} on {server}")
             return True, "Success"
@@ -44,6 +90,11 @@ class MT5Service:
         """
         Disconnect from MT5 terminal.
         """
+        global _connected
+        mt5 = _terminal()
+        if mt5 is None:
+            return False
+        _connected = False
         try:
             mt5.shutdown()
             logger.info("MT5 connection closed.")
@@ -57,6 +108,9 @@ class MT5Service:
         """
         Get the current account summary.
         """
+        mt5 = _terminal()
+        if mt5 is None:
+            return {}
         account_info = mt5.account_info()
         if account_info is None:
             logger.error(f"Failed to get account info, error code = {mt5.last_error()}")
@@ -70,6 +124,9 @@ class MT5Service:
         """
         Get all active positions.
         """
+        mt5 = _terminal()
+        if mt5 is None:
+            return []
         positions = mt5.positions_get()
         if positions is None:
             logger.error(f"Failed to get positions, error code = {mt5.last_error()}")
@@ -92,3 +149,72 @@ class MT5Service:
             })
             
         return result
+
+    @staticmethod
+    def _require_symbol(symbol: str):
+        mt5 = _terminal()
+        if mt5 is None:
+            raise RuntimeError("MetaTrader5 package is not installed (Windows only).")
+        if not mt5.symbol_select(symbol, True):
+            raise ValueError(f"Unknown symbol {symbol}: {mt5.last_error()}")
+
+    @staticmethod
+    def rates_ingest_plan(symbol: str, timeframe: str, date_from: int, date_to: int) -> tuple:
+        """
+        (store, fetch, start, end, window) for a candle ingest of [date_from,
+        date_to] (epoch seconds). Checks the symbol on the terminal, and
+        `fetch` must also run on the terminal's thread.
+        """
+        mt5 = _terminal()
+        from . import mt_history
+        MT5Service._require_symbol(symbol)
+        mt_timeframe = getattr(mt5, f"TIMEFRAME_{timeframe}")
+        step = mt_history.TIMEFRAMES[timeframe]
+
+        def fetch(start: int, end: int):
+            return mt5.copy_rates_range(symbol, mt_timeframe, _utc(start), _utc(end))
+
+        store = mt_history.get_rates_store(symbol, timeframe)
+        # Align to bar boundaries; a window spans one chunk's worth of bars but starts
+        # wherever the range (or a gap in what is stored) does, so it may straddle two chunk files
+        start = date_from // step * step
+        return store, fetch, start, date_to, step * mt_history.RATE_CHUNK_BARS
+
+    @staticmethod
+    def ticks_ingest_plan(symbol: str, date_from: int, date_to: int) -> tuple:
+        """(store, fetch, start, end, window) for a tick ingest, in milliseconds; see rates_ingest_plan."""
+        mt5 = _terminal()
+        from . import mt_history
+        MT5Service._require_symbol(symbol)
+
+        def fetch(start_ms: int, end_ms: int):
+            return mt5.copy_ticks_range(symbol, _utc(start_ms / 1000), _utc(end_ms / 1000), mt5.COPY_TICKS_ALL)
+
+        store = mt_history.get_ticks_store(symbol)
+        return store, fetch, date_from * 1000, date_to * 1000 + 999, mt_history.TICK_CHUNK_MS
+
+    @staticmethod
+    def ingest_rates(symbol: str, timeframe: str, date_from: int, date_to: int) -> dict:
+        """
+        Bulk-copies candles for [date_from, date_to] (epoch seconds) into the
+        local history store, fetching only the parts not stored yet.
+        """
+        from . import mt_history
+        result = mt_history.ingest(*MT5Service.rates_ingest_plan(symbol, timeframe, date_from, date_to))
+        logger.info(f"Ingested {result['rows']} {timeframe} bars for {symbol} in {result['requests']} requests")
+        return {"symbol": symbol, "timeframe": timeframe, **result}
+
+    @staticmethod
+    def ingest_ticks(symbol: str, date_from: int, date_to: int) -> dict:
+        """
+        Bulk-copies ticks for [date_from, date_to] (epoch seconds) into the
+        local history store, fetching only the parts not stored yet.
+        """
+        from . import mt_history
+        result = mt_history.ingest(*MT5Service.ticks_ingest_plan(symbol, date_from, date_to))
+        logger.info(f"Ingested {result['rows']} ticks for {symbol} in {result['requests']} requests")
+        return {"symbol": symbol, "timeframe": "ticks", **result}
+
+def _utc(seconds: float) -> datetime:
+    # The terminal expects UTC datetimes for range queries
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
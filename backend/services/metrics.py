@@ -0,0 +1,205 @@
+# In-process metrics in the Prometheus text format (served at /metrics).
+#
+# Kept dependency-free: a handful of labelled counters and histograms are all
+# the node needs. Route latencies come from MetricsMiddleware; upstream calls
+# (CoinGecko, Apify, Gemini, MT5) are wrapped with track(); cache and pool
+# state is collected from their stats() when /metrics is scraped.
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+# Seconds; spans a cached route (sub-millisecond) to a slow Apify scrape
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # labels -> [per-bucket counts..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve HTTP requests.", ("method", "route", "status"),
+)
+upstream_request_duration = Histogram(
+    "upstream_request_duration_seconds", "Time spent in calls to upstream services.",
+    ("upstream", "operation", "outcome"),
+)
+upstream_errors = Counter(
+    "upstream_errors_total", "Upstream calls that raised or returned an error status.", ("upstream", "operation"),
+)
+
+
+@contextmanager
+def track(upstream: str, operation: str) -> Iterator[None]:
+    """Times the block as one call to `upstream`; exceptions count as errors."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except (GeneratorExit, asyncio.CancelledError):
+        # The caller went away (closed stream, disconnected client)
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        upstream_errors.inc(upstream, operation)
+        raise
+    finally:
+        upstream_request_duration.observe(time.perf_counter() - started, upstream, operation, outcome)
+
+
+def record_error(upstream: str, operation: str):
+    """Counts a call that returned normally but failed (e.g. an HTTP 5xx)."""
+    upstream_errors.inc(upstream, operation)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request by method, route template
+    and status. WebSocket and lifespan traffic pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Templates (/api/history/{coin_id}) keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], path, str(status))
+
+
+def _gauge(name: str, help_text: str, label: str, values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for key, value in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{_escape(key)}"}} {_number(value)}')
+    return lines
+
+
+def _cache_lines(cache_stats: List[dict]) -> List[str]:
+    lines = []
+    for field, kind in (("hits", "counter"), ("misses", "counter")):
+        name = f"cache_{field}_total"
+        lines += [f"# HELP {name} Cache {field}.", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{_escape(s["name"])}"}} {s.get(field, 0)}' for s in cache_stats]
+    lines += _gauge("cache_hit_ratio", "Cache hits / lookups.", "cache",
+                    {s["name"]: s.get("hit_ratio", 0.0) for s in cache_stats})
+    lines += _gauge("cache_entries", "Entries currently cached.", "cache",
+                    {s["name"]: s.get("size", 0) for s in cache_stats})
+    return lines
+
+
+def _rate_limit_lines(limiter_stats: List[dict]) -> List[str]:
+    lines = _gauge("rate_limit_tokens", "Requests the provider budget allows right now.", "upstream",
+                   {s["name"]: s["tokens"] for s in limiter_stats})
+    lines += _gauge("rate_limit_waiting", "Calls queued for rate-limit budget.", "upstream",
+                    {s["name"]: sum(s["waiting"].values()) for s in limiter_stats})
+    lines += ["# HELP rate_limit_throttled_total Upstream 429s that paused the provider.",
+              "# TYPE rate_limit_throttled_total counter"]
+    lines += [f'rate_limit_throttled_total{{upstream="{_escape(s["name"])}"}} {s["throttled"]}'
+              for s in sorted(limiter_stats, key=lambda s: s["name"])]
+    return lines
+
+
+def render(cache_stats: List[dict], pool_stats: List[dict], limiter_stats: List[dict] = ()) -> str:
+    """Full exposition text, including point-in-time cache and pool state."""
+    lines = []
+    for metric in (http_request_duration, upstream_request_duration, upstream_errors):
+        lines += metric.render()
+    lines += _cache_lines(cache_stats)
+    pools = [p for p in pool_stats if "active" in p]
+    lines += _gauge("upstream_active", "Calls currently holding an upstream slot.", "upstream",
+                    {p["name"]: p["active"] for p in pools})
+    lines += _gauge("upstream_waiting", "Calls queued for an upstream slot.", "upstream",
+                    {p["name"]: p["waiting"] for p in pools})
+    lines += _rate_limit_lines(list(limiter_stats))
+    return "\n".join(lines) + "\n"
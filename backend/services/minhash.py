@@ -0,0 +1,55 @@
+# MinHash signatures and LSH banding for near-duplicate short texts.
+#
+# Used by the chat answer cache (repeated questions) and the news pipeline
+# (syndicated headlines). A signature is NUM_PERM minimums of hashed
+# character shingles; two signatures agree on a position with probability
+# equal to the Jaccard similarity of the shingle sets. Splitting a signature
+# into BANDS bands of ROWS values gives cheap candidate lookups: texts that
+# share any whole band are compared, everything else is skipped.
+import hashlib
+from typing import Iterable, Iterator, Tuple
+
+import numpy as np
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_rng = np.random.RandomState(20240517)
+_PERM_A = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.randint(0, 1 << 64, size=NUM_PERM, dtype=np.uint64)
+_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM values) of the text's character shingles."""
+    padded = f" {text} "
+    return signature_of({padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))})
+
+
+def signature_of(shingles: Iterable[str]) -> np.ndarray:
+    """MinHash signature of an explicit shingle set (e.g. the words of a headline)."""
+    shingles = set(shingles) or {""}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # One hash function per permutation: a * x + b (mod 2**64), then a splitmix64
+    # finalizer so the permutations are not just rescalings of each other
+    permuted = hashes[:, None] * _PERM_A[None, :] + _PERM_B[None, :]
+    permuted ^= permuted >> np.uint64(31)
+    permuted *= _MIX
+    permuted ^= permuted >> np.uint64(27)
+    return permuted.min(axis=0)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def bands(sig: np.ndarray) -> Iterator[Tuple[int, bytes]]:
+    """(band number, hashable band key) for each LSH band of a signature."""
+    for band in range(BANDS):
+        yield band, sig[band * ROWS:(band + 1) * ROWS].tobytes()
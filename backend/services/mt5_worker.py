@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from . import metrics
+from .metatrader_service import MT5Service
+
+logger = logging.getLogger(__name__)
+
+# How long the worker keeps collecting requests before serving a batch
+DEFAULT_TICK = 0.02
+
+_SNAPSHOT = object()
+
+
+class MT5Worker:
+    """
+    Actor that owns the MetaTrader5 terminal connection.
+
+    The MetaTrader5 module keeps global terminal state and is not safe to
+    call from several threads, so every terminal call is queued to this one
+    thread. Requests arriving within a tick are batched: commands (connect,
+    disconnect, ...) run in arrival order, then all snapshot reads queued in
+    the same tick share a single positions_get + account_info round-trip.
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK):
+        self.tick = tick
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = False
+        self.batches = 0
+        self.snapshots = 0
+        self.snapshot_requests = 0
+        self.commands = 0
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="mt5-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            thread = self._thread
+        self._queue.put(None)
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def submit(self, fn: Any, *args, **kwargs) -> Future:
+        """Queues a terminal call (or _SNAPSHOT) and returns a concurrent Future."""
+        self.start()
+        future: Future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    async def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn` (typically an MT5Service method) on the worker thread."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def ingest(self, plan: Callable[..., tuple], *args) -> Dict[str, Any]:
+        """
+        Runs a history ingest from MT5Service.*_ingest_plan with one queued
+        terminal request per window, so snapshots and commands are served in
+        between; the chunk files are written off this thread.
+        """
+        from . import mt_history
+        store, fetch, start, end, window = await self.call(plan, *args)
+        return await mt_history.aingest(store, lambda lo, hi: self.call(fetch, lo, hi), start, end, window)
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Positions and account info from one batched terminal round-trip."""
+        return await asyncio.wrap_future(self.submit(_SNAPSHOT))
+
+    def _drain(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.tick
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the main loop see the stop marker
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                if not self._running:
+                    break
+                continue
+
+            batch = self._drain(first)
+            self.batches += 1
+            readers = []
+            for fn, args, kwargs, future in batch:
+                if fn is _SNAPSHOT:
+                    readers.append(future)
+                    continue
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.commands += 1
+                try:
+                    with metrics.track("mt5", getattr(fn, "__name__", "call")):
+                        result = fn(*args, **kwargs)
+                    future.set_result(result)
+                except BaseException as e:
+                    future.set_exception(e)
+
+            readers = [f for f in readers if f.set_running_or_notify_cancel()]
+            if readers:
+                self.snapshot_requests += len(readers)
+                self.snapshots += 1
+                try:
+                    with metrics.track("mt5", "snapshot"):
+                        result = {
+                            "positions": MT5Service.get_positions(),
+                            "account": MT5Service.get_account_info(),
+                        }
+                except BaseException as e:
+                    logger.error(f"MT5 snapshot failed: {e}")
+                    for future in readers:
+                        future.set_exception(e)
+                else:
+                    for future in readers:
+                        future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": "mt5",
+            "running": self._running,
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "commands": self.commands,
+            "snapshots": self.snapshots,
+            "snapshot_requests": self.snapshot_requests,
+        }
+
+
+# Process-wide worker; the thread starts on first use
+worker = MT5Worker()
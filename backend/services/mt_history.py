@@ -0,0 +1,319 @@
+import asyncio
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Supported candle timeframes and their length in seconds
+TIMEFRAMES = {
+    "M1": 60,
+    "M5": 300,
+    "M15": 900,
+    "M30": 1800,
+    "H1": 3600,
+    "H4": 14400,
+    "D1": 86400,
+}
+
+# Same layouts the MetaTrader5 module returns from copy_rates_* / copy_ticks_*
+RATE_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+TICK_DTYPE = np.dtype([
+    ("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+    ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8"),
+])
+
+# Broker symbols: letters, digits and the suffix marks brokers use (EURUSD.m, US30.cash, #AAPL, BTCUSD+)
+_SYMBOL = re.compile(r"^[A-Za-z0-9_.#+!-]{1,64}$")
+
+# Bars per rate chunk file, and milliseconds of ticks per tick chunk file
+RATE_CHUNK_BARS = 10000
+TICK_CHUNK_MS = 3600 * 1000
+
+
+class ChunkedArray:
+    """
+    Time-sorted structured array stored as fixed-span .npy chunk files.
+
+    Chunk files are named after the start of their span (in units of
+    `time_field`), so a range read only opens the chunks it overlaps and an
+    ingest only rewrites the chunks it touches. coverage.json records the
+    ranges already fetched, so an ingest only asks the terminal for the gaps.
+    """
+
+    def __init__(self, directory: Path, dtype: np.dtype, time_field: str, chunk_span: int):
+        self.directory = directory
+        self.dtype = dtype
+        self.time_field = time_field
+        self.chunk_span = chunk_span
+        self._lock = threading.Lock()
+
+    def _path(self, chunk: int) -> Path:
+        return self.directory / f"{chunk}.npy"
+
+    def chunks(self) -> List[int]:
+        return sorted(int(p.stem) for p in self.directory.glob("*.npy") if p.stem.lstrip("-").isdigit())
+
+    def _load(self, chunk: int) -> np.ndarray:
+        try:
+            return np.load(self._path(chunk))
+        except (OSError, ValueError):
+            return np.empty(0, dtype=self.dtype)
+
+    def first_time(self) -> Optional[int]:
+        for chunk in self.chunks():
+            rows = self._load(chunk)
+            if len(rows):
+                return int(rows[self.time_field][0])
+        return None
+
+    def last_time(self) -> Optional[int]:
+        for chunk in reversed(self.chunks()):
+            rows = self._load(chunk)
+            if len(rows):
+                return int(rows[self.time_field][-1])
+        return None
+
+    def covered(self) -> List[Tuple[int, int]]:
+        """
+        Sorted, disjoint [lo, hi] ranges already fetched, including stretches
+        where the terminal had no data. A store written before coverage was
+        recorded counts as covered from its first row to just before its last.
+        """
+        try:
+            with open(self.directory / "coverage.json", "r", encoding="utf-8") as f:
+                return [(int(lo), int(hi)) for lo, hi in json.load(f)]
+        except (OSError, ValueError):
+            first, last = self.first_time(), self.last_time()
+            return [(first, last - 1)] if first is not None and first < last else []
+
+    def mark_covered(self, lo: int, hi: int):
+        if hi < lo:
+            return
+        with self._lock:
+            merged: List[Tuple[int, int]] = []
+            for a, b in sorted(self.covered() + [(lo, hi)]):
+                if merged and a <= merged[-1][1] + 1:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+                else:
+                    merged.append((a, b))
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.directory / "coverage.json.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f)
+            os.replace(tmp_path, self.directory / "coverage.json")
+
+    def write(self, rows: np.ndarray) -> int:
+        """
+        Merges rows into their chunks. Stored rows inside the new rows' time
+        range are replaced (so a re-fetched, still-forming bar wins).
+        Returns the number of rows written.
+        """
+        if len(rows) == 0:
+            return 0
+        rows = np.sort(rows.astype(self.dtype), order=self.time_field, kind="stable")
+        times = rows[self.time_field]
+        lo, hi = times[0], times[-1]
+        ids = times // self.chunk_span * self.chunk_span
+        starts = np.flatnonzero(np.append(True, ids[1:] != ids[:-1]))
+        bounds = np.append(starts, len(rows))
+
+        with self._lock:
+            # Created on first write: reads of unknown symbols leave no trace on disk
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for i, chunk in enumerate(ids[starts]):
+                new = rows[bounds[i]:bounds[i + 1]]
+                stored = self._load(int(chunk))
+                stored_times = stored[self.time_field]
+                kept = stored[(stored_times < lo) | (stored_times > hi)]
+                merged = np.concatenate([kept, new])
+                merged = merged[np.argsort(merged[self.time_field], kind="stable")]
+                tmp_path = self.directory / f"{int(chunk)}.tmp.npy"
+                np.save(tmp_path, merged)
+                os.replace(tmp_path, self._path(int(chunk)))
+        return len(rows)
+
+    def read(self, start: Optional[int] = None, end: Optional[int] = None,
+             limit: Optional[int] = None) -> np.ndarray:
+        """Rows with start <= time <= end, oldest first, at most `limit` of them."""
+        parts = []
+        count = 0
+        for chunk in self.chunks():
+            if start is not None and chunk + self.chunk_span <= start:
+                continue
+            if end is not None and chunk > end:
+                break
+            rows = self._load(chunk)
+            times = rows[self.time_field]
+            lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+            hi = len(rows) if end is None else int(np.searchsorted(times, end, side="right"))
+            if limit is not None:
+                hi = min(hi, lo + limit - count)
+            if hi > lo:
+                parts.append(rows[lo:hi])
+                count += hi - lo
+            if limit is not None and count >= limit:
+                break
+        return np.concatenate(parts) if parts else np.empty(0, dtype=self.dtype)
+
+
+def _gaps(store: ChunkedArray, start: int, end: int) -> List[Tuple[int, int]]:
+    """The parts of [start, end] not covered yet, oldest first."""
+    gaps = []
+    cursor = start
+    for lo, hi in store.covered():
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - 1))
+        cursor = max(cursor, hi + 1)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _windows(gaps: List[Tuple[int, int]], window: int):
+    for lo, hi in gaps:
+        cursor = lo
+        while cursor <= hi:
+            yield cursor, min(cursor + window - 1, hi)
+            cursor += window
+
+
+def _store_window(store: ChunkedArray, data: np.ndarray, cover_from: int, hi: int,
+                  last: Optional[int]) -> Tuple[int, Optional[int], int]:
+    """
+    Writes one fetched window and marks [cover_from, hi] covered. Returns
+    (rows written, newest stored time, start of what is still uncovered).
+    """
+    rows = store.write(data)
+    if len(data):
+        newest = int(data[store.time_field].max())
+        last = newest if last is None else max(last, newest)
+    # The newest stored row may still be forming (an open bar), and nothing past it
+    # is known to be final, so that part stays uncovered unless a later window follows
+    upto = hi if last is None or hi < last else last - 1
+    if last is not None:
+        store.mark_covered(cover_from, upto)
+    else:
+        upto = cover_from - 1
+    return rows, last, upto + 1
+
+
+def _result(start: int, end: int, gaps: List[Tuple[int, int]], rows: int, requests: int) -> Dict[str, Any]:
+    return {"from": start, "resumed_from": gaps[0][0] if gaps else None, "to": end,
+            "rows": rows, "requests": requests}
+
+
+def ingest(store: ChunkedArray, fetch: Callable[[int, int], Optional[np.ndarray]],
+           start: int, end: int, window: int) -> Dict[str, Any]:
+    """
+    Pulls the uncovered parts of [start, end] through `fetch(window_start,
+    window_end)` in windows of `window` units and writes each one as it
+    arrives, so a re-run (or an older backfill) only fetches what is missing.
+    """
+    gaps = _gaps(store, start, end)
+    last = store.last_time()
+    rows = 0
+    requests = 0
+    uncovered, prev_hi = None, None
+    for lo, hi in _windows(gaps, window):
+        data = fetch(lo, hi)
+        requests += 1
+        if data is None:
+            raise RuntimeError(f"terminal returned no data for [{lo}, {hi}]")
+        # What the previous window left uncovered is final once the next one is fetched
+        cover_from = uncovered if prev_hi == lo - 1 else lo
+        written, last, uncovered = _store_window(store, data, cover_from, hi, last)
+        rows += written
+        prev_hi = hi
+    return _result(start, end, gaps, rows, requests)
+
+
+async def aingest(store: ChunkedArray, fetch: Callable[[int, int], Awaitable[Optional[np.ndarray]]],
+                  start: int, end: int, window: int) -> Dict[str, Any]:
+    """
+    ingest() with an async `fetch` (one queued terminal request per window)
+    and the chunk reads and writes in a worker thread, so neither the event
+    loop nor the terminal thread is held for the whole run.
+    """
+    gaps, last = await asyncio.to_thread(lambda: (_gaps(store, start, end), store.last_time()))
+    rows = 0
+    requests = 0
+    uncovered, prev_hi = None, None
+    for lo, hi in _windows(gaps, window):
+        data = await fetch(lo, hi)
+        requests += 1
+        if data is None:
+            raise RuntimeError(f"terminal returned no data for [{lo}, {hi}]")
+        cover_from = uncovered if prev_hi == lo - 1 else lo
+        written, last, uncovered = await asyncio.to_thread(_store_window, store, data, cover_from, hi, last)
+        rows += written
+        prev_hi = hi
+    return _result(start, end, gaps, rows, requests)
+
+
+_stores: Dict[Tuple[str, str], ChunkedArray] = {}
+_stores_lock = threading.Lock()
+
+
+def valid_symbol(symbol: str) -> bool:
+    """True for names shaped like a broker symbol; anything else never reaches the disk."""
+    return bool(_SYMBOL.match(symbol)) and symbol not in (".", "..")
+
+
+def _safe_name(value: str) -> str:
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", value)
+    if name in ("", ".", ".."):
+        raise ValueError(f"Invalid name {value!r}")
+    return name
+
+
+def _get_store(symbol: str, kind: str, dtype: np.dtype, time_field: str, chunk_span: int) -> ChunkedArray:
+    if not valid_symbol(symbol):
+        raise ValueError(f"Invalid symbol {symbol!r}")
+    key = (symbol, kind)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                from . import config_manager
+                directory = config_manager.get_config_dir() / "mt5_history" / _safe_name(symbol) / kind
+                store = _stores[key] = ChunkedArray(directory, dtype, time_field, chunk_span)
+    return store
+
+
+def get_rates_store(symbol: str, timeframe: str) -> ChunkedArray:
+    """Candles for a symbol/timeframe under <config dir>/mt5_history/, keyed by bar time (seconds)."""
+    return _get_store(symbol, timeframe, RATE_DTYPE, "time", TIMEFRAMES[timeframe] * RATE_CHUNK_BARS)
+
+
+def get_ticks_store(symbol: str) -> ChunkedArray:
+    """Ticks for a symbol under <config dir>/mt5_history/, keyed by time_msc (milliseconds)."""
+    return _get_store(symbol, "ticks", TICK_DTYPE, "time_msc", TICK_CHUNK_MS)
+
+
+def candles_page(symbol: str, timeframe: str, start: Optional[int] = None, end: Optional[int] = None,
+                 limit: int = 500) -> Dict[str, Any]:
+    """
+    One page of stored candles (times in epoch seconds). `next` is the
+    `start` to pass for the following page, or None on the last page.
+    """
+    rows = get_rates_store(symbol, timeframe).read(start, end, limit + 1)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "candles": {name: rows[name].tolist() for name in ("time", "open", "high", "low", "close", "tick_volume")},
+        "next": int(rows["time"][-1]) + 1 if more else None,
+    }
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from . import mt5_worker
+
+logger = logging.getLogger(__name__)
+
+# Fields that change while a position is open (qty changes on partial close)
+POSITION_LIVE_FIELDS = ("qty", "currentPrice", "pnl")
+ACCOUNT_FIELDS = ("balance", "equity", "profit")
+
+
+def account_summary(info: Optional[dict]) -> Dict[str, Any]:
+    info = info or {}
+    return {field: info.get(field, 0) for field in ACCOUNT_FIELDS}
+
+
+def diff_positions(old: Dict[str, dict], new: Dict[str, dict]) -> Dict[str, Any]:
+    """
+    Per-ticket diff between two {id: position} maps.
+    Returns opened positions, closed ids and only the changed live fields.
+    """
+    opened = [pos for pid, pos in new.items() if pid not in old]
+    closed = [pid for pid in old if pid not in new]
+    changed = []
+    for pid, pos in new.items():
+        prev = old.get(pid)
+        if prev is None:
+            continue
+        delta = {f: pos[f] for f in POSITION_LIVE_FIELDS if pos.get(f) != prev.get(f)}
+        if delta:
+            delta["id"] = pid
+            changed.append(delta)
+    return {"opened": opened, "closed": closed, "changed": changed}
+
+
+class PositionStream:
+    """
+    Polls the MT5 terminal once per `interval` while at least one WebSocket
+    client is subscribed, and pushes only what changed to every client.
+
+    New subscribers get a full "snapshot" message; afterwards they receive
+    "diff" messages with opened/closed/changed positions and, when it moved,
+    the account summary.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._clients = set()
+        self._positions: Dict[str, dict] = {}
+        self._account: Dict[str, Any] = account_summary(None)
+        self._task: Optional[asyncio.Task] = None
+        self._primed = False
+
+    def _snapshot_message(self) -> Dict[str, Any]:
+        return {"type": "snapshot", "positions": list(self._positions.values()), **self._account}
+
+    async def _poll(self):
+        snapshot = await mt5_worker.worker.snapshot()
+        positions: List[dict] = snapshot["positions"]
+        return {p["id"]: p for p in positions}, account_summary(snapshot["account"])
+
+    async def subscribe(self, websocket):
+        if not self._primed:
+            self._positions, self._account = await self._poll()
+            self._primed = True
+        self._clients.add(websocket)
+        await websocket.send_json(self._snapshot_message())
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def unsubscribe(self, websocket):
+        self._clients.discard(websocket)
+
+    async def _broadcast(self, message: Dict[str, Any]):
+        clients = list(self._clients)
+        results = await asyncio.gather(*(ws.send_json(message) for ws in clients), return_exceptions=True)
+        for ws, result in zip(clients, results):
+            if isinstance(result, Exception):
+                self._clients.discard(ws)
+
+    async def _run(self):
+        try:
+            while self._clients:
+                await asyncio.sleep(self.interval)
+                if not self._clients:
+                    break
+                try:
+                    positions, account = await self._poll()
+                except Exception as e:
+                    logger.error(f"MT5 stream poll failed: {e}")
+                    continue
+
+                message = diff_positions(self._positions, positions)
+                if account != self._account:
+                    message["account"] = account
+                self._positions, self._account = positions, account
+
+                if message["opened"] or message["closed"] or message["changed"] or "account" in message:
+                    message["type"] = "diff"
+                    await self._broadcast(message)
+        finally:
+            # Next subscriber re-primes from a fresh poll
+            self._primed = False
@@ -0,0 +1,109 @@
+# Near-duplicate headline clustering for the news pipeline.
+#
+# Search results often carry one story several times ("Fed holds rates
+# steady - Reuters", "Fed Holds Rates Steady, Signals Cuts | CNBC"). Each
+# copy used to take an enrichment slot and a Gemini call. Headlines are
+# compared as word sets: MinHash signatures bucketed by LSH band find the
+# candidate pairs, and the exact word overlap confirms them. Only the first
+# (highest-ranked) headline of each cluster moves on, carrying every
+# outlet's copy in its "sources".
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import minhash
+
+# Share of words (Jaccard) two headlines must have in common to count as one story.
+# Syndicated copies differ by an outlet suffix or a word or two, while
+# "ECB cuts as markets weigh outlook" and "Apple cuts as ..." differ only in
+# the word that matters, so the bar is high and words, not characters, count.
+SIMILARITY_THRESHOLD = 0.75
+
+# "Headline - Outlet" / "Headline | Outlet"
+_OUTLET_SUFFIX = re.compile(r"\s+[-|–—:]\s+([^-|–—:]{2,40})$")
+
+
+@lru_cache(maxsize=4096)
+def split_outlet(title: str) -> Tuple[str, Optional[str]]:
+    """Splits a trailing outlet name off a headline."""
+    match = _OUTLET_SUFFIX.search(title)
+    if match and len(title) - len(match.group(0)) >= 20:
+        return title[:match.start()], match.group(1).strip()
+    return title, None
+
+
+@lru_cache(maxsize=4096)
+def _words(title: str) -> FrozenSet[str]:
+    headline, _ = split_outlet(title)
+    return frozenset(re.findall(r"[a-z0-9$%]+", headline.lower()))
+
+
+@lru_cache(maxsize=4096)
+def _band_keys(words: FrozenSet[str]) -> Tuple[Tuple[int, bytes], ...]:
+    # Stories stay in the results for several refreshes, so most signatures are reused
+    return tuple(minhash.bands(minhash.signature_of(words)))
+
+
+def _outlet(item: Dict[str, Any]) -> str:
+    _, outlet = split_outlet(item.get("title") or "")
+    if outlet:
+        return outlet
+    host = urlparse(item.get("link") or "").netloc
+    return host[4:] if host.startswith("www.") else host or item.get("source") or "Unknown"
+
+
+def cluster(titles: List[str], threshold: float = SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """
+    Groups near-duplicate titles. Returns clusters of indexes, each sorted,
+    ordered by their first member.
+    """
+    return [list(members) for members in _cluster(tuple(titles), threshold)]
+
+
+@lru_cache(maxsize=64)
+def _cluster(titles: Tuple[str, ...], threshold: float) -> Tuple[Tuple[int, ...], ...]:
+    # Between refreshes the scraped page is usually unchanged, so the same titles come back
+    parent = list(range(len(titles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    words = [_words(title) for title in titles]
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for i, title_words in enumerate(words):
+        if not title_words:
+            continue
+        for key in _band_keys(title_words):
+            for j in buckets.get(key, ()):
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    continue
+                if len(title_words & words[j]) / len(title_words | words[j]) >= threshold:
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+            buckets.setdefault(key, []).append(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(titles)):
+        clusters.setdefault(find(i), []).append(i)
+    return tuple(tuple(members) for members in sorted(clusters.values(), key=lambda members: members[0]))
+
+
+def dedupe(news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One item per story, in the original order. Each keeps the fields of its
+    highest-ranked copy and gets "sources": [{title, link, source}] for
+    every copy, itself included.
+    """
+    deduped = []
+    for members in cluster([item.get("title") or "" for item in news_items]):
+        representative = dict(news_items[members[0]])
+        representative["sources"] = [
+            {"title": news_items[i].get("title"), "link": news_items[i].get("link"), "source": _outlet(news_items[i])}
+            for i in members
+        ]
+        deduped.append(representative)
+    return deduped
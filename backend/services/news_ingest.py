@@ -0,0 +1,213 @@
+# Incremental news ingestion.
+#
+# Every refresh scrapes the same result page, and most of it was on the
+# previous page too. Items are fingerprinted by canonical URL and by
+# normalized title, and a bounded, expiring seen-set filters out everything
+# already ingested. Only new stories go on to enrichment and summarization;
+# a new outlet's copy of a story already in the window is merged into that
+# story's "sources" instead. Stories live in a rolling window (newest first,
+# capped by count and age) that the news snapshot is built from.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from . import news_dedup
+from .analysis_cache import normalize_headline
+
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_WINDOW_AGE = 24 * 3600
+DEFAULT_SEEN_SIZE = 5000
+DEFAULT_SEEN_TTL = 48 * 3600
+
+# Query parameters that vary per click, not per article
+_TRACKING_PARAMS = ("utm_", "ref", "fbclid", "gclid", "guccounter", "ocid", "cmpid")
+
+
+def canonical_url(url: str) -> str:
+    """Lowercased host, no www., fragment, tracking parameters or trailing slash."""
+    parts = urlsplit((url or "").strip())
+    host = parts.netloc.lower()
+    host = host[4:] if host.startswith("www.") else host
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(_TRACKING_PARAMS)]
+    return urlunsplit(("", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def fingerprints(item: Dict[str, Any]) -> List[str]:
+    """
+    [URL, title] fingerprints of a news item. A seen URL means the item is
+    seen; a seen title at a new URL can only add a source to a story.
+    """
+    result = []
+    if item.get("link"):
+        result.append("u:" + hashlib.sha1(canonical_url(item["link"]).encode("utf-8")).hexdigest())
+    headline, _ = news_dedup.split_outlet(item.get("title") or "")
+    title = normalize_headline(headline)
+    if title:
+        result.append("t:" + hashlib.sha1(title.encode("utf-8")).hexdigest())
+    return result
+
+
+class SeenSet:
+    """Fingerprints with a time-to-live, LRU-capped at `max_size`."""
+
+    def __init__(self, max_size: int = DEFAULT_SEEN_SIZE, ttl: float = DEFAULT_SEEN_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def __contains__(self, fingerprint: str) -> bool:
+        seen_at = self._seen.get(fingerprint)
+        return seen_at is not None and time.time() - seen_at < self.ttl
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def add(self, fingerprint: str, seen_at: Optional[float] = None):
+        self._seen[fingerprint] = seen_at or time.time()
+        self._seen.move_to_end(fingerprint)
+
+    def expire(self):
+        cutoff = time.time() - self.ttl
+        while self._seen and next(iter(self._seen.values())) < cutoff:
+            self._seen.popitem(last=False)
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+
+
+class NewsIngestor:
+    """
+    Splits each scraped page into new stories (returned for enrichment) and
+    already-seen items (skipped), and keeps the rolling window of stories.
+    """
+
+    def __init__(self, window_size: int = DEFAULT_WINDOW_SIZE, window_age: float = DEFAULT_WINDOW_AGE,
+                 seen: Optional[SeenSet] = None):
+        self.window_size = window_size
+        self.window_age = window_age
+        self.seen = seen or SeenSet()
+        self._window: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.new_items = 0
+        self.merged_items = 0
+        self.skipped_items = 0
+        self.last_new = 0
+
+    def _mark_seen(self, items: List[Dict[str, Any]], seen_at: Optional[float] = None):
+        for item in items:
+            for p in fingerprints(item):
+                self.seen.add(p, seen_at)
+
+    def ingest(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        New stories in `items`, one per cluster of near-duplicates, with
+        "sources". Seen items are dropped; new copies of stories already in
+        the window (including seen headlines at new URLs) are added to their
+        sources. New stories only count as seen once add() takes them, so a
+        story whose enrichment failed comes back on the next page.
+        """
+        with self._lock:
+            self.pages += 1
+            self.seen.expire()
+            fresh, known = [], set()
+            for item in items:
+                prints = fingerprints(item)
+                if not prints or prints[0] in self.seen or all(p in self.seen for p in prints):
+                    self.skipped_items += 1
+                    continue
+                if any(p in self.seen for p in prints):
+                    # A seen headline at a new URL: at most another source, never a new story
+                    known.add(len(fresh))
+                fresh.append(item)
+
+            # One cluster pass over the window and the fresh items together
+            window = self._window
+            clusters = news_dedup.cluster([s.get("title") or "" for s in window + fresh])
+            stories = []
+            for members in clusters:
+                copies = [fresh[i - len(window)] for i in members if i >= len(window)]
+                if not copies:
+                    continue
+                if members[0] < len(window):
+                    # A new outlet for a story we already have
+                    sources = window[members[0]].setdefault("sources", [])
+                    sources += news_dedup.dedupe(copies)[0]["sources"]
+                    self._mark_seen(copies)
+                    self.merged_items += len(copies)
+                    continue
+                if all(i - len(window) in known for i in members):
+                    self._mark_seen(copies)
+                    self.skipped_items += len(copies)
+                    continue
+                for story in news_dedup.dedupe(copies):
+                    stories.append(story)
+            self.new_items += len(stories)
+            self.last_new = len(stories)
+            return stories
+
+    def add(self, stories: List[Dict[str, Any]], ingested_at: Optional[float] = None):
+        """Marks enriched new stories (every source) as seen and puts them at the front of the window."""
+        ingested_at = ingested_at or time.time()
+        with self._lock:
+            for story in stories:
+                story.setdefault("ingested_at", ingested_at)
+                self._mark_seen(story.get("sources") or [story], story["ingested_at"])
+            cutoff = time.time() - self.window_age
+            window = list(stories) + self._window
+            self._window = [s for s in window if s.get("ingested_at", ingested_at) >= cutoff][:self.window_size]
+
+    def restore(self, stories: List[Dict[str, Any]], ingested_at: float):
+        """Reloads a persisted window (newest first) and marks its items as seen."""
+        with self._lock:
+            for story in stories:
+                story.setdefault("ingested_at", ingested_at)
+                self._mark_seen(story.get("sources") or [story], story["ingested_at"])
+            self._window = list(stories)[:self.window_size]
+
+    def window(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            # Sources lists are extended by later refreshes; readers get their own
+            return [{**story, "sources": list(story["sources"])} if "sources" in story else dict(story)
+                    for story in self._window]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window": len(self._window),
+                "window_size": self.window_size,
+                "seen": len(self.seen),
+                "pages": self.pages,
+                "new_items": self.new_items,
+                "merged_items": self.merged_items,
+                "skipped_items": self.skipped_items,
+                "last_new": self.last_new,
+            }
+
+
+_ingestor: Optional[NewsIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def _config_float(name: str, default: float) -> float:
+    from . import config_manager
+    try:
+        return float(config_manager.get_api_key(name) or default)
+    except ValueError:
+        return default
+
+
+def get_ingestor() -> NewsIngestor:
+    """Returns the process-wide ingestor (NEWS_WINDOW_SIZE, NEWS_WINDOW_HOURS, NEWS_SEEN_TTL in config)."""
+    global _ingestor
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                _ingestor = NewsIngestor(
+                    window_size=int(_config_float("NEWS_WINDOW_SIZE", DEFAULT_WINDOW_SIZE)),
+                    window_age=_config_float("NEWS_WINDOW_HOURS", DEFAULT_WINDOW_AGE / 3600) * 3600,
+                    seen=SeenSet(ttl=_config_float("NEWS_SEEN_TTL", DEFAULT_SEEN_TTL)),
+                )
+    return _ingestor
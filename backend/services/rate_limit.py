@@ -0,0 +1,269 @@
+# Per-provider request budgets.
+#
+# Each provider gets a token bucket sized to its quota (CoinGecko's free tier,
+# the Gemini RPM limit, ...). Callers that find the bucket empty queue by
+# priority, so interactive requests (chat, charts) are served before
+# background refreshes. A 429 pauses the whole bucket for the Retry-After
+# period instead of letting every caller hammer the provider.
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, Optional
+
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", NORMAL: "normal", BACKGROUND: "background"}
+
+# (requests per minute, burst). Override with RATE_LIMIT_<NAME>="per_minute[/burst]".
+DEFAULT_RATES = {
+    "coingecko": (25, 5),   # free tier allows ~30/min
+    "gemini": (15, 4),      # free-tier RPM for flash models
+    "apify": (30, 2),
+}
+
+MAX_RETRIES = 2
+BACKOFF_BASE = 2.0
+MAX_BACKOFF = 60.0
+
+# Requests made outside an explicit priority() block count as interactive:
+# they come from a route handler someone is waiting on.
+_priority: contextvars.ContextVar = contextvars.ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    """Runs the block (and threads/tasks that copy its context) at `level`."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait after a throttled attempt: Retry-After if given, else exponential."""
+    if retry_after:
+        try:
+            return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(MAX_BACKOFF, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(MAX_BACKOFF, BACKOFF_BASE * 2 ** attempt)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for SDK errors that mean "quota exceeded" (e.g. google.api_core ResourceExhausted)."""
+    return getattr(error, "code", None) == 429 or type(error).__name__ == "ResourceExhausted"
+
+
+class _Waiter:
+    __slots__ = ("level", "grant", "granted", "cancelled", "queued_at")
+
+    def __init__(self, level: int, grant):
+        self.level = level
+        self.grant = grant
+        self.granted = False
+        self.cancelled = False
+        self.queued_at = time.monotonic()
+
+
+class RateLimiter:
+    """
+    Token bucket with a priority queue. acquire() blocks a thread,
+    aacquire() suspends a coroutine; both are served from the same queue.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+        self.granted = {level: 0 for level in PRIORITY_NAMES}
+        self.queued = {level: 0 for level in PRIORITY_NAMES}
+        self.total_wait = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.burst), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, waiter: Optional[_Waiter], level: int, now: float):
+        self.tokens -= 1
+        self.granted[level] += 1
+        if waiter is not None:
+            self.total_wait += now - waiter.queued_at
+
+    def _dispatch(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        self._refill(now)
+        while self._heap:
+            waiter = self._heap[0][2]
+            if waiter.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            if now < self._blocked_until or self.tokens < 1:
+                break
+            heapq.heappop(self._heap)
+            self._take(waiter, waiter.level, now)
+            waiter.granted = True
+            waiter.grant()
+        if any(not entry[2].cancelled for entry in self._heap):
+            delay = max(self._blocked_until - now, (1 - self.tokens) / self.rate if self.rate else 1.0)
+            self._schedule(max(delay, 0.001))
+
+    def _schedule(self, delay: float):
+        due = time.monotonic() + delay
+        if self._timer is not None and self._timer_due <= due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer_due = due
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _try_now(self, level: int) -> bool:
+        # Caller holds the lock. Only take a token directly when nobody is queued.
+        now = time.monotonic()
+        self._refill(now)
+        if not self._heap and now >= self._blocked_until and self.tokens >= 1:
+            self._take(None, level, now)
+            return True
+        return False
+
+    def _enqueue(self, level: int, grant) -> _Waiter:
+        waiter = _Waiter(level, grant)
+        self.queued[level] += 1
+        heapq.heappush(self._heap, (level, next(self._seq), waiter))
+        self._dispatch()
+        return waiter
+
+    def acquire(self, level: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """Blocks until a request may be sent. Returns the seconds spent waiting."""
+        level = current_priority() if level is None else level
+        started = time.monotonic()
+        granted = threading.Event()
+        with self._lock:
+            if self._try_now(level):
+                return 0.0
+            waiter = self._enqueue(level, granted.set)
+        if not granted.wait(timeout):
+            with self._lock:
+                if not granted.is_set():
+                    waiter.cancelled = True
+                    raise TimeoutError(f"{self.name} rate limit: no budget within {timeout}s")
+        return time.monotonic() - started
+
+    async def aacquire(self, level: Optional[int] = None) -> float:
+        """Async counterpart of acquire()."""
+        level = current_priority() if level is None else level
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if not future.done():
+                future.set_result(None)
+
+        with self._lock:
+            if self._try_now(level):
+                return 0.0
+            waiter = self._enqueue(level, lambda: loop.call_soon_threadsafe(resolve))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self.tokens += 1  # granted but never used
+                    self._dispatch()
+                else:
+                    waiter.cancelled = True
+            raise
+        return time.monotonic() - started
+
+    def backoff(self, seconds: float):
+        """Pauses the bucket (e.g. after a 429) for at least `seconds`."""
+        with self._lock:
+            self.throttled += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            waiting = {PRIORITY_NAMES[level]: 0 for level in PRIORITY_NAMES}
+            for level, _, waiter in self._heap:
+                if not waiter.cancelled:
+                    waiting[PRIORITY_NAMES[level]] += 1
+            granted = sum(self.granted.values())
+            return {
+                "name": self.name,
+                "per_minute": round(self.rate * 60, 2),
+                "burst": self.burst,
+                "tokens": round(self.tokens, 2),
+                "budget_used": round(1 - self.tokens / self.burst, 3),
+                "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+                "waiting": waiting,
+                "granted": {PRIORITY_NAMES[level]: n for level, n in self.granted.items()},
+                "throttled": self.throttled,
+                "avg_wait_ms": round(self.total_wait / granted * 1000, 2) if granted else 0.0,
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _rate_for(name: str):
+    from . import config_manager
+    per_minute, burst = DEFAULT_RATES.get(name, (60, 5))
+    override = config_manager.get_api_key(f"RATE_LIMIT_{name.upper()}")
+    if override:
+        try:
+            parts = str(override).split("/")
+            per_minute = float(parts[0])
+            if len(parts) > 1:
+                burst = int(parts[1])
+        except ValueError:
+            print(f"Invalid RATE_LIMIT_{name.upper()}={override!r}, using default.")
+    return per_minute, burst
+
+
+def get_limiter(name: str) -> RateLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = RateLimiter(name, *_rate_for(name))
+    return limiter
+
+
+def stats():
+    return [get_limiter(name).stats() for name in sorted(set(DEFAULT_RATES) | set(_limiters))]
@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class Snapshot:
+    """An immutable, versioned result of one refresh run."""
+
+    def __init__(self, version: int, data: Any, updated_at: float):
+        self.version = version
+        self.data = data
+        self.updated_at = updated_at
+
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+
+class BackgroundRefresher:
+    """
+    Runs `loader` on a daemon thread every `interval` seconds and keeps the
+    latest successful result as a Snapshot (stale-while-revalidate).
+
+    Readers never wait for a refresh once a snapshot exists: a snapshot older
+    than `stale_after` is still returned, and a revalidation is triggered in
+    the background. If the loader raises, the previous snapshot is kept.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any], interval: float,
+                 stale_after: Optional[float] = None):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval
+        self.last_error: Optional[str] = None
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self._refreshing = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._ready = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def seed(self, data: Any, updated_at: float):
+        """
+        Installs a previously persisted result as the first snapshot. If it
+        is younger than `interval`, the first refresh waits until it is due.
+        """
+        with self._ready:
+            if self._snapshot is not None:
+                return
+            self._version += 1
+            self._snapshot = Snapshot(self._version, data, updated_at)
+            self._ready.notify_all()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"refresher-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """Requests a refresh without waiting for it (no-op while one is running)."""
+        if not self._refreshing:
+            self._wake.set()
+
+    def _run(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age() < self.interval:
+            self._wake.wait(self.interval - snapshot.age())
+        while not self._stop.is_set():
+            self._refreshing = True
+            self._wake.clear()
+            try:
+                self._refresh_once()
+            finally:
+                self._refreshing = False
+            self._wake.wait(self.interval)
+
+    def _refresh_once(self):
+        started = time.time()
+        try:
+            data = self.loader()
+        except Exception as e:
+            print(f"[{self.name}] refresh failed, keeping previous snapshot: {e}")
+            with self._ready:
+                self.last_error = str(e)
+                self._ready.notify_all()
+            return
+
+        with self._ready:
+            self._version += 1
+            self._snapshot = Snapshot(self._version, data, time.time())
+            self.last_error = None
+            self._ready.notify_all()
+        print(f"[{self.name}] snapshot v{self._version} refreshed in {time.time() - started:.1f}s")
+
+    def is_stale(self, snapshot: Snapshot) -> bool:
+        return snapshot.age() > self.stale_after
+
+    def get(self, wait: float = 0) -> Optional[Snapshot]:
+        """
+        Returns the latest snapshot immediately. When none exists yet (cold
+        start), waits up to `wait` seconds for the first refresh to finish,
+        and not at all once a load has failed.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.trigger()
+            # After a failed load there is nothing to wait for: answer empty now, retry behind
+            if wait > 0 and self.last_error is None:
+                with self._ready:
+                    self._ready.wait_for(lambda: self._snapshot is not None or self.last_error is not None, wait)
+                snapshot = self._snapshot
+        elif self.is_stale(snapshot):
+            self.trigger()
+        return snapshot
+
+    async def aget(self, wait: float = 0, poll_interval: float = 0.25) -> Optional[Snapshot]:
+        """
+        Async variant of get(): a cold-start wait polls instead of parking a
+        worker thread on the condition, and ends early when the load fails.
+        """
+        import asyncio
+        snapshot = self.get()
+        deadline = time.time() + wait
+        while snapshot is None and self.last_error is None and time.time() < deadline:
+            await asyncio.sleep(poll_interval)
+            snapshot = self._snapshot
+        return snapshot
@@ -0,0 +1,70 @@
+# Startup timing report.
+#
+# main.py imports this module first, so its import time is the reference, and
+# marks each import stage after it; SDKs that are only loaded on first use
+# (google.generativeai, MetaTrader5) record how long that deferred load took.
+# The report is printed once the server is up and served at /api/startup.
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+_started = time.perf_counter()
+_last = _started
+_stages: List[Dict[str, Any]] = []
+_lazy_loads: List[Dict[str, Any]] = []
+_ready_ms: Optional[float] = None
+_lock = threading.Lock()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def mark(stage: str):
+    """Records the time since the previous mark as `stage`."""
+    global _last
+    now = time.perf_counter()
+    with _lock:
+        _stages.append({"stage": stage, "ms": _ms(now - _last)})
+        _last = now
+
+
+def ready():
+    """Marks the server as able to answer requests."""
+    global _ready_ms
+    _ready_ms = _ms(time.perf_counter() - _started)
+
+
+@contextmanager
+def lazy_load(name: str) -> Iterator[None]:
+    """Times a deferred SDK import or model construction."""
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _lazy_loads.append({
+                "name": name,
+                "ms": _ms(time.perf_counter() - began),
+                "at_ms": _ms(began - _started),
+            })
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "import_ms": _ms(_last - _started),
+            "ready_ms": _ready_ms,
+            "stages": list(_stages),
+            "lazy_loads": list(_lazy_loads),
+        }
+
+
+def summary() -> str:
+    data = report()
+    stages = ", ".join(f"{s['stage']} {s['ms']:.0f}ms" for s in data["stages"])
+    line = f"Startup: imports {data['import_ms']:.0f}ms ({stages})"
+    if data["ready_ms"] is not None:
+        line += f", ready after {data['ready_ms']:.0f}ms"
+    return line + "; Gemini and MT5 SDKs load on first use."
@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+# Concurrency ceiling per upstream. Each upstream has its own slots (and its
+# own worker threads for blocking SDK calls), so a slow provider queues up
+# behind itself instead of starving the others. Override with
+# UPSTREAM_CONCURRENCY_<NAME> in the local config.
+DEFAULT_LIMITS = {
+    "gemini": 4,
+    "apify": 2,
+    "coingecko": 8,
+}
+# MT5 is not pooled here: services/mt5_worker serializes it on a single thread.
+
+
+class UpstreamPool:
+    """
+    Bounded concurrency for one upstream, observable through stats():
+    `waiting` is the current queue depth and wait times measure how long
+    callers queued for a slot.
+    """
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"upstream-{name}")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one of the upstream's slots for the duration of the block."""
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.active += 1
+        try:
+            yield
+            self.completed += 1
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            semaphore.release()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs a blocking call on this upstream's own worker threads."""
+        async with self.slot():
+            ctx = contextvars.copy_context()
+            call = functools.partial(ctx.run, fn, *args, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def stream(self, gen_fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Drives a blocking generator on this upstream's worker threads and
+        yields its items asynchronously. The slot is held until it finishes.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+
+        def pump():
+            try:
+                for item in gen_fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except BaseException as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        async with self.slot():
+            ctx = contextvars.copy_context()
+            future = loop.run_in_executor(self._executor, functools.partial(ctx.run, pump))
+            try:
+                while True:
+                    item, error = await queue.get()
+                    if item is done:
+                        if error is not None:
+                            raise error
+                        break
+                    yield item
+            finally:
+                # Keep the slot until the worker thread has actually stopped
+                cancelled.set()
+                try:
+                    await future
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / finished * 1000, 2) if finished else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+_pools: Dict[str, UpstreamPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _limit_for(name: str) -> int:
+    from . import config_manager
+    try:
+        return int(config_manager.get_api_key(f"UPSTREAM_CONCURRENCY_{name.upper()}") or DEFAULT_LIMITS.get(name, 4))
+    except ValueError:
+        return DEFAULT_LIMITS.get(name, 4)
+
+
+def get_pool(name: str) -> UpstreamPool:
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = UpstreamPool(name, _limit_for(name))
+    return pool
+
+
+async def run(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Shortcut for get_pool(name).run(...)."""
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+
+def stats():
+    return [get_pool(name).stats() for name in sorted(set(DEFAULT_LIMITS) | set(_pools))]
@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.answer_cache import AnswerCache
+
+CONTEXT = "Asked about: BTC: $95,000.00 (+2.50%)\nMarket: ETH: $2,800.00 (-1.20%)"
+
+
+def test_answer_cache():
+    print("--- Testing Answer Cache ---")
+    cache = AnswerCache("test", ttl=60)
+    assert cache.get("What's BTC doing?", CONTEXT) is None
+    cache.put("What's BTC doing?", CONTEXT, "Grinding higher.")
+
+    # Same question in other words, and a small price tick in between
+    assert cache.get("what is btc doing", CONTEXT) == "Grinding higher."
+    assert cache.get("whats BTC doing today?", CONTEXT.replace("95,000.00", "95,100.00")) == "Grinding higher."
+
+    # A different asset, or a different question, misses
+    assert cache.get("What's ETH doing?", CONTEXT) is None
+    assert cache.get("Should I short BTC into the weekend?", CONTEXT) is None
+    assert cache.get("What's BTC doing?", "Asked about: SOL: $150.00 (+1.00%)") is None
+
+    # Opposite actions or different levels never share an answer
+    cache.put("Should I buy BTC now?", CONTEXT, "Wait for a pullback.")
+    assert cache.get("should i buy btc now", CONTEXT) == "Wait for a pullback."
+    assert cache.get("Should I sell BTC now?", CONTEXT) is None
+    assert cache.get("Should I not buy BTC now?", CONTEXT) is None
+    cache.put("Will BTC hold 90k?", CONTEXT, "Likely.")
+    assert cache.get("Will BTC hold 80k?", CONTEXT) is None
+
+    # A material move drops the stale answer
+    assert cache.get("What's BTC doing?", CONTEXT.replace("95,000.00", "97,000.00")) is None
+    assert cache.get("What's BTC doing?", CONTEXT) is None
+
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["hits"] == 3 and stats["invalidated"] == 1 and stats["size"] == 2
+
+    expiring = AnswerCache("expiring", ttl=0.05)
+    expiring.put("What's BTC doing?", CONTEXT, "Up.")
+    time.sleep(0.1)
+    assert expiring.get("What's BTC doing?", CONTEXT) is None
+
+
+if __name__ == "__main__":
+    test_answer_cache()
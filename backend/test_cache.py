@@ -0,0 +1,47 @@
+import sys
+import os
+import asyncio
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.cache import TTLCache
+
+
+def test_cancelled_leader():
+    print("--- Testing Cancelled Single-Flight Leader ---")
+    cache = TTLCache("test", 60)
+
+    async def loader():
+        await asyncio.sleep(0.1)
+        return [42]
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0.01)
+        # The first caller's client disconnects; the load carries on for the second
+        leader.cancel()
+        value = await follower
+        assert leader.cancelled()
+        return value
+
+    assert asyncio.run(scenario()) == [42]
+    assert cache.loads == 1 and cache.get("k") == [42]
+
+    async def failing():
+        raise ValueError("upstream down")
+
+    async def shared_error():
+        return await asyncio.gather(cache.aget_or_load("e", failing), cache.aget_or_load("e", failing),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(shared_error())
+    print(errors)
+    assert all(isinstance(e, ValueError) for e in errors) and cache.loads == 2
+    assert cache.get("e") is None
+
+
+if __name__ == "__main__":
+    test_cancelled_leader()
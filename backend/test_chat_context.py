@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import chat_context
+
+COINS = [
+    {"id": coin_id, "symbol": symbol, "name": name, "current_price": 100.0 + i,
+     "price_change_percentage_24h": 1.5, "last_updated": "2026-01-01T00:00:00Z", "sparkline_7d": []}
+    for i, (coin_id, symbol, name) in enumerate([
+        ("bitcoin", "BTC", "Bitcoin"), ("ethereum", "ETH", "Ethereum"), ("solana", "SOL", "Solana"),
+        ("shiba-inu", "SHIB", "Shiba Inu"), ("chainlink", "LINK", "Chainlink"), ("harmony", "ONE", "Harmony"),
+        ("sonic-3", "S", "Sonic"), ("story-2", "IP", "Story"),
+    ])
+]
+POSITIONS = [
+    {"id": "1", "symbol": "EURUSD", "side": "LONG", "qty": 0.1, "entryPrice": 1.085, "currentPrice": 1.087, "pnl": 20.0},
+    {"id": "2", "symbol": "XAUUSD.m", "side": "SHORT", "qty": 1.0, "entryPrice": 2400, "currentPrice": 2390, "pnl": 100.0},
+]
+
+
+def test_chat_context():
+    print("--- Testing Chat Context ---")
+    index = chat_context.get_index(COINS)
+    assert index.match("What about SOL and shiba inu?") == ["solana", "shiba-inu"]
+    assert index.match("Compare $LINK with ETH and xbt") == ["chainlink", "ethereum", "bitcoin"]
+    # Everyday words only count when written as a ticker
+    assert index.match("is one coin better than link for me") == []
+    # Contractions are not words, and names that are everyday words need a ticker too
+    assert index.match("What's BTC doing?") == ["bitcoin"]
+    assert index.match("What's the story with BTC's rally?") == ["bitcoin"]
+    assert index.match("Is $S or IP the better buy?") == ["sonic-3", "story-2"]
+
+    assert [p["id"] for p in chat_context.match_positions("How is my euro trade?", POSITIONS)] == ["1"]
+    assert [p["id"] for p in chat_context.match_positions("EUR/USD outlook", POSITIONS)] == ["1"]
+    assert [p["id"] for p in chat_context.match_positions("Should I short gold?", POSITIONS)] == ["2"]
+    assert len(chat_context.match_positions("Summarize my portfolio", POSITIONS)) == 2
+
+    context = chat_context.build_context("Is SOL overbought? And my gold trade?", COINS, POSITIONS, token_budget=300)
+    print(context)
+    lines = context.split("\n")
+    assert lines[0].startswith("Open positions: XAUUSD.m")
+    assert lines[1].startswith("Asked about: SOL")
+    assert lines[2].startswith("Market: BTC")
+
+    # The most relevant items survive a tight budget
+    tight = chat_context.build_context("Is SOL overbought?", COINS, [], token_budget=15)
+    print(tight)
+    assert tight.startswith("Asked about: SOL") and "BTC" not in tight
+
+
+if __name__ == "__main__":
+    test_chat_context()
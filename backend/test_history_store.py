@@ -0,0 +1,52 @@
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import config_manager, history_store
+
+
+def test_history_store():
+    print("--- Testing History Store ---")
+    config_manager._config_dir = Path(tempfile.mkdtemp(prefix="history_store_"))
+    history_store._series.clear()
+    root = config_manager.get_config_dir() / "history"
+
+    # Ids that are not CoinGecko-shaped never reach the disk
+    for bad in ("..", ".", "../config", "Bitcoin", "btc usd", ""):
+        assert not history_store.valid_coin_id(bad)
+        try:
+            history_store.get_series(bad, "daily")
+            raise AssertionError(f"{bad!r} was accepted")
+        except ValueError:
+            pass
+
+    # Looking up a coin creates nothing until data is written
+    series = history_store.get_series("bitcoin", "daily")
+    assert series.read()["ts"].size == 0 and not root.exists()
+    now_ms = int(time.time() * 1000)
+    ts = np.array([now_ms - 2 * 86400000, now_ms - 86400000, now_ms], dtype=np.int64)
+    series.merge(ts, np.array([1.0, 2.0, 3.0]), np.zeros(3))
+    assert (root / "bitcoin" / "daily" / "price.bin").exists()
+    assert series.read()["price"].tolist() == [1.0, 2.0, 3.0]
+
+    # Open series are bounded; an evicted one is reopened from disk
+    limit, history_store.MAX_OPEN_SERIES = history_store.MAX_OPEN_SERIES, 3
+    try:
+        for i in range(10):
+            history_store.get_series(f"coin-{i}", "daily")
+        assert len(history_store._series) == 3
+        assert history_store.get_series("bitcoin", "daily").read()["price"].tolist() == [1.0, 2.0, 3.0]
+    finally:
+        history_store.MAX_OPEN_SERIES = limit
+    assert sorted(p.name for p in root.iterdir()) == ["bitcoin"]
+
+
+if __name__ == "__main__":
+    test_history_store()
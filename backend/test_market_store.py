@@ -0,0 +1,63 @@
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.market_store import MarketStore
+
+
+def test_market_store():
+    print("--- Testing Market Store ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MarketStore(Path(tmp) / "market.db")
+        now = time.time()
+
+        coins = [{"id": f"coin-{i}", "symbol": f"C{i}", "current_price": 100.0 + i, "sparkline_7d": [1.0, 2.0]}
+                 for i in range(5)]
+        store.put_prices("usd", coins, fetched_at=now - 120)
+        store.put_prices("usd", [{**c, "current_price": c["current_price"] + 1} for c in coins], fetched_at=now - 10)
+
+        # Warm restart: the latest list is served while fresh and long enough
+        assert store.latest_prices("usd", 3, max_age=60)[0]["current_price"] == 101.0
+        assert store.latest_prices("usd", 10, max_age=60) is None
+        assert store.latest_prices("usd", 3, max_age=5) is None
+
+        history = store.price_history("coin-2", "usd", start=now - 3600, end=now)
+        print(f"coin-2 history: {history}")
+        assert [row["price"] for row in history] == [102.0, 103.0]
+
+        news = [{"title": "Fed holds rates - Reuters", "link": "https://x/1", "impact_score": -3},
+                {"title": "BTC tops $100k", "link": "https://x/2", "impact_score": 8}]
+        store.put_news_snapshot(news, {"sentiment": "Bullish", "signal": "Hold"}, fetched_at=now - 300)
+        store.put_news_snapshot(news[1:], {"sentiment": "Neutral", "signal": "Wait"}, fetched_at=now)
+
+        fetched_at, snapshot, current = store.latest_news_snapshot()
+        assert fetched_at == now and current
+        assert [item["title"] for item in snapshot["news"]] == ["BTC tops $100k"]
+        assert snapshot["summary"]["sentiment"] == "Neutral"
+
+        archive = store.news_between(now - 3600, now)
+        assert len(archive) == 2 and archive[0]["first_seen"] == now - 300
+        assert [item["title"] for item in store.news_between(now - 3600, now, min_impact=5)] == ["BTC tops $100k"]
+        assert [s["signal"] for s in store.summaries_between(now - 3600, now)] == ["Wait", "Hold"]
+
+        # A refresh stored without a summary is still restored whole, with the last one marked stale
+        store.put_news_snapshot(news, None, fetched_at=now + 60)
+        fetched_at, snapshot, current = store.latest_news_snapshot()
+        assert fetched_at == now + 60 and len(snapshot["news"]) == 2 and not current
+        assert snapshot["summary"]["sentiment"] == "Neutral"
+        # An unchanged summary is linked to, not stored again
+        store.put_news_snapshot(news, {"sentiment": "Neutral", "signal": "Wait"}, fetched_at=now + 120)
+        assert store.latest_news_snapshot()[2]
+
+        stats = store.stats()
+        print(f"Stats: {stats}")
+        assert stats["rows"] == {"price_snapshots": 10, "news_items": 2, "summaries": 2}
+
+
+if __name__ == "__main__":
+    test_market_store()
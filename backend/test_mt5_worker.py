@@ -0,0 +1,102 @@
+
+import sys
+import os
+import asyncio
+import time
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import fake_mt5, metatrader_service
+from services.metatrader_service import MT5Service
+from services.mt5_worker import MT5Worker
+
+# Runs against the in-process fake terminal, so this works on Linux too
+metatrader_service.use_backend(fake_mt5)
+
+
+async def run_readers(worker, readers):
+    start = time.perf_counter()
+    results = await asyncio.gather(*(worker.snapshot() for _ in range(readers)))
+    return results, time.perf_counter() - start
+
+
+def _counted(name, counts):
+    original = getattr(fake_mt5, name)
+
+    def wrapper(*args, **kwargs):
+        counts[name] = counts.get(name, 0) + 1
+        return original(*args, **kwargs)
+    return original, wrapper
+
+
+def _echo(value):
+    if value == 13:
+        raise ValueError("unlucky")
+    return value
+
+
+async def _exercise_worker():
+    print("--- Testing MT5 Worker (fake backend) ---")
+    worker = MT5Worker()
+
+    ok, msg = await worker.call(MT5Service.connect, 123456, "password", "Demo-Server")
+    print(f"Connect: {ok} ({msg})")
+    assert ok
+
+    counts = {}
+    originals = {}
+    for name in ("positions_get", "account_info"):
+        originals[name], wrapper = _counted(name, counts)
+        setattr(fake_mt5, name, wrapper)
+    try:
+        for readers in (1, 10, 100):
+            counts.clear()
+            before = fake_mt5.call_count()
+            results, elapsed = await run_readers(worker, readers)
+            calls = fake_mt5.call_count() - before
+            print(f"{readers:>4} concurrent snapshots: {len(results[0]['positions'])} positions, "
+                  f"{calls} terminal calls, {elapsed * 1000:.1f} ms")
+            # Concurrent readers share one round-trip (two if they straddle a tick)
+            assert counts["positions_get"] <= 2 and counts["account_info"] <= 2
+            assert all(r["positions"] == results[0]["positions"] for r in results)
+            assert all(r["account"]["login"] == 123456 for r in results)
+    finally:
+        for name, original in originals.items():
+            setattr(fake_mt5, name, original)
+
+    # Commands batched with snapshots still get their own result (or error)
+    calls = [worker.call(_echo, i) for i in range(30)]
+    reads = [worker.snapshot() for _ in range(10)]
+    results = await asyncio.gather(*calls, *reads, return_exceptions=True)
+    for i, result in enumerate(results[:30]):
+        if i == 13:
+            assert isinstance(result, ValueError)
+        else:
+            assert result == i, (i, result)
+    assert all(isinstance(r, dict) and "positions" in r for r in results[30:])
+
+    # Same load without batching: one positions_get + account_info per reader
+    before = fake_mt5.call_count()
+    start = time.perf_counter()
+    for _ in range(100):
+        MT5Service.get_positions()
+        MT5Service.get_account_info()
+    unbatched = fake_mt5.call_count() - before
+    print(f" 100 unbatched reads: {unbatched} terminal calls, "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    assert unbatched == 200
+
+    await worker.call(MT5Service.disconnect)
+    stats = worker.stats()
+    print(f"Stats: {stats}")
+    assert stats["snapshot_requests"] == 121 and stats["snapshots"] < stats["snapshot_requests"]
+    worker.stop()
+
+
+def test_mt5_worker():
+    asyncio.run(_exercise_worker())
+
+
+if __name__ == "__main__":
+    test_mt5_worker()
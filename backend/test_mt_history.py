@@ -0,0 +1,122 @@
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import config_manager, fake_mt5, metatrader_service, mt_history
+from services.metatrader_service import MT5Service
+from services.mt5_worker import MT5Worker
+
+# Fake terminal, and a throwaway store instead of the user's config dir
+metatrader_service.use_backend(fake_mt5)
+
+
+def test_mt_history():
+    print("--- Testing MT5 History Ingestion (fake backend) ---")
+    config_manager._config_dir = Path(tempfile.mkdtemp(prefix="mt_history_"))
+    fake_mt5.initialize()
+
+    end = int(time.time()) // 60 * 60
+    start = end - 30 * 86400
+
+    began = time.perf_counter()
+    first = MT5Service.ingest_rates("EURUSD", "M1", start, end - 86400)
+    print(f"Initial ingest: {first['rows']} bars, {first['requests']} requests, "
+          f"{(time.perf_counter() - began) * 1000:.1f} ms")
+
+    # Second run only fetches what is missing
+    resumed = MT5Service.ingest_rates("EURUSD", "M1", start, end)
+    print(f"Resumed from {resumed['resumed_from']}: {resumed['rows']} bars, {resumed['requests']} requests")
+    assert resumed["resumed_from"] == end - 86400
+
+    expected = (end - start) // 60 + 1
+    stored = mt_history.get_rates_store("EURUSD", "M1").read()
+    print(f"Stored bars: {len(stored)} (expected {expected})")
+    assert len(stored) == expected
+    assert (stored["time"][1:] - stored["time"][:-1] == 60).all()
+
+    # Page through everything
+    pages, total, cursor = 0, 0, start
+    began = time.perf_counter()
+    while cursor is not None:
+        page = mt_history.candles_page("EURUSD", "M1", start=cursor, limit=5000)
+        total += len(page["candles"]["time"])
+        cursor = page["next"]
+        pages += 1
+    print(f"Paged {total} candles in {pages} pages, {(time.perf_counter() - began) * 1000:.1f} ms")
+    assert total == expected
+
+    # Backfilling older history fetches the gap before the first stored bar, plus the open last bar
+    older = MT5Service.ingest_rates("EURUSD", "M1", start - 5 * 86400, end)
+    print(f"Backfill: {older['rows']} bars, {older['requests']} requests")
+    assert older["resumed_from"] == start - 5 * 86400 and older["requests"] == 2
+    stored = mt_history.get_rates_store("EURUSD", "M1").read()
+    assert len(stored) == expected + 5 * 1440
+    assert (stored["time"][1:] - stored["time"][:-1] == 60).all()
+
+    # A range spanning two earlier ingests fetches only the hole between them
+    MT5Service.ingest_rates("USDJPY", "M1", start, start + 86400)
+    MT5Service.ingest_rates("USDJPY", "M1", start + 3 * 86400, start + 4 * 86400)
+    spanning = MT5Service.ingest_rates("USDJPY", "M1", start, start + 4 * 86400)
+    assert spanning["resumed_from"] == start + 86400 and spanning["requests"] == 2
+    assert len(mt_history.get_rates_store("USDJPY", "M1").read()) == 4 * 1440 + 1
+
+    ticks = MT5Service.ingest_ticks("EURUSD", end - 3 * 3600, end)
+    print(f"Ticks: {ticks['rows']} in {ticks['requests']} requests")
+    # TICK_RATE ticks per second over [from, to + 999 ms], one request per hour-long chunk span
+    expected_ticks = 3 * 3600 * fake_mt5.TICK_RATE + fake_mt5.TICK_RATE
+    assert ticks["rows"] == expected_ticks and ticks["requests"] == 4
+    stored_ticks = mt_history.get_ticks_store("EURUSD").read()
+    assert len(stored_ticks) == expected_ticks
+    assert (stored_ticks["time_msc"][1:] > stored_ticks["time_msc"][:-1]).all()
+    # Re-running only re-fetches from the last stored tick, without duplicating it
+    again = MT5Service.ingest_ticks("EURUSD", end - 3 * 3600, end)
+    assert again["requests"] == 1 and again["resumed_from"] == int(stored_ticks["time_msc"][-1])
+    assert len(mt_history.get_ticks_store("EURUSD").read()) == expected_ticks
+
+    # Reading a symbol nobody ingested creates nothing on disk
+    assert len(mt_history.get_rates_store("NOPE", "H1").read()) == 0
+    assert not (config_manager.get_config_dir() / "mt5_history" / "NOPE").exists()
+    # Names that would resolve outside mt5_history/ are refused before any path is built
+    assert mt_history.valid_symbol("XAUUSD.m") and mt_history.valid_symbol("#AAPL")
+    for bad in (".", "..", "", "../EURUSD", "EUR/USD"):
+        assert not mt_history.valid_symbol(bad)
+        try:
+            mt_history.get_rates_store(bad, "M1")
+            raise AssertionError(f"{bad!r} was accepted")
+        except ValueError:
+            pass
+    fake_mt5.shutdown()
+
+    asyncio.run(_ingest_alongside_snapshots(end))
+
+
+async def _ingest_alongside_snapshots(end):
+    # An ingest queues one terminal request per window: position reads are served in between
+    worker = MT5Worker()
+    await worker.call(MT5Service.connect, 123456, "password", "Demo-Server")
+    latency, fake_mt5.LATENCY = fake_mt5.LATENCY, 0.05
+    try:
+        ingest = asyncio.ensure_future(worker.ingest(MT5Service.rates_ingest_plan, "GBPUSD", "M1",
+                                                     end - 60 * 86400, end))
+        await asyncio.sleep(0.1)
+        snapshot = await worker.snapshot()
+        assert not ingest.done(), "snapshot waited for the whole ingest"
+        result = await ingest
+    finally:
+        fake_mt5.LATENCY = latency
+    print(f"Worker ingest: {result['rows']} bars in {result['requests']} requests, "
+          f"{len(snapshot['positions'])} positions read meanwhile")
+    assert result["requests"] == 9 and result["rows"] == 60 * 1440 + 1
+    await worker.call(MT5Service.disconnect)
+    worker.stop()
+
+
+if __name__ == "__main__":
+    test_mt_history()
@@ -0,0 +1,34 @@
+import sys
+import os
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import news_dedup
+
+HEADLINES = [
+    ("Fed holds rates steady, signals two cuts later this year - Reuters", "https://www.reuters.com/markets/1"),
+    ("Stocks rally as tech earnings beat expectations", "https://www.cnbc.com/2"),
+    ("Fed Holds Rates Steady, Signals Two Cuts Later This Year | CNBC", "https://www.cnbc.com/3"),
+    ("Fed holds rates steady and signals two cuts later this year", "https://apnews.com/4"),
+    ("ECB cuts as markets weigh outlook", "https://www.ft.com/5"),
+    ("Apple cuts as markets weigh outlook", "https://www.ft.com/6"),
+]
+
+
+def test_news_dedup():
+    print("--- Testing Headline Dedup ---")
+    items = [{"title": title, "link": link, "source": "Google Search"} for title, link in HEADLINES]
+    stories = news_dedup.dedupe(items)
+    for story in stories:
+        print(f"{story['title']} <- {[s['source'] for s in story['sources']]}")
+
+    # Syndicated copies collapse into the highest-ranked one; similar templates about different assets do not
+    assert [s["title"] for s in stories] == [HEADLINES[0][0], HEADLINES[1][0], HEADLINES[4][0], HEADLINES[5][0]]
+    assert [s["source"] for s in stories[0]["sources"]] == ["Reuters", "CNBC", "apnews.com"]
+    assert stories[0]["sources"][1]["link"] == "https://www.cnbc.com/3"
+    assert len(stories[1]["sources"]) == 1
+
+
+if __name__ == "__main__":
+    test_news_dedup()
@@ -0,0 +1,87 @@
+import sys
+import os
+import time
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.news_ingest import NewsIngestor, SeenSet, canonical_url
+
+
+def _item(title, link):
+    return {"title": title, "link": link, "source": "Google Search"}
+
+
+FIRST_PAGE = [
+    _item("Fed holds rates steady, signals two cuts later this year - Reuters", "https://www.reuters.com/m/1"),
+    _item("Stocks rally as tech earnings beat expectations", "https://www.cnbc.com/2"),
+]
+SECOND_PAGE = [
+    # The same article behind a tracking link, and a seen headline at another URL
+    _item("Fed holds rates steady, signals two cuts later this year - Reuters",
+          "https://reuters.com/m/1/?utm_source=google#top"),
+    _item("Stocks rally as tech earnings beat expectations", "https://news.example.com/9"),
+    # A new outlet's copy of a story already in the window
+    _item("Fed Holds Rates Steady, Signals Two Cuts Later This Year | CNBC", "https://www.cnbc.com/3"),
+    _item("Oil jumps after surprise OPEC output cut", "https://www.ft.com/4"),
+]
+
+
+def test_news_ingest():
+    print("--- Testing Incremental News Ingestion ---")
+    assert canonical_url("https://WWW.Reuters.com/m/1/?utm_source=x&id=5#top") == "//reuters.com/m/1?id=5"
+
+    ingestor = NewsIngestor(window_size=3)
+    stories = ingestor.ingest(FIRST_PAGE)
+    assert [s["title"] for s in stories] == [FIRST_PAGE[0]["title"], FIRST_PAGE[1]["title"]]
+    ingestor.add(stories)
+
+    # Only the story not seen before goes on to enrichment
+    stories = ingestor.ingest(SECOND_PAGE)
+    print(f"New: {[s['title'] for s in stories]}")
+    assert [s["title"] for s in stories] == ["Oil jumps after surprise OPEC output cut"]
+    ingestor.add(stories)
+
+    window = ingestor.window()
+    assert [s["title"] for s in window] == ["Oil jumps after surprise OPEC output cut",
+                                            FIRST_PAGE[0]["title"], FIRST_PAGE[1]["title"]]
+    assert [s["source"] for s in window[1]["sources"]] == ["Reuters", "CNBC"]
+    assert [s["link"] for s in window[2]["sources"]] == ["https://www.cnbc.com/2", "https://news.example.com/9"]
+
+    # An unchanged page costs nothing downstream
+    assert ingestor.ingest(SECOND_PAGE) == []
+    stats = ingestor.stats()
+    print(f"Stats: {stats}")
+    assert stats["new_items"] == 3 and stats["merged_items"] == 2 and stats["window"] == 3
+
+    # A story that was not added (its enrichment failed) is offered again on the next page
+    retry_page = [_item("Yen slides to a 30-year low", "https://www.ft.com/7")]
+    assert len(ingestor.ingest(retry_page)) == 1
+    assert [s["title"] for s in ingestor.ingest(retry_page)] == ["Yen slides to a 30-year low"]
+
+    # The window is capped by size and age
+    ingestor.add([_item("Gold hits record high", "https://x.com/5")])
+    assert len(ingestor.window()) == 3 and ingestor.window()[0]["title"] == "Gold hits record high"
+    ingestor.window_age = 0.05
+    time.sleep(0.1)
+    ingestor.add([])
+    assert ingestor.window() == []
+
+    # A restored window counts as seen
+    restored = NewsIngestor()
+    restored.restore(window, time.time())
+    assert restored.ingest(FIRST_PAGE + SECOND_PAGE) == []
+
+    # Seen fingerprints expire
+    seen = SeenSet(max_size=2, ttl=0.05)
+    seen.add("a")
+    seen.add("b")
+    seen.add("c")
+    seen.expire()
+    assert len(seen) == 2 and "a" not in seen and "c" in seen
+    time.sleep(0.1)
+    assert "c" not in seen
+
+
+if __name__ == "__main__":
+    test_news_ingest()
@@ -0,0 +1,55 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import rate_limit
+from services.rate_limit import RateLimiter
+
+
+def test_rate_limit():
+    print("--- Testing Rate Limiter ---")
+    limiter = RateLimiter("test", per_minute=600, burst=2)  # one token every 100ms
+
+    # The burst is served immediately
+    assert limiter.acquire() == 0.0 and limiter.acquire() == 0.0
+
+    # With the bucket empty, an interactive caller overtakes a queued background one
+    order = []
+
+    def call(level, label):
+        limiter.acquire(level)
+        order.append(label)
+
+    background = threading.Thread(target=call, args=(rate_limit.BACKGROUND, "background"))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=(rate_limit.INTERACTIVE, "interactive"))
+    interactive.start()
+    background.join()
+    interactive.join()
+    print(f"Grant order: {order}")
+    assert order == ["interactive", "background"]
+
+    # A 429 pauses the bucket for the Retry-After period
+    async def after_backoff():
+        limiter.backoff(rate_limit.backoff_delay(0, "0.3"))
+        return await limiter.aacquire()
+
+    waited = asyncio.run(after_backoff())
+    print(f"Waited {waited:.2f}s after backoff")
+    assert waited >= 0.25
+
+    stats = limiter.stats()
+    print(f"Stats: {stats}")
+    assert stats["throttled"] == 1
+    assert stats["granted"] == {"interactive": 4, "normal": 0, "background": 1}
+    assert rate_limit.backoff_delay(1) == 4.0
+
+
+if __name__ == "__main__":
+    test_rate_limit()
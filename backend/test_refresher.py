@@ -0,0 +1,39 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add the current directory to sys.path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.refresher import BackgroundRefresher
+
+
+def _failing_loader():
+    time.sleep(0.2)
+    raise RuntimeError("No news returned")
+
+
+def test_refresher_cold_start_failure():
+    print("--- Testing Refresher Cold-Start Failure ---")
+    refresher = BackgroundRefresher("test", _failing_loader, interval=60)
+    refresher.start()
+    try:
+        # The first request waits for the load, and no longer once it fails
+        started = time.time()
+        assert asyncio.run(refresher.aget(5, poll_interval=0.05)) is None
+        first = time.time() - started
+        print(f"First cold request returned after {first:.2f}s ({refresher.last_error})")
+        assert first < 1 and refresher.last_error == "No news returned"
+
+        # Later requests answer empty at once while retries run behind them
+        started = time.time()
+        assert refresher.get(5) is None
+        assert asyncio.run(refresher.aget(5)) is None
+        assert time.time() - started < 0.1
+    finally:
+        refresher.stop()
+
+
+if __name__ == "__main__":
+    test_refresher_cold_start_failure()
@@ -4,6 +4,8 @@ export async function GET(request: Request) {
     const { searchParams } = new URL(request.url);
     const vs_currency = searchParams.get('vs_currency') || 'usd';
     const per_page = searchParams.get('per_page') || '100';
+    // Optional projection, e.g. fields=id,current_price for price-only callers
+    const fields = (searchParams.get('fields') || '').split(',').map(f => f.trim()).filter(Boolean);
 
     try {
         const res = await fetch(
@@ -38,6 +40,11 @@ export async function GET(request: Request) {
             last_updated: coin.last_updated,
         }));
 
+        if (fields.length) {
+            return NextResponse.json(coins.map((coin: Record<string, unknown>) =>
+                Object.fromEntries(fields.map(f => [f, coin[f] ?? null]))
+            ));
+        }
         return NextResponse.json(coins);
     } catch (error) {
         console.error('CoinGecko fetch error:', error);
@@ -27,7 +27,7 @@ export default React.memo(function MarketWidget({ onSelectSymbol, limit }: { onS
         const fetchPrices = async () => {
             try {
                 // Fetch top 50 to have a pool for searching
-                const res = await fetch('/api/crypto?per_page=50');
+                const res = await fetch('/api/crypto?per_page=50&fields=id,symbol,name,image,current_price,price_change_percentage_24h');
                 if (res.ok) {
                     const data = await res.json();
                     setAllCoins(data);
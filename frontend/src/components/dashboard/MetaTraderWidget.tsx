@@ -123,37 +123,91 @@ export default function MetaTraderWidget() {
     };
 
     useEffect(() => {
-        let interval: NodeJS.Timeout;
-        if (status === 'connected') {
-            const fetchPositions = async () => {
-                try {
-                    const res = await fetch(`${API_URL}/api/mt/positions`);
-                    if (res.ok) {
-                        const data = await res.json();
-                        if (data.status === 'success') {
-                            const newTrades = data.positions.map((p: any) => ({
-                                ...p,
-                                openedAt: new Date(p.openedAt)
-                            }));
-                            setTrades(newTrades);
-                            setSummary({ balance: data.balance, equity: data.equity, profit: data.profit });
-
-                            // Prevent error if there are trades but no active symbol (auto-select first)
-                            if (newTrades.length > 0 && !newTrades.find((t: any) => t.symbol === activeSymbol)) {
-                                setActiveSymbol(newTrades[0].symbol);
-                            }
-                        }
+        if (status !== 'connected') return;
+
+        let interval: NodeJS.Timeout | undefined;
+        let ws: WebSocket | null = null;
+        let disposed = false;
+        // Latest positions keyed by ticket id; stream diffs are applied onto this map
+        const positions = new Map<string, any>();
+
+        const publish = () => {
+            const newTrades = Array.from(positions.values()).map((p: any) => ({
+                ...p,
+                openedAt: new Date(p.openedAt)
+            }));
+            setTrades(newTrades);
+
+            // Prevent error if there are trades but no active symbol (auto-select first)
+            setActiveSymbol(current =>
+                newTrades.length > 0 && !newTrades.find((t: any) => t.symbol === current)
+                    ? newTrades[0].symbol
+                    : current
+            );
+        };
+
+        const replaceAll = (list: any[]) => {
+            positions.clear();
+            list.forEach((p: any) => positions.set(p.id, p));
+            publish();
+        };
+
+        const fetchPositions = async () => {
+            try {
+                const res = await fetch(`${API_URL}/api/mt/positions`);
+                if (res.ok) {
+                    const data = await res.json();
+                    if (data.status === 'success') {
+                        replaceAll(data.positions);
+                        setSummary({ balance: data.balance, equity: data.equity, profit: data.profit });
                     }
-                } catch (e) {
-                    console.error('Polling error', e);
                 }
-            };
+            } catch (e) {
+                console.error('Polling error', e);
+            }
+        };
 
+        const startPolling = () => {
+            if (disposed || interval) return;
             fetchPositions(); // trigger immediately
             interval = setInterval(fetchPositions, 2000); // Poll every 2 seconds
+        };
+
+        // Prefer the pushed stream; fall back to polling if the node doesn't support it
+        try {
+            ws = new WebSocket(`${API_URL.replace(/^http/, 'ws')}/ws/mt/positions`);
+            ws.onmessage = (event) => {
+                const msg = JSON.parse(event.data);
+                if (msg.type === 'snapshot') {
+                    replaceAll(msg.positions);
+                    setSummary({ balance: msg.balance, equity: msg.equity, profit: msg.profit });
+                } else if (msg.type === 'diff') {
+                    msg.opened.forEach((p: any) => positions.set(p.id, p));
+                    msg.closed.forEach((id: string) => positions.delete(id));
+                    msg.changed.forEach((c: any) => {
+                        const prev = positions.get(c.id);
+                        if (prev) positions.set(c.id, { ...prev, ...c });
+                    });
+                    publish();
+                    if (msg.account) setSummary(msg.account);
+                }
+            };
+            ws.onerror = () => startPolling();
+            ws.onclose = () => startPolling();
+        } catch (e) {
+            console.error('Stream error', e);
+            startPolling();
         }
-        return () => clearInterval(interval);
-    }, [status, activeSymbol]);
+
+        return () => {
+            disposed = true;
+            if (ws) {
+                ws.onclose = null;
+                ws.close();
+            }
+            clearInterval(interval);
+        };
+    }, [status, API_URL]);
 
     // --- Disconnected / Login View ---
     if (status !== 'connected') {
@@ -72,7 +72,7 @@ export default function PulseChart({ symbol }: PulseChartProps) {
                 }
 
                 // /api/crypto returns array of coins; find matching by id
-                const statsRes = await fetch(`/api/crypto?per_page=100`);
+                const statsRes = await fetch(`/api/crypto?per_page=100&fields=id,current_price,price_change_percentage_24h,total_volume`);
                 if (statsRes.ok) {
                     const coins: any[] = await statsRes.json();
                     const coin = coins.find(c => c.id === coinId);
@@ -21,7 +21,7 @@ async function fetchPrice(symbol: string): Promise<number> {
             'XRP': 'ripple', 'DOGE': 'dogecoin', 'BNB': 'binancecoin',
         };
         const id = coinMap[symbol.toUpperCase()] || symbol.toLowerCase();
-        const res = await fetch(`/api/crypto?per_page=100`);
+        const res = await fetch(`/api/crypto?per_page=100&fields=id,current_price`);
         if (!res.ok) return 0;
         const coins: any[] = await res.json();
         return coins.find(c => c.id === id)?.current_price ?? 0;
@@ -27,7 +27,7 @@ async function fetchCurrentPrice(symbol: string): Promise<number> {
             'ADAUSDT': 'cardano', 'AVAXUSDT': 'avalanche-2',
         };
         const coinId = coinMap[raw] || raw.replace('USDT', '').toLowerCase();
-        const res = await fetch(`/api/crypto?per_page=100`);
+        const res = await fetch(`/api/crypto?per_page=100&fields=id,current_price`);
         if (!res.ok) return 0;
         const coins: any[] = await res.json();
         const coin = coins.find(c => c.id === coinId);